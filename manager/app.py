@@ -1,52 +1,60 @@
-from fastapi import FastAPI, Request, Form
+from fastapi import FastAPI, Request, Form, Header, WebSocket, WebSocketDisconnect
 from pathlib import Path
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.background import BackgroundScheduler
 import asyncio
+import re
 import threading
 import time
 from core.process_manager import (
     start_server, stop_server, stop_server_graceful, backup_world,
-    send_command, is_running, get_logs, _log_buffer,
+    start_server_async, stop_server_async, get_server_state,
+    send_command, is_running, get_logs, get_logs_since, _log_buffer,
     list_worlds, get_current_world, switch_world, create_new_world,
     delete_world, list_world_backups, restore_backup,
     get_server_properties, update_server_properties, get_whitelist,
     add_to_whitelist, remove_from_whitelist, kick_player, ban_player,
-    apply_gamerule, restart_server,
+    apply_gamerule, apply_gamerules, restart_server, execute_command_async, execute_commands_async,
     check_for_whitelist_requests, approve_whitelist_request, reject_whitelist_request,
-    get_world_config, save_world_config, apply_world_config, check_server_installed, get_current_server_version, get_latest_minecraft_version,
-    install_minecraft_server, update_minecraft_server
+    get_world_config, save_world_config, apply_world_config, check_server_installed, get_current_server_version, get_latest_minecraft_version_async,
+    install_minecraft_server, update_minecraft_server,
+    submit_job, get_job, list_jobs, export_world_archive, get_log_events,
+    get_players, get_player, get_tick_metrics,
+    get_process_metrics, get_launch_profile, set_launch_profile,
+    get_instance, list_instances, create_instance, delete_instance, set_instance_launch_profile, set_instance_rcon,
+    sample_all_tick_metrics, refresh_all_player_rosters, get_crashes, reset_watchdog,
+    run_scheduled_backup, run_scheduled_restart, SCHEDULES_FILE,
+    list_countdowns, cancel_countdown, postpone_countdown
 )
+from core.log_events import EVENT_TYPES
+from core.archive import available_codecs
+from core.prometheus import REGISTRY, CONTENT_TYPE, HTTPMetricsMiddleware
+from core.schedules import ScheduleEngine
 
 
 
 app = FastAPI()
 templates = Jinja2Templates(directory="web/templates")
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
+app.add_middleware(HTTPMetricsMiddleware, histogram=REGISTRY.histogram(
+    "mc_http_request_duration_seconds", "Latence des routes du manager", ("method", "route", "status")))
 
 # ============================================================
 # SCHEDULER AUTOMATIQUE
 # ============================================================
 
-def auto_restart():
-    """Restart serveur proprement"""
-    if is_running():
-        send_command("say §c[AUTO-RESTART] Redémarrage dans 1 minute!")
-        time.sleep(30)
-        send_command("say §c[AUTO-RESTART] Redémarrage dans 30 secondes!")
-        time.sleep(20)
-        send_command("say §c[AUTO-RESTART] Redémarrage dans 10 secondes!")
-        time.sleep(10)
-        stop_server()
-        time.sleep(5)
-        start_server()
-
 # Initialiser scheduler
 scheduler = BackgroundScheduler()
-scheduler.add_job(backup_world, 'interval', minutes=30, id='auto_backup')
-scheduler.add_job(auto_restart, 'interval', hours=2.5, id='auto_restart')
+# Backup / restart : schedules éditables (schedules.json) avec politiques
+schedules = ScheduleEngine(scheduler, SCHEDULES_FILE, {
+    "backup": run_scheduled_backup,
+    "restart": run_scheduled_restart,
+})
+schedules.start()
+scheduler.add_job(refresh_all_player_rosters, 'interval', minutes=5, id='player_roster')
+scheduler.add_job(sample_all_tick_metrics, 'interval', minutes=1, id='tick_metrics')
 scheduler.start()
 
 # ============================================================
@@ -58,24 +66,28 @@ scheduler.start()
 @app.get("/")
 async def index(request: Request):
     server_installed = check_server_installed()
-    current_version = get_current_server_version() if server_installed else None
+    current_version = await asyncio.to_thread(get_current_server_version) if server_installed else None
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "server_installed": server_installed,
         "server_version": current_version,
         "running": is_running(),
-        "logs": get_logs()
+        "logs": get_logs(),
+        "log_seq": _log_buffer.last_seq
     })
 
 
 @app.get("/logs")
-async def get_logs_endpoint():
-    return get_logs()
+async def get_logs_endpoint(since: int | None = None, limit: int | None = None):
+    # Sans curseur : comportement historique (toutes les lignes en mémoire)
+    if since is None:
+        return get_logs()
+    return get_logs_since(since, limit)
 
 @app.get("/status")
 async def get_status():
-    return {"running": is_running()}
+    return {"running": is_running(), "state": get_server_state()}
 
 @app.get("/backups")
 async def list_backups():
@@ -113,7 +125,7 @@ async def update_config(max_players: str = Form(...), enable_whitelist: str = Fo
         print(f"[DEBUG] Monde actuel: {current_world_name}")
         
         # Sauvegarder config monde AVANT arrêt
-        world_config = get_world_config(current_world_name)
+        world_config = dict(get_world_config(current_world_name))
         print(f"[DEBUG] Config avant: {world_config}")
         
         world_config["max_players"] = int(max_players)
@@ -148,6 +160,31 @@ async def update_config(max_players: str = Form(...), enable_whitelist: str = Fo
 
 
 
+@app.get("/launch-profile")
+async def launch_profile(world: str | None = None):
+    """Profil JVM (heap, GC, args, affinité CPU) d'un monde, monde actif par défaut"""
+    if world and ("/" in world or "\\" in world):
+        return JSONResponse({"success": False, "error": "Nom invalide"}, status_code=400)
+    return get_launch_profile(world)
+
+
+@app.post("/launch-profile")
+async def update_launch_profile(heap_min_mb: int = Form(...), heap_max_mb: int = Form(...),
+                                gc: str = Form("default"), extra_args: str = Form(""),
+                                cpu_affinity: str = Form(""), world: str | None = Form(None)):
+    """Enregistre le profil JVM ; appliqué au prochain démarrage du serveur"""
+    result = set_launch_profile({
+        "heap_min_mb": heap_min_mb,
+        "heap_max_mb": heap_max_mb,
+        "gc": gc,
+        "extra_args": extra_args,
+        "cpu_affinity": cpu_affinity or None,
+    }, world)
+    if not result["success"]:
+        return JSONResponse(result, status_code=400)
+    return result
+
+
 @app.get("/whitelist")
 async def get_whitelist_route():
     return get_whitelist()
@@ -155,37 +192,175 @@ async def get_whitelist_route():
 
 @app.post("/whitelist-add")
 async def whitelist_add(username: str = Form(...)):
-    add_to_whitelist(username)
+    await asyncio.to_thread(add_to_whitelist, username)  # résolution UUID hors boucle
     return RedirectResponse(url="/", status_code=303)
 
 
+@app.post("/whitelist-bulk")
+async def whitelist_bulk(usernames: str = Form(...)):
+    """Ajout groupé (pseudos séparés par retours à la ligne, virgules ou espaces)"""
+    names = [name for name in re.split(r"[\s,;]+", usernames) if name]
+    job_id = submit_job("whitelist", add_to_whitelist, names, disk=False)  # API Mojang, pas le disque
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
+
+
 @app.post("/whitelist-remove")
 async def whitelist_remove(username: str = Form(...)):
-    remove_from_whitelist(username)
+    await asyncio.to_thread(remove_from_whitelist, username)  # rechargement (RCON) hors boucle
     return RedirectResponse(url="/", status_code=303)
 
 
+@app.get("/whitelist-requests")
+async def whitelist_requests():
+    """Joueurs refusés par la whitelist (détectés dans les logs)"""
+    return check_for_whitelist_requests()
+
+
+@app.post("/whitelist-approve")
+async def whitelist_approve(username: str = Form(...)):
+    await asyncio.to_thread(approve_whitelist_request, username)  # rechargement (RCON) hors boucle
+    return RedirectResponse(url="/", status_code=303)
+
+
+@app.post("/whitelist-reject")
+async def whitelist_reject(username: str = Form(...)):
+    reject_whitelist_request(username)
+    return RedirectResponse(url="/", status_code=303)
+
+
+@app.get("/events")
+async def log_events(type: str = None, since: int = 0, limit: int = 100):
+    """Événements typés extraits des logs (?type=join|leave|uuid|whitelist_denied|chat|lag|error)"""
+    if type is not None and type not in EVENT_TYPES:
+        return JSONResponse({"success": False, "error": f"Type inconnu: {type}"}, status_code=400)
+    return get_log_events(type, since, min(limit, 500))
+
+
 @app.post("/kick")
-async def kick(username: str = Form(...)):
-    kick_player(username)
+async def kick(request: Request, username: str = Form(...)):
+    result = kick_player(username)
+    # Erreur en JSON pour le dashboard (fetch), simple retour à l'accueil pour un formulaire classique
+    if not result["success"] and _wants_json(request):
+        return JSONResponse(result, status_code=409)
     return RedirectResponse(url="/", status_code=303)
 
 
 @app.post("/ban")
-async def ban(username: str = Form(...)):
-    ban_player(username)
+async def ban(request: Request, username: str = Form(...)):
+    result = ban_player(username)
+    # Erreur en JSON pour le dashboard (fetch), simple retour à l'accueil pour un formulaire classique
+    if not result["success"] and _wants_json(request):
+        return JSONResponse(result, status_code=409)
     return RedirectResponse(url="/", status_code=303)
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Export Prometheus (format texte) : état, joueurs, TPS, process, backups, HTTP"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/metrics/tick")
+async def tick_metrics(resolution: str = "raw", since: float = 0):
+    """Lag, TPS et joueurs en séries temporelles (?resolution=raw|minute|hour)"""
+    try:
+        return get_tick_metrics(resolution, since)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+
+@app.get("/metrics/process")
+async def process_metrics(resolution: str = "raw", since: float = 0):
+    """CPU %, RSS, threads et I/O disque du process Java (lus dans /proc)"""
+    try:
+        return get_process_metrics(resolution, since)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+
+@app.get("/schedules")
+async def schedules_list():
+    """Tâches planifiées : déclencheur, politique, prochaine exécution, dernier résultat"""
+    return schedules.list()
+
+
+@app.put("/schedules/{schedule_id}")
+async def schedules_update(schedule_id: str, request: Request):
+    """Crée ou modifie un schedule (JSON : action, enabled, trigger, policy)"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse({"success": False, "error": "JSON invalide"}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({"success": False, "error": "Objet JSON attendu"}, status_code=400)
+    result = schedules.update(schedule_id, data)
+    if not result["success"]:
+        return JSONResponse(result, status_code=400)
+    return result
+
+
+@app.delete("/schedules/{schedule_id}")
+async def schedules_delete(schedule_id: str):
+    result = schedules.delete(schedule_id)
+    if not result["success"]:
+        return JSONResponse(result, status_code=404)
+    return result
+
+
+@app.post("/schedules/{schedule_id}/run")
+async def schedules_run(schedule_id: str):
+    """Exécute un schedule maintenant (politiques comprises)"""
+    result = await asyncio.to_thread(schedules.run, schedule_id)
+    if result is None:
+        return JSONResponse({"success": False, "error": "Schedule introuvable"}, status_code=404)
+    return result
+
+
+@app.get("/crashes")
+async def crashes(limit: int | None = None):
+    """Crashs détectés (clean / crash / OOM, fin des logs) et état du watchdog"""
+    return get_crashes(limit)
+
+
+@app.post("/crashes/reset")
+async def crashes_reset():
+    return reset_watchdog()
+
+
+@app.get("/players")
+async def players():
+    """Joueurs connectés (table tenue à jour par les logs, réconciliée avec `list`)"""
+    return get_players()
+
+
+@app.get("/players/{username}")
+async def player(username: str):
+    session = get_player(username)
+    if session is None:
+        return JSONResponse({"success": False, "error": f"{username} n'est pas connecté"}, status_code=404)
+    return session
+
+
 @app.post("/gamerule")
 async def gamerule(rule: str = Form(...), value: str = Form(...)):
-    apply_gamerule(rule, value)
+    await asyncio.to_thread(apply_gamerule, rule, value)
     return RedirectResponse(url="/", status_code=303)
 
+@app.post("/gamerules")
+async def gamerules(request: Request):
+    """Plusieurs gamerules d'un coup (JSON {"règle": valeur}), un seul lot de commandes"""
+    try:
+        rules = await request.json()
+    except ValueError:
+        return JSONResponse({"success": False, "error": "JSON invalide"}, status_code=400)
+    if not isinstance(rules, dict) or not rules:
+        return JSONResponse({"success": False, "error": "Objet {règle: valeur} attendu"}, status_code=400)
+    return await asyncio.to_thread(apply_gamerules, rules)
+
 @app.post("/switch-world")
 async def switch_world_route(world: str = Form(...)):
-    result = switch_world(world)
-    return RedirectResponse(url="/", status_code=303)
+    job_id = submit_job("switch_world", switch_world, world)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
 
 @app.post("/create-world")
 async def create_world_route(world_name: str = Form(...)):
@@ -194,8 +369,8 @@ async def create_world_route(world_name: str = Form(...)):
 
 @app.post("/delete-world")
 async def delete_world_route(world_name: str = Form(...)):
-    result = delete_world(world_name)
-    return RedirectResponse(url="/", status_code=303)
+    job_id = submit_job("delete_world", delete_world, world_name)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
 
 @app.get("/world-backups/{world_name}")
 async def get_world_backups(world_name: str):
@@ -203,58 +378,389 @@ async def get_world_backups(world_name: str):
 
 @app.post("/restore-backup")
 async def restore_backup_route(world_name: str = Form(...), backup_file: str = Form(...)):
-    result = restore_backup(world_name, backup_file)
-    return RedirectResponse(url="/", status_code=303)
+    job_id = submit_job("restore", restore_backup, world_name, backup_file)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
 
 @app.post("/backup")
 async def backup():
-    result = backup_world()
-    return RedirectResponse(url="/", status_code=303)
+    job_id = submit_job("backup", backup_world, unique=True)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
+
+@app.post("/backup-archive")
+async def backup_archive(codec: str = Form(None), level: int = Form(None)):
+    """Archive complète du monde, compressée sur tous les coeurs"""
+    if codec and codec not in available_codecs():
+        return JSONResponse({"success": False, "error": f"Codec indisponible: {codec}"}, status_code=400)
+    job_id = submit_job("archive", export_world_archive, codec, level, unique=True)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
+
+@app.get("/archive-codecs")
+async def archive_codecs():
+    return available_codecs()
+
+@app.get("/jobs")
+async def jobs():
+    return list_jobs()
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return JSONResponse({"success": False, "error": "Job introuvable"}, status_code=404)
+    return job
 
 @app.post("/stop-graceful")
 async def stop_graceful():
-    threading.Thread(target=stop_server_graceful, daemon=True).start()
+    stop_server_graceful()
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/restart")
-async def restart():
-    import threading
-    threading.Thread(target=restart_server, daemon=True).start()
+async def restart(request: Request):
+    result = restart_server()
+    if not result["success"] and _wants_json(request):
+        return JSONResponse(result, status_code=409)
     return RedirectResponse(url="/", status_code=303)
 
+@app.get("/countdowns")
+async def countdowns(active: bool = False):
+    """Comptes à rebours (arrêt, restart) : état, temps restant, prochaine annonce"""
+    return list_countdowns(active)
+
+@app.post("/countdowns/{countdown_id}/cancel")
+async def countdown_cancel(countdown_id: str):
+    result = cancel_countdown(countdown_id)
+    if not result["success"]:
+        return JSONResponse(result, status_code=409)
+    return result
+
+@app.post("/countdowns/{countdown_id}/postpone")
+async def countdown_postpone(countdown_id: str, seconds: int = 60):
+    result = postpone_countdown(countdown_id, seconds)
+    if not result["success"]:
+        return JSONResponse(result, status_code=409)
+    return result
+
 @app.post("/start")
 async def start():
-    start_server()
+    await start_server_async()
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/stop")
 async def stop():
-    stop_server()
+    # Attente non bloquante : les autres requêtes et flux de logs continuent
+    await stop_server_async()
     return RedirectResponse(url="/", status_code=303)
 
 
+def _wants_json(request):
+    return "application/json" in request.headers.get("accept", "")
+
 @app.post("/command")
-async def command(cmd: str = Form(...)):
+async def command(request: Request, cmd: str = Form(...)):
+    """Exécute une commande ; réponse du serveur en JSON si demandé (Accept: application/json)"""
+    result = {"success": True, "channel": None, "reply": None}
     if cmd.strip():
-        send_command(cmd)
+        result = await execute_command_async(cmd.strip())
+    if _wants_json(request):
+        return JSONResponse(result, status_code=200 if result["success"] else 409)
     return RedirectResponse(url="/", status_code=303)
 
-@app.get("/logs/stream")
-async def log_stream():
+@app.post("/command-batch")
+async def command_batch(request: Request):
+    """Lot de commandes (JSON {"commands": [...]}) : un aller-retour RCON, réponses dans l'ordre"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse({"success": False, "error": "JSON invalide"}, status_code=400)
+    commands = data.get("commands") if isinstance(data, dict) else data
+    if not isinstance(commands, list) or not all(isinstance(c, str) and c.strip() for c in commands):
+        return JSONResponse({"success": False, "error": "Liste de commandes attendue"}, status_code=400)
+    if not commands:
+        return {"success": True, "channel": None, "results": []}
+    result = await execute_commands_async([c.strip() for c in commands])
+    return JSONResponse(result, status_code=200 if result["success"] else 409)
+
+def _resume_cursor(store, since, last_event_id=None):
+    """Curseur de reprise : Last-Event-ID (reconnexion EventSource), ?since= ou nouvelles lignes seulement"""
+    if last_event_id and last_event_id.isdigit():
+        return int(last_event_id)
+    if since is not None:
+        return since
+    return store.last_seq
+
+
+async def _follow_logs(store, sub, cursor):
+    """Rattrapage depuis le LogStore puis lots poussés par le hub, sans doublon ni trou"""
+    # Abonnement AVANT le rattrapage : rien ne peut passer entre les deux
+    entries, cursor, _ = store.since(cursor)
+    if entries:
+        yield entries
+    
+    while True:
+        batch = [e for e in await sub.get() if e[0] > cursor]
+        if batch:
+            cursor = batch[-1][0]
+            yield batch
+
+
+SSE_KEEPALIVE = 15  # secondes
+
+
+def _log_stream_response(instance, since, last_event_id):
+    """Flux SSE des logs d'une instance"""
+    cursor = _resume_cursor(instance.log_buffer, since, last_event_id)
+
     async def event_generator():
-        last_len = len(_log_buffer)
-        yield "data: [CONNECTED]\n\n"
-        
-        while True:
-            await asyncio.sleep(0.5)
-            current_len = len(_log_buffer)
-            if current_len > last_len:
-                new_logs = list(_log_buffer)[-15:]
-                data_lines = '\n'.join(new_logs)
-                yield f"data: {data_lines}\n\n"
-                last_len = current_len
+        with instance.log_hub.subscribe() as sub:
+            yield "data: [CONNECTED]\n\n"
+            batches = _follow_logs(instance.log_buffer, sub, cursor)
+            next_batch = None
+            try:
+                while True:
+                    if next_batch is None:
+                        next_batch = asyncio.ensure_future(anext(batches))
+                    done, _ = await asyncio.wait({next_batch}, timeout=SSE_KEEPALIVE)
+                    if not done:
+                        # Commentaire SSE : garde la connexion ouverte derrière un proxy
+                        yield ": keepalive\n\n"
+                        continue
+                    entries = next_batch.result()
+                    next_batch = None
+                    yield "".join(f"id: {seq}\ndata: {line}\n\n" for seq, line in entries)
+            finally:
+                if next_batch is not None:
+                    next_batch.cancel()
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+async def _log_websocket(websocket, instance, since):
+    """Flux WebSocket des logs d'une instance"""
+    await websocket.accept()
+    cursor = _resume_cursor(instance.log_buffer, since)
+    
+    with instance.log_hub.subscribe() as sub:
+        batches = _follow_logs(instance.log_buffer, sub, cursor)
+        # Lecture en parallèle : détecte la déconnexion même sans nouvelles lignes
+        disconnected = asyncio.ensure_future(websocket.receive_text())
+        next_batch = None
+        try:
+            while True:
+                if next_batch is None:
+                    next_batch = asyncio.ensure_future(anext(batches))
+                await asyncio.wait({next_batch, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    if disconnected.exception() is not None:
+                        break
+                    # Message client ignoré, on réarme la lecture
+                    disconnected = asyncio.ensure_future(websocket.receive_text())
+                    continue
+                entries = next_batch.result()
+                next_batch = None
+                await websocket.send_json({
+                    "seq": entries[-1][0],
+                    "lines": [line for _, line in entries]
+                })
+        except WebSocketDisconnect:
+            pass
+        finally:
+            disconnected.cancel()
+            if next_batch is not None:
+                next_batch.cancel()
+
+
+@app.get("/logs/stream")
+async def log_stream(since: int | None = None, last_event_id: str | None = Header(None)):
+    return _log_stream_response(get_instance("default"), since, last_event_id)
+
+
+@app.websocket("/logs/ws")
+async def log_websocket(websocket: WebSocket, since: int | None = None):
+    await _log_websocket(websocket, get_instance("default"), since)
+
+
+# ============================================================
+# ROUTES INSTANCES (/instances/{id}/... ; "default" = serveur principal)
+# ============================================================
+
+def _instance_or_404(instance_id):
+    instance = get_instance(instance_id)
+    if instance is None:
+        return None, JSONResponse({"success": False, "error": f"Instance '{instance_id}' introuvable"},
+                                  status_code=404)
+    return instance, None
+
+
+@app.get("/instances")
+async def instances():
+    return list_instances()
+
+
+@app.post("/instances")
+async def instance_create(instance_id: str = Form(...), port: int = Form(...),
+                          heap_min_mb: int = Form(1024), heap_max_mb: int = Form(1024), gc: str = Form("default")):
+    result = create_instance(instance_id, port, {"heap_min_mb": heap_min_mb, "heap_max_mb": heap_max_mb, "gc": gc})
+    if not result["success"]:
+        return JSONResponse(result, status_code=400)
+    return result
+
+
+@app.get("/instances/{instance_id}")
+async def instance_status(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    return error or instance.to_dict()
+
+
+@app.delete("/instances/{instance_id}")
+async def instance_delete(instance_id: str):
+    result = delete_instance(instance_id)
+    if not result["success"]:
+        return JSONResponse(result, status_code=409)
+    return result
+
+
+@app.post("/instances/{instance_id}/start")
+async def instance_start(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    return {"success": await instance.start_async(), "state": instance.state}
+
+
+@app.post("/instances/{instance_id}/stop")
+async def instance_stop(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    return {"success": await instance.stop_async(), "state": instance.state}
+
+
+@app.post("/instances/{instance_id}/restart")
+async def instance_restart(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    await instance.stop_async()
+    return {"success": await instance.start_async(), "state": instance.state}
+
+
+@app.post("/instances/{instance_id}/command")
+async def instance_command(instance_id: str, cmd: str = Form(...)):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    if not instance.is_running:
+        return JSONResponse({"success": False, "error": "Serveur arrêté"}, status_code=409)
+    if not cmd.strip():
+        return {"success": True, "channel": None, "reply": None}
+    return await instance.execute_async(cmd.strip())
+
+
+@app.get("/instances/{instance_id}/logs")
+async def instance_logs(instance_id: str, since: int = 0, limit: int | None = None):
+    instance, error = _instance_or_404(instance_id)
+    return error or instance.logs_since(since, limit)
+
+
+@app.get("/instances/{instance_id}/logs/stream")
+async def instance_log_stream(instance_id: str, since: int | None = None,
+                              last_event_id: str | None = Header(None)):
+    instance, error = _instance_or_404(instance_id)
+    return error or _log_stream_response(instance, since, last_event_id)
+
+
+@app.websocket("/instances/{instance_id}/logs/ws")
+async def instance_log_websocket(websocket: WebSocket, instance_id: str, since: int | None = None):
+    instance = get_instance(instance_id)
+    if instance is None:
+        await websocket.close(code=4404)
+        return
+    await _log_websocket(websocket, instance, since)
+
+
+@app.get("/instances/{instance_id}/events")
+async def instance_events(instance_id: str, type: str = None, since: int = 0, limit: int = 100):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    if type is not None and type not in EVENT_TYPES:
+        return JSONResponse({"success": False, "error": f"Type inconnu: {type}"}, status_code=400)
+    return instance.log_events(type, since, limit)
+
+
+@app.get("/instances/{instance_id}/players")
+async def instance_players(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    return error or instance.get_players()
+
+
+@app.get("/instances/{instance_id}/crashes")
+async def instance_crashes(instance_id: str, limit: int | None = None):
+    instance, error = _instance_or_404(instance_id)
+    return error or instance.crashes(limit)
+
+
+@app.post("/instances/{instance_id}/crashes/reset")
+async def instance_crashes_reset(instance_id: str):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    instance.watchdog.reset()
+    return {"success": True, "watchdog": instance.watchdog.status()}
+
+
+@app.get("/instances/{instance_id}/metrics/tick")
+async def instance_tick_metrics(instance_id: str, resolution: str = "raw", since: float = 0):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    try:
+        return instance.get_tick_metrics(resolution, since)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+
+@app.get("/instances/{instance_id}/metrics/process")
+async def instance_process_metrics(instance_id: str, resolution: str = "raw", since: float = 0):
+    instance, error = _instance_or_404(instance_id)
+    if error:
+        return error
+    try:
+        return instance.get_process_metrics(resolution, since)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+
+@app.post("/instances/{instance_id}/rcon")
+async def instance_rcon(instance_id: str, enabled: bool = Form(...)):
+    """Active / désactive RCON (commandes avec réponse) ; sinon les commandes passent par stdin"""
+    result = await asyncio.to_thread(set_instance_rcon, instance_id, enabled)
+    if not result["success"]:
+        return JSONResponse(result, status_code=400)
+    return result
+
+
+@app.post("/instances/{instance_id}/launch-profile")
+async def instance_launch_profile(instance_id: str, heap_min_mb: int = Form(...), heap_max_mb: int = Form(...),
+                                  gc: str = Form("default"), extra_args: str = Form(""),
+                                  cpu_affinity: str = Form("")):
+    """Profil JVM d'une instance ("default" : profil du monde actif, voir /launch-profile)"""
+    profile = {
+        "heap_min_mb": heap_min_mb,
+        "heap_max_mb": heap_max_mb,
+        "gc": gc,
+        "extra_args": extra_args,
+        "cpu_affinity": cpu_affinity or None,
+    }
+    if instance_id == "default":
+        result = set_launch_profile(profile)
+    else:
+        result = set_instance_launch_profile(instance_id, profile)
+    if not result["success"]:
+        return JSONResponse(result, status_code=400)
+    return result
+
+
 # ============================================================
 # ROUTES INSTALLATION / MISE À JOUR SERVEUR
 # ============================================================
@@ -263,8 +769,8 @@ async def log_stream():
 async def server_status():
     """Statut installation serveur"""
     installed = check_server_installed()
-    current_version = get_current_server_version() if installed else None
-    latest = get_latest_minecraft_version()
+    current_version = await asyncio.to_thread(get_current_server_version) if installed else None
+    latest = await get_latest_minecraft_version_async()
     
     return {
         "installed": installed,
@@ -279,60 +785,47 @@ async def server_status():
 @app.get("/install-server-form")
 async def install_server_form(request: Request):
     """Formulaire installation serveur"""
-    latest = get_latest_minecraft_version()
+    latest = await get_latest_minecraft_version_async()
     
     return templates.TemplateResponse("install_server.html", {
         "request": request,
         "latest_version": latest["version"] if latest else "Erreur API",
         "download_url": latest["url"] if latest else "",
+        "sha1": latest["sha1"] if latest else "",
+        "size": latest["size"] if latest else "",
         "size_mb": latest["size_mb"] if latest else 0
     })
 
 
 @app.post("/install-server")
-async def install_server_action(download_url: str = Form(...)):
-    """Action installation serveur"""
-    import threading
-    
-    def install_thread():
-        result = install_minecraft_server(download_url)
-        if result["success"]:
-            print("[INSTALL] ✓ Installation terminée")
-        else:
-            print(f"[INSTALL] ✗ Erreur: {result.get('error', 'Erreur inconnue')}")
-    
-    threading.Thread(target=install_thread, daemon=True).start()
-    
-    return RedirectResponse(url="/?install_started=true", status_code=303)
+async def install_server_action(download_url: str = Form(...), sha1: str = Form(""), size: str = Form("")):
+    """Action installation serveur (progression via /jobs/{id})"""
+    # Téléchargement : pool général (l'update, qui archive tout le serveur avant, reste une tâche disque)
+    job_id = submit_job("install", install_minecraft_server, download_url, sha1,
+                        int(size) if size.isdigit() else None, unique=True, disk=False)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
 
 
 @app.get("/update-server-form")
 async def update_server_form(request: Request):
     """Formulaire mise à jour serveur"""
-    current_version = get_current_server_version()
-    latest = get_latest_minecraft_version()
+    current_version = await asyncio.to_thread(get_current_server_version)
+    latest = await get_latest_minecraft_version_async()
     
     return templates.TemplateResponse("update_server.html", {
         "request": request,
         "current_version": current_version or "Inconnue",
         "latest_version": latest["version"] if latest else "Erreur API",
         "download_url": latest["url"] if latest else "",
+        "sha1": latest["sha1"] if latest else "",
+        "size": latest["size"] if latest else "",
         "size_mb": latest["size_mb"] if latest else 0
     })
 
 
 @app.post("/update-server")
-async def update_server_action(download_url: str = Form(...)):
-    """Action mise à jour serveur"""
-    import threading
-    
-    def update_thread():
-        result = update_minecraft_server(download_url)
-        if result["success"]:
-            print("[UPDATE] ✓ Mise à jour terminée")
-        else:
-            print(f"[UPDATE] ✗ Erreur: {result.get('error', 'Erreur inconnue')}")
-    
-    threading.Thread(target=update_thread, daemon=True).start()
-    
-    return RedirectResponse(url="/?update_started=true", status_code=303)
+async def update_server_action(download_url: str = Form(...), sha1: str = Form(""), size: str = Form("")):
+    """Action mise à jour serveur (progression via /jobs/{id})"""
+    job_id = submit_job("update", update_minecraft_server, download_url, sha1,
+                        int(size) if size.isdigit() else None, unique=True)
+    return RedirectResponse(url=f"/?job={job_id}", status_code=303)
@@ -0,0 +1,193 @@
+import gzip
+import os
+import shutil
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# zstd optionnel : module standard (Python 3.14+) ou paquet `zstandard` s'il est installé
+try:
+    from compression import zstd as _zstd
+    _zstandard = None
+except ImportError:
+    _zstd = None
+    try:
+        import zstandard as _zstandard
+    except ImportError:
+        _zstandard = None
+
+
+BLOCK_SIZE = 4 * 1024 * 1024  # flux tar découpé en blocs compressés indépendamment
+
+
+def _gzip_member(data, level):
+    # Membre gzip autonome : leur concaténation reste un .gz valide (gzip, tar -xzf, tarfile)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _zstd_frame(data, level):
+    # Trames zstd concaténées : idem, un seul .zst lisible
+    if _zstd is not None:
+        return _zstd.compress(data, level=level)
+    return _zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def zstd_available():
+    return _zstd is not None or _zstandard is not None
+
+
+# codec -> (extension, fonction de compression par bloc, niveau par défaut)
+CODECS = {
+    "store": (".tar", None, 0),
+    "deflate-fast": (".tar.gz", _gzip_member, 1),
+    "deflate": (".tar.gz", _gzip_member, 6),
+    "zstd": (".tar.zst", _zstd_frame, 3),
+}
+
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tar.zst")
+
+
+def available_codecs():
+    return [name for name in CODECS if name != "zstd" or zstd_available()]
+
+
+class _ParallelBlockWriter:
+    """Fichier en écriture seule : compresse les blocs en parallèle et les écrit dans l'ordre
+
+    zlib/zstd relâchent le GIL pendant la compression : un pool de threads
+    occupe tous les coeurs sans copier les blocs vers des sous-process.
+    """
+
+    def __init__(self, fileobj, compress, level, executor, max_pending, progress=None):
+        self._file = fileobj
+        self._compress = compress
+        self._level = level
+        self._executor = executor
+        self._max_pending = max_pending
+        self._progress = progress
+        self._buffer = bytearray()
+        self._pending = deque()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_in += len(data)
+        if self._progress:
+            self._progress.advance(bytes=len(data))
+        while len(self._buffer) >= BLOCK_SIZE:
+            block = bytes(self._buffer[:BLOCK_SIZE])
+            del self._buffer[:BLOCK_SIZE]
+            self._submit(block)
+        return len(data)
+
+    def _submit(self, block):
+        if self._compress is None:
+            self._emit(block)
+            return
+        self._pending.append(self._executor.submit(self._compress, block, self._level))
+        # Fenêtre bornée : la mémoire reste ~ max_pending blocs
+        while len(self._pending) > self._max_pending:
+            self._emit(self._pending.popleft().result())
+
+    def _emit(self, data):
+        self._file.write(data)
+        self.bytes_out += len(data)
+
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._emit(self._pending.popleft().result())
+
+
+def write_archive(source_dir, dest_base, codec="deflate-fast", level=None, arcname=None,
+                  workers=None, progress=None):
+    """Archive tar de source_dir compressée en parallèle -> stats (fichier, MB/s...)
+
+    arcname=None place le contenu à la racine de l'archive (comme make_archive),
+    sinon le dossier est ajouté sous ce nom.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Codec inconnu: {codec}")
+    if codec == "zstd" and not zstd_available():
+        print("[ARCHIVE] zstd indisponible, repli sur deflate-fast")
+        codec = "deflate-fast"
+
+    extension, compress, default_level = CODECS[codec]
+    level = default_level if level is None else level
+    source_dir = Path(source_dir)
+    dest = Path(f"{dest_base}{extension}")
+    tmp = dest.with_name(dest.name + ".part")
+    workers = workers or os.cpu_count() or 1
+
+    if progress:
+        total = sum(f.stat().st_size for f in source_dir.rglob("*") if f.is_file())
+        progress.set_total(bytes=total)
+
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compress") as executor, \
+                open(tmp, "wb") as raw:
+            writer = _ParallelBlockWriter(raw, compress, level, executor, workers * 2, progress)
+            with tarfile.open(fileobj=writer, mode="w|") as tar:
+                if arcname is None:
+                    for child in sorted(source_dir.iterdir()):
+                        tar.add(child, arcname=child.name)
+                else:
+                    tar.add(source_dir, arcname=arcname)
+            writer.close()
+        os.replace(tmp, dest)
+    except BaseException:
+        # Pas de .part de plusieurs Go laissé derrière un échec
+        tmp.unlink(missing_ok=True)
+        raise
+
+    seconds = time.monotonic() - started
+    mb_in = writer.bytes_in / 1024 / 1024
+    return {
+        "file": dest.name,
+        "codec": codec,
+        "level": level,
+        "seconds": round(seconds, 2),
+        "size_mb": round(writer.bytes_out / 1024 / 1024, 2),
+        "input_mb": round(mb_in, 2),
+        "throughput_mb_s": round(mb_in / seconds, 1) if seconds > 0 else None,
+        "workers": workers,
+    }
+
+
+def _extract_tar(tar, dest_dir):
+    # filter="data" (chemins absolus, "..", liens hors du dossier refusés) : Python 3.12+,
+    # ou 3.8.17 / 3.9.17 / 3.10.12 / 3.11.4 rétroportés. Jamais d'extraction sans filtre.
+    if not hasattr(tarfile, "data_filter"):
+        raise RuntimeError("Extraction d'archive : Python 3.12+ requis (tarfile filter=\"data\")")
+    tar.extractall(dest_dir, filter="data")
+
+
+def extract_archive(archive_path, dest_dir):
+    """Extrait une archive produite par write_archive (ou un .zip historique)"""
+    archive_path = Path(archive_path)
+    name = archive_path.name
+
+    if name.endswith(".tar.zst"):
+        if _zstd is not None:
+            stream = _zstd.open(archive_path, "rb")
+        elif _zstandard is not None:
+            stream = _zstandard.ZstdDecompressor().stream_reader(
+                open(archive_path, "rb"), read_across_frames=True, closefd=True)
+        else:
+            raise RuntimeError("Archive zstd : module zstd indisponible")
+        with stream, tarfile.open(fileobj=stream, mode="r|") as tar:
+            _extract_tar(tar, dest_dir)
+        return
+
+    if name.endswith((".tar", ".tar.gz")):
+        with tarfile.open(archive_path, "r:*") as tar:
+            _extract_tar(tar, dest_dir)
+        return
+
+    shutil.unpack_archive(str(archive_path), str(dest_dir))
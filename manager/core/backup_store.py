@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import zlib
+from pathlib import Path
+
+
+BLOCK_SIZE = 256 * 1024  # fichiers région .mca découpés en blocs de 256 Ko
+COMPRESS_LEVEL = 1       # zlib rapide : les blocs sont dédupliqués avant d'être compressés
+
+
+class BackupStore:
+    """Stockage de backups adressé par contenu (dédupliqué, incrémental)
+
+    Structure :
+        <root>/objects/ab/abcdef...   blocs compressés, nommés par leur hash
+        <root>/snapshots/<nom>.json   manifest : fichiers -> liste de blocs
+
+    Un fichier dont taille et mtime n'ont pas bougé depuis le snapshot précédent
+    réutilise sa liste de blocs sans être relu ; pour les autres, seuls les
+    blocs inconnus du store sont écrits. Le coût d'un backup suit donc le
+    volume modifié, pas la taille du monde.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+
+    # ----- Snapshots -----
+
+    def list_snapshots(self):
+        """Manifests du plus récent au plus ancien"""
+        if not self.snapshots_dir.exists():
+            return []
+        manifests = []
+        for f in self.snapshots_dir.glob("*.json"):
+            try:
+                manifests.append(json.loads(f.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(manifests, key=lambda m: m["created"], reverse=True)
+
+    def load_manifest(self, name):
+        return json.loads((self.snapshots_dir / f"{name}.json").read_text())
+
+    def unused_name(self, name):
+        """`name`, suffixé (_2, _3...) si un snapshot porte déjà ce nom"""
+        candidate, n = name, 1
+        while (self.snapshots_dir / f"{candidate}.json").exists():
+            n += 1
+            candidate = f"{name}_{n}"
+        return candidate
+
+    def latest_manifest(self):
+        snapshots = self.list_snapshots()
+        return snapshots[0] if snapshots else None
+
+    def has_changes(self, source_dir, suffixes=(".mca",)):
+        """Des fichiers (région par défaut) ont-ils changé depuis le dernier snapshot ?
+
+        Comparaison taille / mtime avec le manifest : stat seulement, rien n'est relu.
+        """
+        previous = self.latest_manifest()
+        if previous is None:
+            return True
+        source_dir = Path(source_dir)
+        expected = {f["path"]: f for f in previous["files"] if f["path"].endswith(suffixes)}
+
+        seen = 0
+        for dirpath, _, filenames in os.walk(source_dir):
+            for filename in filenames:
+                if not filename.endswith(suffixes):
+                    continue
+                path = Path(dirpath) / filename
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                prev = expected.get(path.relative_to(source_dir).as_posix())
+                if prev is None or prev["size"] != st.st_size or prev["mtime_ns"] != st.st_mtime_ns:
+                    return True
+                seen += 1
+        return seen != len(expected)  # fichiers supprimés
+
+    def create_snapshot(self, source_dir, name, progress=None):
+        """Snapshot incrémental de source_dir, retourne le manifest
+
+        `progress` (optionnel) reçoit set_total()/advance() : octets à relire
+        (fichiers modifiés uniquement) et nombre de fichiers.
+        """
+        source_dir = Path(source_dir)
+        started = time.monotonic()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+        previous = self.latest_manifest()
+        previous_files = {f["path"]: f for f in previous["files"]} if previous else {}
+
+        stats = {"files": 0, "logical_bytes": 0, "new_bytes": 0, "new_blocks": 0,
+                 "reused_blocks": 0, "unchanged_files": 0}
+        files, dirs = [], []
+
+        # 1. Parcours : stat de chaque fichier, détection des fichiers inchangés
+        scanned = []
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            dirnames.sort()
+            rel_dir = Path(dirpath).relative_to(source_dir).as_posix()
+            if rel_dir != "." and not filenames and not dirnames:
+                dirs.append(rel_dir)
+
+            for filename in sorted(filenames):
+                path = Path(dirpath) / filename
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue  # fichier supprimé pendant le parcours
+                if not path.is_file():
+                    continue
+
+                rel = path.relative_to(source_dir).as_posix()
+                prev = previous_files.get(rel)
+                unchanged = prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns
+                scanned.append((path, rel, st, prev["blocks"] if unchanged else None))
+
+        if progress:
+            progress.set_total(
+                bytes=sum(st.st_size for _, _, st, blocks in scanned if blocks is None),
+                files=len(scanned),
+            )
+
+        # 2. Stockage des seuls fichiers modifiés
+        for path, rel, st, blocks in scanned:
+            stats["files"] += 1
+            stats["logical_bytes"] += st.st_size
+
+            if blocks is not None:
+                stats["unchanged_files"] += 1
+                stats["reused_blocks"] += len(blocks)
+            else:
+                blocks = self._store_file(path, stats, progress)
+
+            files.append({
+                "path": rel,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "mode": st.st_mode & 0o777,
+                "blocks": blocks,
+            })
+            if progress:
+                progress.advance(files=1)
+
+        stats["duration"] = round(time.monotonic() - started, 3)
+        manifest = {
+            "name": name,
+            "created": time.time(),
+            "block_size": BLOCK_SIZE,
+            "codec": "zlib",
+            "files": files,
+            "dirs": dirs,
+            "stats": stats,
+        }
+
+        # Écriture atomique : un manifest partiel ne doit jamais être listé
+        target = self.snapshots_dir / f"{name}.json"
+        tmp = target.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, target)
+        return manifest
+
+    def restore_snapshot(self, name, target_dir, progress=None):
+        """Reconstruit le dossier du snapshot dans target_dir (qui ne doit pas exister)
+
+        Reconstruction dans un dossier temporaire voisin, renommé à la fin :
+        un bloc manquant ne laisse jamais de monde à moitié restauré.
+        """
+        manifest = self.load_manifest(name)
+        target_dir = Path(target_dir)
+        if target_dir.exists():
+            raise FileExistsError(f"{target_dir} existe déjà")
+        tmp_dir = target_dir.with_name(f".{target_dir.name}.restoring")
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # reste d'une restauration interrompue
+        tmp_dir.mkdir(parents=True)
+        try:
+            self._restore_files(manifest, tmp_dir, progress)
+            os.rename(tmp_dir, target_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return manifest
+
+    def _restore_files(self, manifest, target_dir, progress=None):
+        if progress:
+            progress.set_total(bytes=manifest["stats"]["logical_bytes"], files=len(manifest["files"]))
+
+        for rel in manifest.get("dirs", []):
+            (target_dir / rel).mkdir(parents=True, exist_ok=True)
+
+        for entry in manifest["files"]:
+            path = target_dir / entry["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                for digest in entry["blocks"]:
+                    data = self._read_block(digest)
+                    f.write(data)
+                    if progress:
+                        progress.advance(bytes=len(data))
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            if progress:
+                progress.advance(files=1)
+
+    def delete_snapshot(self, name):
+        (self.snapshots_dir / f"{name}.json").unlink(missing_ok=True)
+
+    def prune(self, keep):
+        """Garde les `keep` snapshots les plus récents puis supprime les blocs orphelins
+
+        Ne doit pas tourner en même temps qu'un create_snapshot sur le même store.
+        """
+        snapshots = self.list_snapshots()
+        if len(snapshots) <= keep:
+            return {"deleted_snapshots": 0, "deleted_blocks": 0}
+
+        for manifest in snapshots[keep:]:
+            self.delete_snapshot(manifest["name"])
+
+        referenced = set()
+        for manifest in snapshots[:keep]:
+            for entry in manifest["files"]:
+                referenced.update(entry["blocks"])
+
+        deleted_blocks = 0
+        for bucket in self.objects_dir.iterdir():
+            for obj in bucket.iterdir():
+                if obj.name not in referenced:
+                    obj.unlink()
+                    deleted_blocks += 1
+
+        return {"deleted_snapshots": len(snapshots) - keep, "deleted_blocks": deleted_blocks}
+
+    # ----- Blocs -----
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest
+
+    def _store_file(self, path, stats, progress=None):
+        blocks = []
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(BLOCK_SIZE)
+                if not data:
+                    break
+                if progress:
+                    progress.advance(bytes=len(data))
+                digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+                blocks.append(digest)
+
+                obj = self._object_path(digest)
+                if obj.exists():
+                    stats["reused_blocks"] += 1
+                    continue
+
+                obj.parent.mkdir(exist_ok=True)
+                compressed = zlib.compress(data, COMPRESS_LEVEL)
+                tmp = obj.with_name(obj.name + ".tmp")
+                tmp.write_bytes(compressed)
+                os.replace(tmp, obj)
+                stats["new_blocks"] += 1
+                stats["new_bytes"] += len(compressed)
+        return blocks
+
+    def _read_block(self, digest):
+        return zlib.decompress(self._object_path(digest).read_bytes())
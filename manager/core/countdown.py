@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from core import event_loop
+
+
+# Secondes restantes auxquelles une annonce est faite
+DEFAULT_ANNOUNCE_AT = (300, 240, 180, 120, 60, 30, 10, 5, 4, 3, 2, 1)
+
+# Calendriers d'annonces nommés (déclaratifs), choisis par type de compte à rebours
+ANNOUNCE_SCHEDULES = {
+    "stop": DEFAULT_ANNOUNCE_AT,
+    "restart": (60, 30, 10, 5, 4, 3, 2, 1),
+}
+
+# Types exclusifs sur une même instance (avec unique=True) : un arrêt remplace un
+# redémarrage en attente, un redémarrage n'est pas armé tant qu'un arrêt est actif
+SUPERSEDES = {"stop": ("restart",)}
+
+
+def format_remaining(seconds):
+    if seconds >= 60 and seconds % 60 == 0:
+        minutes = seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''}"
+    return f"{seconds} seconde{'s' if seconds > 1 else ''}"
+
+
+class Countdown:
+    """Annonces en jeu puis action, planifiées sur la boucle du manager
+
+    Aucun thread n'attend : chaque annonce est un call_at sur la boucle,
+    l'action (coroutine) est lancée à l'échéance.
+    `message` est formaté avec {remaining} ("5 minutes", "10 secondes").
+    cancel() / postpone() / finish_now() sont appelables depuis n'importe quel thread.
+    """
+
+    def __init__(self, seconds, action, announce, message, announce_at=DEFAULT_ANNOUNCE_AT,
+                 id=None, kind="countdown", instance=None, finish_when_empty=False):
+        self.id = id
+        self.kind = kind
+        self.instance = instance
+        self.seconds = seconds
+        self.action = action        # () -> coroutine
+        self.announce = announce    # (texte) -> None
+        self.message = message
+        self.announce_at = sorted(set(announce_at), reverse=True)
+        self.finish_when_empty = finish_when_empty  # action avancée dès que le serveur se vide
+        self.state = "pending"      # pending | running | done | cancelled | failed
+        self.created = time.time()
+        self.deadline = self.created + seconds
+        self.finished = None
+        self.error = None
+        self._handles = []
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.state in ("pending", "running")
+
+    def start(self):
+        """Démarre le compte à rebours (appelable depuis n'importe quel thread)"""
+        event_loop.call_soon(self._arm)
+        return self
+
+    def cancel(self):
+        with self._lock:
+            if self.state != "pending":
+                return False
+            self.state = "cancelled"
+            self.finished = time.time()
+        event_loop.call_soon(self._disarm)
+        return True
+
+    def postpone(self, seconds):
+        """Recule l'échéance de `seconds` et annonce le nouveau délai"""
+        with self._lock:
+            if self.state != "pending":
+                return False
+            self.deadline += seconds
+        event_loop.call_soon(self._rearm, True)
+        return True
+
+    def finish_now(self):
+        """Lance l'action sans attendre l'échéance (serveur vide)"""
+        with self._lock:
+            if self.state != "pending":
+                return False
+            self.deadline = time.time()
+        event_loop.call_soon(self._rearm, False)
+        return True
+
+    def status(self):
+        remaining = max(0, round(self.deadline - time.time())) if self.state == "pending" else None
+        upcoming = [a for a in self.announce_at if remaining is not None and a < remaining]
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "instance": self.instance,
+            "state": self.state,
+            "created": self.created,
+            "deadline": self.deadline,
+            "remaining": remaining,
+            "next_announce": upcoming[0] if upcoming else None,
+            "finish_when_empty": self.finish_when_empty,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+    # ----- Boucle du manager -----
+
+    def _arm(self, announce_now=False):
+        if self.state != "pending":
+            return
+        loop = asyncio.get_running_loop()
+        remaining = self.deadline - time.time()
+        deadline = loop.time() + remaining
+        # Annonce du délai complet au démarrage ; après un report, le nouveau délai est annoncé tout de suite
+        limit = remaining + 0.5
+        if announce_now and remaining >= 1:
+            self._announce(round(remaining))
+            limit = remaining - 0.5
+        for seconds in self.announce_at:
+            if seconds <= limit:
+                self._handles.append(loop.call_at(deadline - seconds, self._announce, seconds))
+        self._handles.append(loop.call_at(deadline, self._fire))
+
+    def _disarm(self):
+        for handle in self._handles:
+            handle.cancel()
+        self._handles.clear()
+
+    def _rearm(self, announce_now):
+        self._disarm()
+        self._arm(announce_now)
+
+    def _announce(self, remaining):
+        try:
+            self.announce(self.message.format(remaining=format_remaining(remaining)))
+        except Exception as e:
+            print(f"[COUNTDOWN] Annonce en échec: {e}")
+
+    def _fire(self):
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "running"
+        self._handles.clear()
+        asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            await self.action()
+            self.state = "done"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[COUNTDOWN] Action en échec: {e}")
+        self.finished = time.time()
+
+
+class CountdownService:
+    """Registre des comptes à rebours : consultation, annulation, report
+
+    Un compte à rebours en attente ne coûte que quelques TimerHandle sur la
+    boucle du manager, quel que soit leur nombre.
+    """
+
+    def __init__(self, history=20):
+        self._countdowns = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._history = history
+
+    def start(self, seconds, action, announce, message, kind="countdown", announce_at=None,
+              instance=None, finish_when_empty=False, unique=False):
+        """Crée et démarre un compte à rebours
+
+        `announce_at` par défaut : ANNOUNCE_SCHEDULES[kind]. Avec unique=True, un
+        compte à rebours actif du même type sur la même instance est réutilisé,
+        de même qu'un compte à rebours actif qui le remplace (SUPERSEDES) : le
+        type du compte à rebours renvoyé le dit. Ceux qu'il remplace sont annulés.
+        """
+        superseded = []
+        with self._lock:
+            if unique:
+                for countdown in self._countdowns.values():
+                    if countdown.instance != instance or not countdown.active:
+                        continue
+                    if countdown.kind == kind or kind in SUPERSEDES.get(countdown.kind, ()):
+                        return countdown
+                    if countdown.kind in SUPERSEDES.get(kind, ()):
+                        superseded.append(countdown)
+            if announce_at is None:
+                announce_at = ANNOUNCE_SCHEDULES.get(kind, DEFAULT_ANNOUNCE_AT)
+            countdown = Countdown(seconds, action, announce, message, announce_at, id=str(next(self._ids)),
+                                  kind=kind, instance=instance, finish_when_empty=finish_when_empty)
+            self._countdowns[countdown.id] = countdown
+            for other in superseded:
+                if other.cancel():
+                    other.error = f"remplacé par {kind} #{countdown.id}"
+                    print(f"[COUNTDOWN] {other.kind} #{other.id} remplacé par {kind} #{countdown.id}")
+            self._trim()
+        return countdown.start()
+
+    def _trim(self):
+        finished = [c.id for c in self._countdowns.values() if not c.active]
+        for countdown_id in finished[:max(0, len(finished) - self._history)]:
+            del self._countdowns[countdown_id]
+
+    def get(self, countdown_id):
+        return self._countdowns.get(countdown_id)
+
+    def active(self, instance, kind):
+        """Compte à rebours actif (en attente ou en cours) d'un type sur une instance, ou None"""
+        with self._lock:
+            return next((c for c in self._countdowns.values()
+                         if c.instance == instance and c.kind == kind and c.active), None)
+
+    def list(self, active_only=False):
+        with self._lock:
+            countdowns = list(self._countdowns.values())
+        return [c.status() for c in reversed(countdowns) if c.active or not active_only]
+
+    def cancel(self, countdown_id):
+        countdown = self.get(countdown_id)
+        if countdown is None:
+            return {"success": False, "error": "Compte à rebours introuvable"}
+        if not countdown.cancel():
+            return {"success": False, "error": f"Compte à rebours déjà {countdown.state}"}
+        return {"success": True, "countdown": countdown.status()}
+
+    def postpone(self, countdown_id, seconds):
+        countdown = self.get(countdown_id)
+        if countdown is None:
+            return {"success": False, "error": "Compte à rebours introuvable"}
+        if seconds <= 0:
+            return {"success": False, "error": "Délai positif attendu"}
+        if not countdown.postpone(seconds):
+            return {"success": False, "error": f"Compte à rebours déjà {countdown.state}"}
+        return {"success": True, "countdown": countdown.status()}
+
+    def server_emptied(self, instance=None):
+        """Le dernier joueur est parti : avance les comptes à rebours qui l'acceptent"""
+        with self._lock:
+            countdowns = [c for c in self._countdowns.values()
+                          if c.instance == instance and c.finish_when_empty and c.state == "pending"]
+        for countdown in countdowns:
+            if countdown.finish_now():
+                print(f"[COUNTDOWN] {countdown.kind} #{countdown.id}: serveur vide, exécution immédiate")
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import requests
+
+
+DOWNLOAD_BUFFER = 1024 * 1024  # 1 Mo par lecture/écriture
+DOWNLOAD_RETRIES = 3
+RETRY_DELAY_MAX = 10  # secondes entre deux essais (2, 4, 8... plafonné)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _hash_existing(path, hasher):
+    """Réinjecte le début déjà téléchargé dans le hash (reprise)"""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER), b""):
+            hasher.update(chunk)
+
+
+def download_file(url, dest, sha1=None, size=None, progress=None, session=None, timeout=30,
+                  retries=DOWNLOAD_RETRIES):
+    """Télécharge url vers dest : fichier .part, reprise HTTP Range, SHA-1 vérifié au fil de l'eau
+
+    dest n'est remplacé (os.replace, atomique) que si taille et SHA-1 sont
+    corrects ; en cas d'échec réseau le .part est conservé pour reprendre.
+    `progress` (optionnel) reçoit set_total()/advance() en octets.
+    """
+    dest = Path(dest)
+    part = dest.with_name(dest.name + ".part")
+    part_url = dest.with_name(dest.name + ".part.url")
+    session = session or requests.Session()
+
+    # Un .part ne se reprend que pour la même URL
+    if part.exists() and (not part_url.exists() or part_url.read_text() != url):
+        part.unlink()
+    part_url.write_text(url)
+    started = time.monotonic()
+    resumed_from = 0
+
+    for attempt in range(1, retries + 1):
+        hasher = hashlib.sha1()
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        try:
+            with session.get(url, stream=True, timeout=timeout, headers=headers) as response:
+                if offset and response.status_code == 416:
+                    # Plage hors fichier : le .part est peut-être déjà complet, on vérifie
+                    _hash_existing(part, hasher)
+                    total = offset
+                elif offset and response.status_code == 206:
+                    _hash_existing(part, hasher)
+                    total = offset + int(response.headers.get("content-length", 0))
+                    mode = "ab"
+                else:
+                    # Pas de support Range (ou premier essai) : repartir de zéro
+                    response.raise_for_status()
+                    offset = 0
+                    total = int(response.headers.get("content-length", 0))
+                    mode = "wb"
+
+                if offset and not resumed_from:
+                    resumed_from = offset
+                if progress:
+                    progress.set_total(bytes=size or total)
+                    progress.set_done(bytes=offset)
+
+                if response.status_code != 416:
+                    with open(part, mode) as f:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            if progress:
+                                progress.advance(bytes=len(chunk))
+                        f.flush()
+                        os.fsync(f.fileno())
+            break
+        except requests.HTTPError as e:
+            # 5xx / 429 : incident passager côté serveur, on réessaie ; autre 4xx : inutile d'insister
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and status < 500 and status != 429:
+                raise DownloadError(f"Téléchargement refusé (HTTP {status})")
+            print(f"[DOWNLOAD] HTTP {status} (essai {attempt}/{retries})")
+            if attempt == retries:
+                raise DownloadError(f"Téléchargement impossible (HTTP {status})")
+            time.sleep(min(2 ** attempt, RETRY_DELAY_MAX))
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            print(f"[DOWNLOAD] Interruption (essai {attempt}/{retries}): {e}")
+            if attempt == retries:
+                raise DownloadError(f"Téléchargement interrompu: {e}")
+            time.sleep(min(2 ** attempt, RETRY_DELAY_MAX))
+
+    downloaded = part.stat().st_size
+    if size is not None and downloaded != size:
+        part.unlink()
+        part_url.unlink(missing_ok=True)
+        raise DownloadError(f"Taille incorrecte: {downloaded} octets au lieu de {size}")
+
+    digest = hasher.hexdigest()
+    if sha1 and digest.lower() != sha1.lower():
+        part.unlink()
+        part_url.unlink(missing_ok=True)
+        raise DownloadError(f"SHA-1 incorrect: {digest} au lieu de {sha1}")
+
+    os.replace(part, dest)
+    part_url.unlink(missing_ok=True)
+    seconds = time.monotonic() - started
+    return {
+        "file": dest.name,
+        "bytes": downloaded,
+        "sha1": digest,
+        "verified": bool(sha1),
+        "resumed_from": resumed_from,
+        "seconds": round(seconds, 2),
+        "mb_s": round(downloaded / 1024 / 1024 / seconds, 1) if seconds > 0 else None,
+    }
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+# Boucle asyncio dédiée au pilotage des process Minecraft.
+# Elle tourne dans son propre thread : les routes FastAPI, les jobs APScheduler
+# (threads) et les scripts hors serveur web (test_process.py) peuvent tous
+# piloter le superviseur sans bloquer la boucle d'uvicorn.
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Retourne la boucle du manager (démarrée au premier appel)"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="core-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+
+def in_loop_thread():
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def run_sync(coro, timeout=None):
+    """Exécute une coroutine sur la boucle du manager et attend le résultat (threads uniquement)"""
+    if in_loop_thread():
+        coro.close()
+        raise RuntimeError("run_sync appelé depuis la boucle du manager")
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+async def run_async(coro):
+    """Exécute une coroutine sur la boucle du manager depuis une autre boucle (routes FastAPI)"""
+    if in_loop_thread():
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_loop()))
+
+
+def call_soon(callback, *args):
+    """Planifie un appel non bloquant sur la boucle du manager, depuis n'importe quel thread"""
+    if in_loop_thread():
+        get_loop().call_soon(callback, *args)
+    else:
+        get_loop().call_soon_threadsafe(callback, *args)
@@ -0,0 +1,84 @@
+import os
+import threading
+from pathlib import Path
+
+
+class FrozenDict(dict):
+    """dict en lecture seule (reste sérialisable en JSON tel quel)"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Snapshot en lecture seule : copiez-le avec dict(...) avant de le modifier")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __hash__(self):
+        return id(self)
+
+
+def freeze(value):
+    """Copie figée : dict -> FrozenDict, list -> tuple (récursif)"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+_PENDING = object()  # entrée amorcée par prime(), pas encore écrite sur disque
+
+
+class FileCache:
+    """Fichiers (ou dossiers) parsés une seule fois, relus seulement s'ils changent
+
+    Validité : (mtime_ns, taille, inode) via os.stat, sans lecture du contenu.
+    Les valeurs sont figées et partagées entre appelants : pour les modifier,
+    copier d'abord (dict(...), list(...)).
+    """
+
+    def __init__(self, parse, default=None):
+        self._parse = parse
+        self._default = freeze(default)
+        self._entries = {}  # chemin -> (clé stat, valeur)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        path = Path(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] is _PENDING:
+            return entry[1]
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return self._default
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] is _PENDING:
+                return entry[1]  # amorcée entre-temps par un autre thread
+            try:
+                value = freeze(self._parse(path))
+            except (OSError, ValueError) as e:
+                print(f"[CACHE] Lecture {path} impossible: {e}")
+                value = self._default
+            self._entries[path] = (key, value)
+            return value
+
+    def prime(self, path, value):
+        """Valeur connue avant d'être sur disque (écriture différée) : servie sans stat
+        jusqu'au prochain invalidate()"""
+        with self._lock:
+            self._entries[Path(path)] = (_PENDING, freeze(value))
+
+    def invalidate(self, path=None):
+        """Force la relecture (d'un chemin, ou de tout le cache)"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(path), None)
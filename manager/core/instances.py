@@ -0,0 +1,528 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from core import event_loop
+from core.launch import DEFAULT_LAUNCH_PROFILE, validate_launch_profile, jvm_args, affinity_prefix
+from core.log_events import LogEventIndex, classify as classify_log_line
+from core.log_hub import LogHub
+from core.log_store import LogStore
+from core.metrics import MetricsStore
+from core.persistence import atomic_write_text
+from core.players import PlayerRoster
+from core.proc_sampler import ProcessSampler
+from core.prometheus import REGISTRY
+from core.rcon import (RconPool, RconError, RconUnavailable, rcon_settings, set_rcon_properties,
+                       COMMAND_TIMEOUT, RCON_PORT_OFFSET)
+from core.supervisor import ServerSupervisor, ServerState
+from core.watchdog import Watchdog
+
+
+JAR_NAME = "server.jar"
+LOG_BUFFER_SIZE = 1000
+
+# Séries lag / TPS / joueurs, annotées des backups et (re)démarrages
+TICK_METRICS = ("lag_ms", "lag_ticks", "tps", "mspt", "players")
+TPS_COMMAND = "tick query"  # vanilla 1.20.3+ ; "forge tps" (Forge), "tps" (Paper), None = pas de sondage
+TPS_MAX_MISSES = 3          # sondages sans réponse avant de renoncer (commande inconnue du serveur)
+
+PROC_SAMPLE_INTERVAL = 5  # secondes
+
+LIST_PATTERN = re.compile(r"\]: There are \d+ of a max(?: of)? \d+ players online")
+LIST_TIMEOUT = 5
+
+DEFAULT_INSTANCE = "default"
+INSTANCE_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+DEFAULT_PORT = 25565
+RCON_HOST = "127.0.0.1"
+
+_LOG_LINES = REGISTRY.counter("mc_log_lines_total", "Lignes lues sur la sortie du serveur", ("instance",))
+_SERVER_STARTS = REGISTRY.counter("mc_server_starts_total", "Démarrages du serveur Minecraft", ("instance",))
+_RCON_FALLBACKS = REGISTRY.counter("mc_rcon_fallbacks_total", "Commandes envoyées sur stdin faute de RCON",
+                                   ("instance",))
+
+
+class Instance:
+    """Un serveur Minecraft supervisé : process, logs, événements, joueurs, métriques
+
+    Chaque instance a son dossier (server.jar, server.properties, world/),
+    son port et ses propres tampons : rien n'est partagé entre deux serveurs.
+    `launch` est un profil JVM, ou une fonction qui le renvoie (relue à
+    chaque démarrage). Un watchdog relance le serveur s'il crashe.
+    """
+
+    def __init__(self, id, server_dir, port=None, launch=None, log_prefix=None, crash_file=None):
+        self.id = id
+        self.server_dir = Path(server_dir)
+        self.port = port
+        self.launch = launch
+        self.active_launch = dict(DEFAULT_LAUNCH_PROFILE)  # profil du process en cours
+        self.started_at = None
+        self._log_prefix = log_prefix or f"[LOG:{id}]"
+
+        self.log_buffer = LogStore(maxlen=LOG_BUFFER_SIZE)
+        self.log_hub = LogHub()
+        self.events = LogEventIndex()
+        self.players = PlayerRoster()
+        self.events.add_listener(self.players.on_event)
+        self.tick_metrics = MetricsStore(TICK_METRICS)
+        self._tps_poll = {"seq": None, "misses": 0}
+        self.events.add_listener(self._on_metric_event)  # après le roster : len(players) déjà à jour
+
+        self.watchdog = Watchdog(self, crash_file or self.server_dir / "crashes.json")
+        self.proc_sampler = ProcessSampler(lambda: self.supervisor.pid if self.supervisor.is_alive else None,
+                                           interval=PROC_SAMPLE_INTERVAL)
+        self.supervisor = ServerSupervisor(
+            self.server_dir,
+            command_factory=self._build_command,
+            on_line=self._on_line,
+            on_start=self._on_start,
+            on_exit=self.watchdog.on_exit,
+        )
+        self.rcon = None  # RconPool, préparé à chaque démarrage
+        self._log_lines = _LOG_LINES.labels(id)
+        self._starts = _SERVER_STARTS.labels(id)
+        self._rcon_fallbacks = _RCON_FALLBACKS.labels(id)
+
+    # ----- Process -----
+
+    def _on_line(self, line):
+        """Stocke une ligne (avec sa séquence) et la diffuse aux abonnés"""
+        self._log_lines.inc()
+        seq = self.log_buffer.append(line)
+        self.log_hub.publish(seq, line)
+        self.events.feed(seq, line)
+        print(self._log_prefix, line, flush=True)  # flush immédiat terminal
+
+    def _on_metric_event(self, event):
+        event_type = event["type"]
+        if event_type == "lag":
+            self.tick_metrics.record("lag_ms", event["ms"], event["time"])
+            self.tick_metrics.record("lag_ticks", event["ticks"], event["time"])
+        elif event_type == "tps":
+            self.tick_metrics.record("tps", event["tps"], event["time"])
+            if "mspt" in event:
+                self.tick_metrics.record("mspt", event["mspt"], event["time"])
+        elif event_type in ("join", "leave", "player_list"):
+            self.tick_metrics.record("players", len(self.players), event["time"])
+
+    def _resolve_launch(self):
+        profile = self.launch() if callable(self.launch) else self.launch
+        try:
+            return validate_launch_profile(profile)
+        except ValueError as e:
+            print(f"[LAUNCH] Profil de l'instance '{self.id}' ignoré: {e}")
+            return dict(DEFAULT_LAUNCH_PROFILE)
+
+    def _on_start(self):
+        self._starts.inc()
+        self.started_at = time.monotonic()
+        self.active_launch = self._resolve_launch()
+        self.proc_sampler.start()
+        self.log_buffer.clear()
+        self.players.clear()
+        self._tps_poll.update(seq=None, misses=0)
+        self.tick_metrics.annotate("start")
+        self._configure_rcon()
+
+    def _configure_rcon(self):
+        """Prépare le pool RCON si RCON est activé dans server.properties (opt-in, voir set_rcon)"""
+        if self.rcon is not None:
+            self.rcon.close()
+            self.rcon = None
+        try:
+            settings = rcon_settings(self.server_dir)
+        except (OSError, RconError) as e:
+            print(f"[RCON] {self.id}: RCON non configuré ({e}), commandes via stdin")
+            return
+        if settings is not None:
+            self.rcon = RconPool(RCON_HOST, *settings, instance=self.id)
+
+    def set_rcon(self, enabled):
+        """Active / désactive RCON pour cette instance (au prochain démarrage)
+
+        RCON écoute sur server-ip, donc sur toutes les interfaces s'il est vide :
+        son port (jeu + RCON_PORT_OFFSET) doit être filtré par le pare-feu.
+        """
+        try:
+            set_rcon_properties(self.server_dir, self.port or _read_port(self.server_dir), enabled)
+        except OSError as e:
+            return {"success": False, "error": f"server.properties illisible: {e}"}
+        return {"success": True, "rcon": enabled, "restart_required": self.is_running}
+
+    def _build_command(self):
+        return [
+            *affinity_prefix(self.active_launch),
+            "java",
+            "-Djava.awt.headless=true",  # headless mode
+            "-Djava.util.logging.SimpleFormatter.format=%1$tY-%1$tm-%1$td %1$tH:%1$tM:%1$tS %4$s: %2$s: %5$s%n",  # format logs
+            *jvm_args(self.active_launch),
+            "-jar",
+            JAR_NAME,
+            "nogui",
+        ]
+
+    # Démarrage / arrêt demandés : referment le disjoncteur du watchdog,
+    # ou annulent un redémarrage automatique en attente
+    # Versions synchrones : threads (scheduler, tâches de fond) et scripts
+    def start(self):
+        self.watchdog.reset()
+        return event_loop.run_sync(self.supervisor.start())
+
+    def stop(self):
+        self.watchdog.cancel()
+        self.tick_metrics.annotate("stop")
+        return event_loop.run_sync(self.supervisor.stop())
+
+    # Versions async : routes FastAPI (ne bloquent pas la boucle pendant un arrêt)
+    async def start_async(self):
+        self.watchdog.reset()
+        return await event_loop.run_async(self.supervisor.start())
+
+    async def stop_async(self):
+        self.watchdog.cancel()
+        self.tick_metrics.annotate("stop")
+        return await event_loop.run_async(self.supervisor.stop())
+
+    async def wait_for_state(self, *states, timeout=None):
+        return await event_loop.run_async(self.supervisor.wait_for_state(*states, timeout=timeout))
+
+    def send_command(self, command):
+        # Non bloquant : l'écriture stdin est planifiée sur la boucle du manager
+        return self.supervisor.send_nowait(command)
+
+    # Commandes avec réponse : RCON (pipeliné), repli sur stdin (sans réponse) si RCON
+    # n'est pas joignable, par exemple avant la fin du démarrage
+    async def _execute(self, commands, timeout):
+        if not self.is_running:
+            return {"success": False, "error": "Serveur arrêté"}
+        if self.rcon is not None:
+            try:
+                return {"success": True, "channel": "rcon", "replies": await self.rcon.batch(commands, timeout)}
+            except RconUnavailable as e:
+                print(f"[RCON] {self.id}: {e}, repli sur stdin")
+            except RconError as e:
+                # Commandes peut-être déjà exécutées : pas de renvoi sur stdin
+                return {"success": False, "error": str(e)}
+        self._rcon_fallbacks.inc()
+        for command in commands:
+            self.send_command(command)
+        return {"success": True, "channel": "stdin", "replies": [None] * len(commands)}
+
+    @staticmethod
+    def _single(result):
+        if result["success"]:
+            result["reply"] = result.pop("replies")[0]
+        return result
+
+    @staticmethod
+    def _batch(commands, result):
+        if result["success"]:
+            result["results"] = [{"command": c, "reply": r} for c, r in zip(commands, result.pop("replies"))]
+        return result
+
+    def execute(self, command, timeout=COMMAND_TIMEOUT):
+        """Exécute une commande et retourne sa réponse (appel bloquant, hors boucle asyncio)"""
+        return self._single(event_loop.run_sync(self._execute([command], timeout)))
+
+    async def execute_async(self, command, timeout=COMMAND_TIMEOUT):
+        return self._single(await event_loop.run_async(self._execute([command], timeout)))
+
+    def execute_batch(self, commands, timeout=COMMAND_TIMEOUT):
+        """Plusieurs commandes en un aller-retour RCON, réponses dans l'ordre"""
+        return self._batch(commands, event_loop.run_sync(self._execute(list(commands), timeout)))
+
+    async def execute_batch_async(self, commands, timeout=COMMAND_TIMEOUT):
+        return self._batch(commands, await event_loop.run_async(self._execute(list(commands), timeout)))
+
+    @property
+    def is_running(self):
+        return self.supervisor.is_alive
+
+    @property
+    def state(self):
+        return self.supervisor.state.value
+
+    def uptime(self):
+        """Secondes depuis le dernier démarrage (None si jamais démarré)"""
+        return time.monotonic() - self.started_at if self.started_at is not None else None
+
+    def crashes(self, limit=None):
+        return {"watchdog": self.watchdog.status(), "incidents": self.watchdog.history(limit)}
+
+    # ----- Logs et événements -----
+
+    def logs(self):
+        return self.log_buffer.lines()
+
+    def logs_since(self, since, limit=None):
+        """Lignes après le curseur `since` (incrémental pour /logs?since=)"""
+        entries, cursor, reset = self.log_buffer.since(since, limit)
+        return {
+            "seq": cursor,
+            "lines": [line for _, line in entries],
+            "reset": reset
+        }
+
+    def log_events(self, event_type=None, since=0, limit=100):
+        """Événements typés (join, leave, chat, lag, error...) extraits des logs"""
+        return {
+            "events": self.events.events(event_type, since, limit),
+            "counts": self.events.counts()
+        }
+
+    # ----- Joueurs -----
+
+    def get_players(self):
+        """Joueurs connectés (nom, UUID, IP, connexion, durée de session)"""
+        online = self.players.list() if self.is_running else []
+        return {
+            "online": online,
+            "count": len(online),
+            "max": self.players.max_players,
+            "reconciled_at": self.players.reconciled_at
+        }
+
+    def get_player(self, username):
+        """Session d'un joueur connecté ou None (O(1))"""
+        return self.players.get(username) if self.is_running else None
+
+    def refresh_player_roster(self, timeout=LIST_TIMEOUT):
+        """Réconcilie la table avec `list` (appel bloquant, hors boucle asyncio)"""
+        if not self.is_running:
+            self.players.clear()
+            return self.get_players()
+
+        cursor = self.log_buffer.last_seq
+        self.send_command("list")
+        found = self.log_buffer.wait_for(LIST_PATTERN, since=cursor, timeout=timeout)
+        if found is None:
+            print(f"[PLAYERS] {self.id}: pas de réponse à `list`")
+        else:
+            # Le listener d'événements peut ne pas avoir encore vu la ligne : réconcilier ici aussi
+            _, fields = classify_log_line(found[1])
+            self.players.reconcile(fields["players"], fields["max"])
+        return self.get_players()
+
+    # ----- Métriques -----
+
+    def sample_tick_metrics(self):
+        """Échantillon périodique (scheduler) : nombre de joueurs, TPS via TPS_COMMAND"""
+        if not self.is_running:
+            return
+        self.tick_metrics.record("players", len(self.players))
+        poll = self._tps_poll
+        if TPS_COMMAND is None or poll["misses"] >= TPS_MAX_MISSES:
+            return
+
+        # Le sondage précédent a-t-il produit une ligne TPS ?
+        last = self.events.last("tps")
+        if poll["seq"] is not None:
+            if last is None or last["seq"] <= poll["seq"]:
+                poll["misses"] += 1
+                if poll["misses"] >= TPS_MAX_MISSES:
+                    print(f"[METRICS] {self.id}: `{TPS_COMMAND}` sans réponse, "
+                          f"sondage TPS désactivé jusqu'au prochain démarrage")
+                    return
+            else:
+                poll["misses"] = 0
+
+        poll["seq"] = self.log_buffer.last_seq
+        self.send_command(TPS_COMMAND)
+
+    def get_tick_metrics(self, resolution="raw", since=0):
+        """Séries lag / TPS / joueurs (brut, minute ou heure) + annotations"""
+        return self.tick_metrics.export(resolution, since)
+
+    def get_process_metrics(self, resolution="raw", since=0):
+        """CPU / RSS / threads / I/O du process serveur (séries + dernier échantillon)"""
+        return dict(self.proc_sampler.metrics.export(resolution, since),
+                    current=self.proc_sampler.current, interval=self.proc_sampler.interval)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "dir": str(self.server_dir),
+            "port": self.port if self.port is not None else _read_port(self.server_dir),
+            "state": self.state,
+            "pid": self.supervisor.pid if self.is_running else None,
+            "players": len(self.players) if self.is_running else 0,
+            "launch": self.active_launch if self.is_running else None,
+            "watchdog": self.watchdog.status(),
+            "rcon": self.rcon is not None if self.is_running else None,
+        }
+
+
+def _read_port(server_dir):
+    """server-port de server.properties (port Minecraft par défaut sinon)"""
+    try:
+        for line in (Path(server_dir) / "server.properties").read_text().splitlines():
+            if line.startswith("server-port="):
+                return int(line.split("=", 1)[1].strip())
+    except (OSError, ValueError):
+        pass
+    return DEFAULT_PORT
+
+
+class InstanceManager:
+    """Instances supplémentaires (~/minecraft-manager/instances/<id>/) + l'instance par défaut
+
+    La liste (id, port, profil JVM) est persistée dans instances.json ;
+    les process ne sont pas relancés au démarrage du manager.
+    """
+
+    def __init__(self, root, default):
+        self.root = Path(root)
+        self.registry_file = self.root / "instances.json"
+        self.default = default
+        self._lock = threading.Lock()
+        self._instances = {DEFAULT_INSTANCE: default}
+        self._load()
+
+        REGISTRY.gauge("mc_instance_state", "État de chaque serveur (1 pour l'état courant)",
+                       ("instance", "state"), fn=self._state_samples)
+        REGISTRY.gauge("mc_instance_players_online", "Joueurs connectés par serveur", ("instance",),
+                       fn=lambda: {i.id: len(i.players) if i.is_running else 0 for i in self.list()})
+
+    def _state_samples(self):
+        return {(i.id, state.value): int(i.supervisor.state is state)
+                for i in self.list() for state in ServerState}
+
+    # ----- Registre -----
+
+    def _load(self):
+        try:
+            entries = json.loads(self.registry_file.read_text())
+        except (OSError, ValueError):
+            return
+        for instance_id, entry in entries.items():
+            self._instances[instance_id] = self._make(instance_id, entry.get("port"), entry.get("launch"))
+
+    def _save(self):
+        entries = {
+            i.id: {"port": i.port, "launch": i.launch}
+            for i in self._instances.values() if i.id != DEFAULT_INSTANCE
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.registry_file, json.dumps(entries, indent=2))
+
+    def _make(self, instance_id, port, launch):
+        return Instance(instance_id, self.root / instance_id, port=port, launch=launch)
+
+    def get(self, instance_id):
+        return self._instances.get(instance_id)
+
+    def list(self):
+        return list(self._instances.values())
+
+    def ports(self):
+        """Port de chaque instance (celui de l'instance par défaut est lu dans son server.properties)"""
+        return {i.id: _read_port(i.server_dir) if i.id == DEFAULT_INSTANCE else i.port
+                for i in self._instances.values()}
+
+    # ----- Création / suppression -----
+
+    def create(self, instance_id, port, launch=None):
+        """Nouveau serveur : server.jar et eula repris de l'instance par défaut, port dédié"""
+        if not INSTANCE_ID_PATTERN.match(instance_id or "") or instance_id == DEFAULT_INSTANCE:
+            return {"success": False, "error": "Identifiant invalide (a-z, 0-9, - et _, 32 caractères max)"}
+        if not 1024 <= port <= 65535:
+            return {"success": False, "error": "Port hors de la plage 1024-65535"}
+        try:
+            launch = validate_launch_profile(launch)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+        source_jar = self.default.server_dir / JAR_NAME
+        if not source_jar.exists():
+            return {"success": False, "error": "Serveur non installé (server.jar introuvable)"}
+
+        with self._lock:
+            if instance_id in self._instances:
+                return {"success": False, "error": f"L'instance '{instance_id}' existe déjà"}
+            used = {p: i for i, p in self.ports().items()}
+            if port in used:
+                return {"success": False, "error": f"Port {port} déjà utilisé par '{used[port]}'"}
+            # Port RCON (jeu + RCON_PORT_OFFSET) : ni sur un port de jeu, ni sur le RCON d'une autre instance
+            for other in (port + RCON_PORT_OFFSET, port - RCON_PORT_OFFSET):
+                if other in used:
+                    return {"success": False, "error": f"Port {port} en conflit avec le RCON de '{used[other]}'"}
+
+            server_dir = self.root / instance_id
+            # Reste d'une instance supprimée (suppression incomplète) : jamais réutilisé ni effacé d'office
+            if server_dir.exists():
+                return {"success": False, "error": f"Le dossier {server_dir} existe déjà : "
+                                                   f"supprimez-le ou choisissez un autre identifiant"}
+            try:
+                server_dir.mkdir(parents=True)
+                # Lien physique si possible : le jar (des dizaines de Mo) n'est pas dupliqué
+                try:
+                    os.link(source_jar, server_dir / JAR_NAME)
+                except OSError:
+                    shutil.copy2(source_jar, server_dir / JAR_NAME)
+                eula = self.default.server_dir / "eula.txt"
+                if eula.exists():
+                    shutil.copy2(eula, server_dir / "eula.txt")
+                (server_dir / "server.properties").write_text(f"server-port={port}\nmax-players=20\nwhite-list=false\n")
+            except OSError as e:
+                shutil.rmtree(server_dir, ignore_errors=True)
+                return {"success": False, "error": f"Création du dossier de l'instance impossible: {e}"}
+
+            instance = self._make(instance_id, port, launch)
+            self._instances[instance_id] = instance
+            self._save()
+
+        print(f"[INSTANCE] '{instance_id}' créée ({server_dir}, port {port})")
+        return {"success": True, "instance": instance.to_dict()}
+
+    def delete(self, instance_id):
+        """Supprime une instance arrêtée et son dossier (monde compris)"""
+        if instance_id == DEFAULT_INSTANCE:
+            return {"success": False, "error": "L'instance par défaut ne peut pas être supprimée"}
+        with self._lock:
+            instance = self._instances.get(instance_id)
+            if instance is None:
+                return {"success": False, "error": "Instance introuvable"}
+            if instance.is_running:
+                return {"success": False, "error": "Arrêtez l'instance d'abord"}
+            del self._instances[instance_id]
+            self._save()
+        instance.watchdog.enabled = False  # un redémarrage déjà planifié ne relance plus rien
+        instance.watchdog.cancel()
+        instance.proc_sampler.stop()
+        shutil.rmtree(instance.server_dir, ignore_errors=True)
+        if instance.server_dir.exists():
+            print(f"[INSTANCE] Dossier {instance.server_dir} supprimé en partie, à effacer à la main")
+            return {"success": True, "message": f"Instance '{instance_id}' supprimée, "
+                                                f"dossier {instance.server_dir} à effacer à la main"}
+        return {"success": True, "message": f"Instance '{instance_id}' supprimée"}
+
+    def set_launch(self, instance_id, profile):
+        """Profil JVM d'une instance supplémentaire (appliqué au prochain démarrage)"""
+        instance = self._instances.get(instance_id)
+        if instance is None or instance_id == DEFAULT_INSTANCE:
+            return {"success": False, "error": "Instance introuvable"}
+        try:
+            profile = validate_launch_profile(profile)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        with self._lock:
+            instance.launch = profile
+            self._save()
+        return {"success": True, "profile": profile,
+                "restart_required": instance.is_running and profile != instance.active_launch}
+
+    # ----- Tâches périodiques -----
+
+    def sample_tick_metrics(self):
+        for instance in self.list():
+            instance.sample_tick_metrics()
+
+    def refresh_player_rosters(self):
+        for instance in self.list():
+            if instance.is_running:
+                instance.refresh_player_roster()
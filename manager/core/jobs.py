@@ -0,0 +1,136 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """Tâche de fond (backup, restauration, copie de monde) avec progression"""
+
+    def __init__(self, job_id, kind):
+        self.id = job_id
+        self.kind = kind
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.files_total = 0
+        self.files_done = 0
+
+    # ----- Progression (appelée par la tâche) -----
+
+    def set_total(self, bytes=0, files=0):
+        self.bytes_total = bytes
+        self.files_total = files
+
+    def set_done(self, bytes=0, files=0):
+        self.bytes_done = bytes
+        self.files_done = files
+
+    def advance(self, bytes=0, files=0):
+        self.bytes_done += bytes
+        self.files_done += files
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def eta(self):
+        """Secondes restantes estimées d'après le débit observé"""
+        if self.status != "running" or not self.bytes_done or not self.bytes_total:
+            return None
+        elapsed = time.time() - self.started
+        remaining = max(self.bytes_total - self.bytes_done, 0)
+        return round(elapsed * remaining / self.bytes_done, 1)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "percent": round(min(100 * self.bytes_done / self.bytes_total, 100), 1) if self.bytes_total else None,
+            "eta_seconds": self.eta(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Pool borné de tâches lourdes, hors boucle asyncio
+
+    `disk_slots` limite le nombre de tâches disque simultanées : un backup
+    planifié et un backup manuel ne se disputent jamais le disque. Les tâches
+    disque ont leur propre pool (file d'attente comprise) : une tâche disque
+    en attente n'occupe jamais un thread dont une tâche légère aurait besoin.
+    """
+
+    def __init__(self, max_workers=2, disk_slots=1, history=50):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._disk_executor = ThreadPoolExecutor(max_workers=disk_slots, thread_name_prefix="job-disk")
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._history = history
+
+    def submit(self, kind, fn, *args, unique=False, disk=True, **kwargs):
+        """Planifie fn(*args, progress=job, **kwargs) et retourne le Job immédiatement
+
+        Avec unique=True, une tâche du même type déjà en attente ou en cours est
+        réutilisée au lieu d'en empiler une nouvelle.
+        """
+        with self._lock:
+            if unique:
+                for job in self._jobs.values():
+                    if job.kind == kind and job.active:
+                        return job
+
+            job = Job(str(next(self._ids)), kind)
+            self._jobs[job.id] = job
+            self._trim()
+
+        executor = self._disk_executor if disk else self._executor
+        executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.status = "running"
+            job.started = time.time()
+            result = fn(*args, progress=job, **kwargs)
+            job.result = result
+            if isinstance(result, dict) and result.get("success") is False:
+                job.status = "failed"
+                job.error = result.get("error")
+            else:
+                job.status = "done"
+        except Exception as e:
+            print(f"[JOB {job.id}] Erreur {job.kind}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+
+    def _trim(self):
+        # Oublie les plus anciennes tâches terminées au-delà de l'historique
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(len(self._jobs) - self._history, 0)]:
+            del self._jobs[job_id]
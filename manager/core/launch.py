@@ -0,0 +1,172 @@
+import os
+import shlex
+import shutil
+
+
+# Profil de lancement par défaut : l'ancien comportement (heap fixe 1 Go, GC par défaut de la JVM)
+DEFAULT_LAUNCH_PROFILE = {
+    "heap_min_mb": 1024,
+    "heap_max_mb": 1024,
+    "gc": "default",
+    "extra_args": [],
+    "cpu_affinity": None,
+}
+
+# Presets de GC. "aikar" : flags G1 recommandés pour les serveurs Minecraft (docs.papermc.io)
+GC_PRESETS = {
+    "default": [],
+    "g1": [
+        "-XX:+UseG1GC",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:+DisableExplicitGC",
+        "-XX:+AlwaysPreTouch",
+    ],
+    "aikar": [
+        "-XX:+UseG1GC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:+DisableExplicitGC",
+        "-XX:+AlwaysPreTouch",
+        "-XX:G1NewSizePercent=30",
+        "-XX:G1MaxNewSizePercent=40",
+        "-XX:G1HeapRegionSize=8M",
+        "-XX:G1ReservePercent=20",
+        "-XX:G1HeapWastePercent=5",
+        "-XX:G1MixedGCCountTarget=4",
+        "-XX:InitiatingHeapOccupancyPercent=15",
+        "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32",
+        "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+    ],
+    "zgc": ["-XX:+UseZGC"],
+    "parallel": ["-XX:+UseParallelGC"],
+}
+
+MIN_HEAP_MB = 512
+# Mémoire laissée à l'OS, au manager et au hors-heap de la JVM (metaspace, threads, buffers)
+HOST_RESERVED_MB = 512
+
+# Flags gérés par le profil lui-même : refusés dans extra_args
+_RESERVED_PREFIXES = ("-Xmx", "-Xms", "-XX:MaxHeapSize", "-XX:InitialHeapSize", "-jar")
+
+
+def host_memory_mb():
+    """RAM totale de la machine (MemTotal de /proc/meminfo), None si illisible"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def host_cpus():
+    """CPU utilisables par le manager (et donc assignables au serveur)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text):
+    """'0-3,6' -> [0, 1, 2, 3, 6] (format taskset / cpuset)"""
+    cpus = set()
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def validate_launch_profile(profile, memory_mb=None, cpus=None):
+    """Profil complété avec les valeurs par défaut ; ValueError si invalide pour cette machine"""
+    if profile is not None and not isinstance(profile, dict):
+        raise ValueError("Profil de lancement invalide (objet JSON attendu)")
+    result = {**DEFAULT_LAUNCH_PROFILE, **(profile or {})}
+    unknown = set(result) - set(DEFAULT_LAUNCH_PROFILE)
+    if unknown:
+        raise ValueError(f"Clés inconnues: {', '.join(sorted(unknown))}")
+
+    try:
+        heap_min = int(result["heap_min_mb"])
+        heap_max = int(result["heap_max_mb"])
+    except (TypeError, ValueError):
+        raise ValueError("Tailles de heap invalides (entiers en Mo attendus)")
+    if heap_max < MIN_HEAP_MB:
+        raise ValueError(f"Heap max trop petit (minimum {MIN_HEAP_MB} Mo)")
+    if not 0 < heap_min <= heap_max:
+        raise ValueError("Le heap min doit être compris entre 1 et le heap max")
+
+    memory_mb = memory_mb if memory_mb is not None else host_memory_mb()
+    if memory_mb is not None and heap_max > memory_mb - HOST_RESERVED_MB:
+        raise ValueError(f"Heap max {heap_max} Mo trop grand pour cette machine "
+                         f"({memory_mb} Mo de RAM, {HOST_RESERVED_MB} Mo réservés hors heap)")
+    result["heap_min_mb"], result["heap_max_mb"] = heap_min, heap_max
+
+    if not isinstance(result["gc"], str) or result["gc"] not in GC_PRESETS:
+        raise ValueError(f"GC inconnu: {result['gc']} (choix: {', '.join(GC_PRESETS)})")
+
+    extra_args = result["extra_args"]
+    if extra_args is None:
+        extra_args = []
+    elif isinstance(extra_args, str):
+        extra_args = shlex.split(extra_args)
+    elif not isinstance(extra_args, list):
+        raise ValueError("Arguments JVM invalides (liste ou chaîne attendue)")
+    extra_args = [str(arg) for arg in extra_args]
+    for arg in extra_args:
+        if not arg.startswith("-"):
+            raise ValueError(f"Argument JVM invalide: {arg}")
+        if arg.startswith(_RESERVED_PREFIXES):
+            raise ValueError(f"{arg} : utiliser les champs heap du profil")
+    result["extra_args"] = extra_args
+
+    affinity = result["cpu_affinity"]
+    if affinity in (None, "", []):
+        result["cpu_affinity"] = None
+    else:
+        try:
+            affinity = parse_cpu_list(affinity) if isinstance(affinity, str) else sorted({int(c) for c in affinity})
+        except (TypeError, ValueError):
+            raise ValueError(f"Liste de CPU invalide: {result['cpu_affinity']}")
+        available = set(cpus if cpus is not None else host_cpus())
+        missing = [cpu for cpu in affinity if cpu not in available]
+        if missing:
+            raise ValueError(f"CPU indisponibles: {missing} (disponibles: {sorted(available)})")
+        result["cpu_affinity"] = affinity
+
+    return result
+
+
+def jvm_args(profile):
+    """Arguments JVM d'un profil validé (avant -jar)"""
+    return [
+        f"-Xms{profile['heap_min_mb']}M",
+        f"-Xmx{profile['heap_max_mb']}M",
+        *GC_PRESETS[profile["gc"]],
+        *profile["extra_args"],
+    ]
+
+
+def affinity_prefix(profile):
+    """Préfixe taskset fixant l'affinité CPU de java, [] sans affinité
+
+    taskset s'exécute dans le fils et applique l'affinité avant d'exec java :
+    rien ne tourne entre fork et exec dans le manager (multi-thread).
+    """
+    cpus = profile.get("cpu_affinity")
+    if not cpus:
+        return []
+    if shutil.which("taskset") is None:
+        print("[LAUNCH] taskset introuvable (util-linux) : affinité CPU ignorée")
+        return []
+    return ["taskset", "-c", ",".join(str(cpu) for cpu in cpus)]
@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+
+
+# "[12:34:56] [Server thread/INFO]: message" (vanilla)
+# "[12:34:56] [Server thread/INFO] [minecraft/MinecraftServer]: message" (Forge : nom du logger en plus)
+# "[12:34:56 INFO]: message" (console Paper / Spigot)
+LINE_PREFIX = re.compile(
+    r"^\[(?P<time>[^\]]+)\] \[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\](?: \[[^\]]*\])?: "
+    r"|^\[(?P<short_time>\d{1,2}:\d{2}:\d{2}) (?P<short_level>[A-Z]+)\]: "
+)
+
+# type -> motifs essayés (dans l'ordre) sur le message, préfixe retiré
+EVENT_PATTERNS = {
+    "join": [re.compile(r"^(?P<player>\w+) joined the game$")],
+    "leave": [re.compile(r"^(?P<player>\w+) left the game$")],
+    "login": [re.compile(r"^(?P<player>\w+)\[/(?P<ip>\[[^\]]+\]|[^\]:]+)(?::\d+)?\] logged in with entity id")],
+    # Réponse à `list` (1.13+) : "There are 2 of a max of 20 players online: Steve, Alex"
+    "player_list": [re.compile(r"^There are (?P<count>\d+) of a max(?: of)? (?P<max>\d+) players online:\s*(?P<players>.*)$")],
+    "uuid": [re.compile(r"^UUID of player (?P<player>\w+) is (?P<uuid>[0-9a-f-]{32,36})$")],
+    "whitelist_denied": [
+        re.compile(r"^Disconnecting (?:.*?name=(?P<profile>\w+).*?|(?P<player>\w+)) \(.*\): You are not white-listed"),
+        re.compile(r"^(?P<player>\w+) \(.*\) lost connection: You are not white-listed"),
+    ],
+    "chat": [re.compile(r"^(?:\[Not Secure\] )?<(?P<player>\w+)> (?P<message>.*)$")],
+    "lag": [re.compile(r"^Can't keep up! Is the server overloaded\? Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")],
+    # Réponses à `tick query` (vanilla 1.20.3+), `forge tps`, `tps` (Paper/Spigot)
+    # tick query : "Target tick rate: 20.0 per second.\nAverage time per tick: 3.2ms (Target: 50.0ms)" ;
+    # la 2e ligne arrive sans préfixe, ou accolée à la 1re selon le canal
+    "tps": [
+        re.compile(r"Average time per tick: (?P<mspt>[\d.]+) ?ms(?: \(Target: (?P<target>[\d.]+) ?ms\))?"),
+        re.compile(r"^Overall\s*: Mean tick time: (?P<mspt>[\d.]+) ms\. Mean TPS: (?P<tps>[\d.]+)"),
+        re.compile(r"^(?:§.)*TPS from last 1m, 5m, 15m: (?:§.)*\*?(?P<tps>[\d.]+)"),
+    ],
+}
+
+# Filtre rapide avant les regex : la plupart des lignes n'en déclenchent aucune
+_KEYWORDS = {
+    "join": "joined the game",
+    "leave": "left the game",
+    "login": "logged in with entity id",
+    "player_list": "players online:",
+    "uuid": "UUID of player",
+    "whitelist_denied": "white-listed",
+    "chat": "<",
+    "lag": "Can't keep up",
+    "tps": ("tick", "TPS"),
+}
+
+# Entête de stack trace sans préfixe : "java.lang.FooException: msg", "Caused by: ..."
+EXCEPTION_LINE = re.compile(r"^(?:Caused by: )?(?:[a-zA-Z_$][\w$]*\.)+[\w$]*(?:Exception|Error)\b")
+
+EVENT_TYPES = tuple(EVENT_PATTERNS) + ("error",)
+
+
+# Suite sans préfixe de la réponse à `tick query`
+TICK_CONTINUATION = EVENT_PATTERNS["tps"][0]
+
+
+def _event_fields(event_type, match):
+    fields = {k: v for k, v in match.groupdict().items() if v is not None}
+    if "profile" in fields:
+        fields["player"] = fields.pop("profile")
+    if event_type == "lag":
+        return {"ms": int(fields["ms"]), "ticks": int(fields["ticks"])}
+    if event_type == "tps":
+        fields = {k: float(v) for k, v in fields.items()}
+        if "tps" not in fields:
+            # tick query ne donne que le temps par tick : TPS plafonné à la cadence cible (20 par défaut)
+            target = fields.pop("target", None)
+            max_tps = 1000 / target if target else 20.0
+            fields["tps"] = round(min(max_tps, 1000 / fields["mspt"]) if fields["mspt"] else max_tps, 2)
+        return fields
+    if event_type == "player_list":
+        return {
+            "count": int(fields["count"]),
+            "max": int(fields["max"]),
+            "players": [p for p in fields.get("players", "").replace(" ", "").split(",") if p],
+        }
+    return fields
+
+
+def classify(line):
+    """Ligne de log -> (type, champs) ou None ; chaque ligne n'est analysée qu'une fois"""
+    prefix = LINE_PREFIX.match(line)
+    if prefix is None:
+        if line.startswith("Average time per tick"):
+            match = TICK_CONTINUATION.match(line)
+            if match:
+                return "tps", _event_fields("tps", match)
+        if EXCEPTION_LINE.match(line):
+            return "error", {"level": "ERROR", "message": line}
+        return None
+
+    message = line[prefix.end():]
+    level = prefix.group("level") or prefix.group("short_level")
+    for event_type, keyword in _KEYWORDS.items():
+        if isinstance(keyword, tuple):
+            if not any(k in message for k in keyword):
+                continue
+        elif keyword not in message:
+            continue
+        for pattern in EVENT_PATTERNS[event_type]:
+            # search : les motifs ancrés gardent leur ^, celui de tick query peut suivre
+            # "Target tick rate: ..." sur la même ligne
+            match = pattern.search(message)
+            if match:
+                return event_type, _event_fields(event_type, match)
+
+    if level in ("ERROR", "FATAL") or (level == "WARN" and EXCEPTION_LINE.match(message)):
+        return "error", {"level": level, "message": message}
+    return None
+
+
+class LogEventIndex:
+    """Événements typés extraits du flux de logs, indexés par type
+
+    feed() est appelé une fois par ligne, par le lecteur de sortie du serveur ;
+    les routes lisent les index sans jamais reparcourir le texte brut.
+    """
+
+    def __init__(self, maxlen=500):
+        self._lock = threading.Lock()
+        self._by_type = {event_type: deque(maxlen=maxlen) for event_type in EVENT_TYPES}
+        self._counts = Counter()
+        self._uuids = {}  # pseudo (minuscules) -> UUID vu par l'authentificateur
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(event) appelé pour chaque nouvel événement (hors verrou)"""
+        self._listeners.append(callback)
+
+    def feed(self, seq, line):
+        classified = classify(line)
+        if classified is None:
+            return None
+        event_type, fields = classified
+        event = {"seq": seq, "type": event_type, "time": time.time(), **fields}
+
+        with self._lock:
+            if event_type == "uuid":
+                self._uuids[fields["player"].lower()] = fields["uuid"]
+            elif event_type == "whitelist_denied":
+                # Le refus whitelist arrive après la ligne UUID du même joueur
+                uuid = self._uuids.get(fields["player"].lower())
+                if uuid:
+                    event["uuid"] = uuid
+            self._by_type[event_type].append(event)
+            self._counts[event_type] += 1
+
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[EVENTS] Erreur listener: {e}")
+        return event
+
+    # ----- Lecture -----
+
+    def events(self, event_type=None, since=0, limit=100):
+        """Événements de seq > since, du plus ancien au plus récent (un type ou tous)"""
+        with self._lock:
+            if event_type is not None:
+                source = self._by_type[event_type]
+                selected = [e for e in reversed(source) if e["seq"] > since][:limit]
+            else:
+                merged = [e for events in self._by_type.values() for e in events if e["seq"] > since]
+                selected = sorted(merged, key=lambda e: e["seq"], reverse=True)[:limit]
+        return selected[::-1]
+
+    def last(self, event_type):
+        with self._lock:
+            events = self._by_type[event_type]
+            return events[-1] if events else None
+
+    def uuid_of(self, player):
+        return self._uuids.get(player.lower())
+
+    def counts(self):
+        """Nombre total d'événements par type depuis le lancement du manager"""
+        with self._lock:
+            return {event_type: self._counts[event_type] for event_type in EVENT_TYPES}
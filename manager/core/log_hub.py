@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class Subscription:
+    """Abonné au flux de logs : file bornée, les plus anciennes lignes sont jetées si le client traîne"""
+
+    def __init__(self, hub, loop, maxsize):
+        self._hub = hub
+        self._loop = loop
+        self._queue = deque(maxlen=maxsize)
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def _push(self, batch):
+        # Appelé dans la boucle asyncio de l'abonné
+        overflow = len(self._queue) + len(batch) - self._queue.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self._queue.extend(batch)
+        self._event.set()
+
+    async def get(self):
+        """Attend puis retourne toutes les entrées (seq, ligne) en attente"""
+        while not self._queue:
+            self._event.clear()
+            await self._event.wait()
+        batch = list(self._queue)
+        self._queue.clear()
+        return batch
+
+    def close(self):
+        self._hub._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _LoopChannel:
+    """Abonnés d'une même boucle asyncio + lignes en attente de diffusion"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.subscribers = set()
+        self.pending = []
+        self.scheduled = False
+
+
+class LogHub:
+    """Diffusion push des lignes de log vers SSE/WebSocket
+
+    Le thread lecteur publie chaque ligne une seule fois ; une rafale de lignes
+    ne réveille chaque boucle qu'une fois (call_soon_threadsafe), puis le lot
+    est distribué à tous les abonnés. Aucun timer par client.
+    """
+
+    def __init__(self, queue_size=500):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(c.subscribers) for c in self._channels.values())
+
+    def subscribe(self, maxsize=None):
+        """À appeler depuis la boucle asyncio qui consommera les lignes"""
+        loop = asyncio.get_running_loop()
+        sub = Subscription(self, loop, maxsize or self.queue_size)
+        with self._lock:
+            channel = self._channels.get(loop)
+            if channel is None:
+                channel = self._channels[loop] = _LoopChannel(loop)
+            channel.subscribers.add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            channel = self._channels.get(sub._loop)
+            if channel is None:
+                return
+            channel.subscribers.discard(sub)
+            if not channel.subscribers:
+                del self._channels[sub._loop]
+
+    def publish(self, seq, line):
+        """Thread-safe : appelé depuis le thread lecteur du process"""
+        with self._lock:
+            for loop, channel in list(self._channels.items()):
+                channel.pending.append((seq, line))
+                if channel.scheduled:
+                    continue
+                try:
+                    loop.call_soon_threadsafe(self._flush, channel)
+                    channel.scheduled = True
+                except RuntimeError:
+                    # Boucle fermée : on oublie ses abonnés
+                    del self._channels[loop]
+
+    def _flush(self, channel):
+        with self._lock:
+            batch = channel.pending
+            channel.pending = []
+            channel.scheduled = False
+            subscribers = list(channel.subscribers)
+        for sub in subscribers:
+            sub._push(batch)
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+
+class LogStore:
+    """Buffer circulaire de logs : chaque ligne reçoit un numéro de séquence croissant"""
+
+    def __init__(self, maxlen=1000):
+        self._entries = deque(maxlen=maxlen)  # tuples (seq, ligne)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    @property
+    def first_seq(self):
+        """Séquence de la plus ancienne ligne encore en mémoire"""
+        with self._lock:
+            if not self._entries:
+                return self._last_seq + 1
+            return self._entries[0][0]
+
+    def append(self, line):
+        """Ajoute une ligne et retourne son numéro de séquence"""
+        with self._lock:
+            self._last_seq += 1
+            self._entries.append((self._last_seq, line))
+            self._appended.notify_all()
+            return self._last_seq
+
+    def since(self, seq, limit=None):
+        """Lignes strictement après `seq` -> (entries, cursor, reset)
+
+        Coût O(nouvelles lignes) : on part de la fin du deque.
+        `cursor` est la séquence à renvoyer au prochain appel.
+        `reset` vaut True si le curseur est sorti du buffer (lignes perdues)
+        ou s'il vient d'une autre exécution du manager (seq > dernière).
+        `limit` < 1 est ramené à 1 : le curseur doit toujours pouvoir avancer.
+        """
+        if limit is not None:
+            limit = max(1, limit)
+        with self._lock:
+            reset = False
+            if seq > self._last_seq:
+                seq = 0
+                reset = True
+
+            count = self._last_seq - seq
+            if count > len(self._entries):
+                count = len(self._entries)
+                reset = True
+
+            if count <= 0:
+                return [], self._last_seq if reset else seq, reset
+
+            entries = list(islice(reversed(self._entries), count))
+
+        entries.reverse()
+        if limit is not None:
+            entries = entries[:limit]
+        return entries, entries[-1][0], reset
+
+    def wait_for(self, pattern, since, timeout):
+        """Attend une ligne postérieure à `since` qui matche la regex -> (seq, ligne) ou None
+
+        Bloquant : à utiliser depuis un thread (backup, scheduler), pas depuis une boucle asyncio.
+        """
+        deadline = time.monotonic() + timeout
+        with self._appended:
+            while True:
+                count = min(self._last_seq - since, len(self._entries))
+                if count > 0:
+                    new = list(islice(reversed(self._entries), count))
+                    for seq, line in reversed(new):
+                        if pattern.search(line):
+                            return seq, line
+                    since = self._last_seq
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._appended.wait(remaining)
+
+    def tail(self, n):
+        """Les n dernières lignes (texte seul)"""
+        with self._lock:
+            entries = list(islice(reversed(self._entries), n))
+        entries.reverse()
+        return [line for _, line in entries]
+
+    def lines(self):
+        with self._lock:
+            return [line for _, line in self._entries]
+
+    def clear(self):
+        """Vide le buffer sans remettre le compteur à zéro (les curseurs restent valides)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.lines())
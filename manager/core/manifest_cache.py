@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+
+class ManifestCache:
+    """Document JSON distant mis en cache : TTL, revalidation ETag/If-Modified-Since, copie disque
+
+    - frais (< ttl) : servi depuis la mémoire, aucune requête
+    - périmé : requête conditionnelle (304 = simple prolongation)
+    - hors ligne / Mojang en panne : dernière copie connue (mémoire ou disque)
+    ttl=None : document immuable, jamais revalidé une fois obtenu.
+    """
+
+    def __init__(self, url, cache_file, ttl=600, session=None, timeout=10):
+        self.url = url
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._session = session or requests.Session()
+        self._refresh_lock = threading.Lock()
+        self._background = None
+
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0
+        self._load()
+
+    def is_fresh(self):
+        if self.data is None:
+            return False
+        return self.ttl is None or time.time() - self.fetched_at < self.ttl
+
+    # ----- Accès -----
+
+    def get(self):
+        """Version synchrone (threads) : revalide si périmé, sinon mémoire"""
+        if not self.is_fresh():
+            self._refresh_once()
+        return self.data
+
+    async def get_async(self):
+        """Version async : jamais d'attente réseau si une copie existe (stale-while-revalidate)"""
+        if self.is_fresh():
+            return self.data
+        if self.data is None:
+            await asyncio.to_thread(self._refresh_once)
+            return self.data
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(asyncio.to_thread(self._refresh_once))
+        return self.data
+
+    # ----- Réseau -----
+
+    def _refresh_once(self):
+        # Une seule requête à la fois ; les autres appelants réutilisent son résultat
+        with self._refresh_lock:
+            if self.is_fresh():
+                return
+            try:
+                self._refresh()
+            except (requests.RequestException, ValueError) as e:
+                print(f"[CACHE] {self.url} injoignable, copie locale utilisée: {e}")
+
+    def _refresh(self):
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        response = self._session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            self.fetched_at = time.time()
+            self._save()
+            return
+
+        response.raise_for_status()
+        self.data = response.json()
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.fetched_at = time.time()
+        self._save()
+
+    # ----- Disque -----
+
+    def _load(self):
+        try:
+            cached = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return
+        self.data = cached.get("data")
+        self.etag = cached.get("etag")
+        self.last_modified = cached.get("last_modified")
+        self.fetched_at = cached.get("fetched_at", 0)
+
+    def _save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp.write_text(json.dumps({
+                "url": self.url,
+                "etag": self.etag,
+                "last_modified": self.last_modified,
+                "fetched_at": self.fetched_at,
+                "data": self.data,
+            }))
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"[CACHE] Écriture {self.cache_file} impossible: {e}")
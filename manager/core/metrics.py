@@ -0,0 +1,119 @@
+import threading
+import time
+from array import array
+from collections import deque
+
+
+class Ring:
+    """Tampon circulaire de taille fixe, une colonne array('d') par champ
+
+    Mémoire constante (8 octets par valeur), aucun objet Python par point.
+    """
+
+    def __init__(self, size, fields=("value",)):
+        self.size = size
+        self.fields = fields
+        self._times = array("d", bytes(8 * size))
+        self._columns = [array("d", bytes(8 * size)) for _ in fields]
+        self._head = 0   # prochain emplacement écrit
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, t, *values):
+        self._times[self._head] = t
+        for column, value in zip(self._columns, values):
+            column[self._head] = value
+        self._head = (self._head + 1) % self.size
+        self._len = min(self._len + 1, self.size)
+
+    def replace_last(self, t, *values):
+        last = (self._head - 1) % self.size
+        self._times[last] = t
+        for column, value in zip(self._columns, values):
+            column[last] = value
+
+    def rows(self, since=0):
+        """[t, v1, v2...] du plus ancien au plus récent, t > since"""
+        start = (self._head - self._len) % self.size
+        rows = []
+        for i in range(self._len):
+            index = (start + i) % self.size
+            t = self._times[index]
+            if t > since:
+                rows.append([t] + [round(column[index], 3) for column in self._columns])
+        return rows
+
+
+# résolution -> (largeur du bucket en secondes, nombre de buckets gardés)
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),   # 24 h
+    "hour": (3600, 30 * 24),   # 30 jours
+}
+
+
+class Metric:
+    """Série brute + agrégats par minute et par heure (moyenne, max, nombre)"""
+
+    def __init__(self, name, raw_size=720):
+        self.name = name
+        self.raw = Ring(raw_size)
+        self._downsampled = {
+            resolution: Ring(count, ("avg", "max", "count"))
+            for resolution, (width, count) in RESOLUTIONS.items()
+        }
+        self._buckets = {resolution: None for resolution in RESOLUTIONS}  # [début, somme, max, n]
+        self._lock = threading.Lock()
+
+    def record(self, value, t=None):
+        t = t or time.time()
+        with self._lock:
+            self.raw.append(t, value)
+            for resolution, (width, _) in RESOLUTIONS.items():
+                start = t - t % width
+                bucket = self._buckets[resolution]
+                ring = self._downsampled[resolution]
+                if bucket is not None and bucket[0] == start:
+                    bucket[1] += value
+                    bucket[2] = max(bucket[2], value)
+                    bucket[3] += 1
+                    ring.replace_last(start, bucket[1] / bucket[3], bucket[2], bucket[3])
+                else:
+                    self._buckets[resolution] = [start, value, value, 1]
+                    ring.append(start, value, value, 1)
+
+    def last(self):
+        rows = self.raw.rows()
+        return rows[-1][1] if rows else None
+
+    def series(self, resolution="raw", since=0):
+        with self._lock:
+            ring = self.raw if resolution == "raw" else self._downsampled[resolution]
+            return {"fields": ["time", *ring.fields], "points": ring.rows(since)}
+
+
+class MetricsStore:
+    """Ensemble de séries nommées + annotations (backups, redémarrages...)"""
+
+    def __init__(self, names, raw_size=720, annotations=500):
+        self._metrics = {name: Metric(name, raw_size) for name in names}
+        self._annotations = deque(maxlen=annotations)
+
+    def record(self, name, value, t=None):
+        self._metrics[name].record(value, t)
+
+    def annotate(self, kind, detail=None, t=None):
+        self._annotations.append({"time": t or time.time(), "kind": kind, "detail": detail})
+
+    def last(self, name):
+        return self._metrics[name].last()
+
+    def export(self, resolution="raw", since=0):
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Résolution inconnue: {resolution}")
+        return {
+            "resolution": resolution,
+            "series": {name: metric.series(resolution, since) for name, metric in self._metrics.items()},
+            "annotations": [a for a in list(self._annotations) if a["time"] > since],
+        }
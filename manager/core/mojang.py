@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.persistence import atomic_write_text
+from core.prometheus import REGISTRY
+
+
+# Surchargeable pour tester contre un serveur local
+MOJANG_API_URL = os.environ.get("MOJANG_API_URL", "https://api.mojang.com")
+BULK_SIZE = 10             # limite de l'endpoint POST /profiles/minecraft
+PROFILE_TTL = 24 * 3600    # un pseudo peut changer de propriétaire (30 jours min. côté Mojang)
+NEGATIVE_TTL = 3600        # pseudo inexistant : re-vérifié au bout d'une heure
+CACHE_SIZE = 10000
+
+_API_LATENCY = REGISTRY.histogram("mc_mojang_api_request_duration_seconds",
+                                  "Latence des appels à l'API Mojang (résolution UUID)", ("status",))
+_CACHE_LOOKUPS = REGISTRY.counter("mc_mojang_cache_lookups_total", "Résolutions UUID par résultat du cache",
+                                  ("result",))
+
+
+def format_uuid(raw):
+    """UUID Mojang (32 hex) -> forme avec tirets attendue par whitelist.json"""
+    raw = raw.replace("-", "")
+    return f"{raw[0:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:32]}"
+
+
+class UUIDResolver:
+    """Résolution pseudo -> UUID Mojang : cache LRU disque, lots de 10, session partagée
+
+    Le cache garde aussi les pseudos introuvables (cache négatif, TTL court).
+    resolve_async() lance plusieurs lots en parallèle (`concurrency`) ;
+    resolve() est sa variante bloquante, pour les threads.
+    """
+
+    def __init__(self, cache_file, base_url=MOJANG_API_URL, ttl=PROFILE_TTL,
+                 negative_ttl=NEGATIVE_TTL, maxsize=CACHE_SIZE, concurrency=4, timeout=10):
+        self.cache_file = Path(cache_file)
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        # Pool de connexions keep-alive partagé par les lots
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # pseudo en minuscules -> {"name", "uuid", "expires"}
+        self._load()
+
+    # ----- Résolution -----
+
+    def resolve(self, names, progress=None):
+        """Variante bloquante de resolve_async (à appeler hors boucle asyncio)"""
+        return asyncio.run(self.resolve_async(names, progress))
+
+    async def resolve_async(self, names, progress=None):
+        """-> (profils, erreurs)
+
+        profils : pseudo demandé -> {"name", "uuid"} ou None si le compte n'existe pas
+        erreurs : pseudo demandé -> message (API injoignable, non mis en cache)
+        `progress` (optionnel) reçoit advance(files=n) à chaque pseudo traité.
+        """
+        profiles, errors = {}, {}
+        misses = []
+        for name in dict.fromkeys(names):
+            cached = self._lookup(name)
+            if cached is False:
+                misses.append(name)
+            else:
+                profiles[name] = cached
+        _CACHE_LOOKUPS.labels("hit").inc(len(profiles))
+        _CACHE_LOOKUPS.labels("miss").inc(len(misses))
+        if progress and profiles:
+            progress.advance(files=len(profiles))
+
+        if misses:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def run_chunk(chunk):
+                async with semaphore:
+                    try:
+                        found = await asyncio.to_thread(self._fetch_chunk, chunk)
+                    except (requests.RequestException, ValueError) as e:
+                        for name in chunk:
+                            errors[name] = f"Erreur API Mojang: {e}"
+                    else:
+                        for name in chunk:
+                            profiles[name] = found.get(name.lower())
+                    if progress:
+                        progress.advance(files=len(chunk))
+
+            chunks = [misses[i:i + BULK_SIZE] for i in range(0, len(misses), BULK_SIZE)]
+            await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+            self._save()
+
+        return profiles, errors
+
+    def _lookup(self, name):
+        """Profil en cache, None (inexistant, en cache) ou False (inconnu / expiré)"""
+        key = name.lower()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False
+            if entry["expires"] < time.time():
+                del self._cache[key]
+                return False
+            self._cache.move_to_end(key)
+            if entry["uuid"] is None:
+                return None
+            return {"name": entry["name"], "uuid": entry["uuid"]}
+
+    def _fetch_chunk(self, chunk, retries=3):
+        """POST /profiles/minecraft pour au plus 10 pseudos -> {pseudo minuscule: profil}"""
+        for attempt in range(retries):
+            started = time.perf_counter()
+            try:
+                response = self._session.post(f"{self.base_url}/profiles/minecraft", json=chunk,
+                                              timeout=self.timeout)
+            except requests.RequestException:
+                _API_LATENCY.labels("error").observe(time.perf_counter() - started)
+                raise
+            _API_LATENCY.labels(str(response.status_code)).observe(time.perf_counter() - started)
+            if response.status_code != 429 or attempt == retries - 1:
+                break
+            # Limite de débit Mojang : attendre ce qui est demandé
+            time.sleep(float(response.headers.get("Retry-After", 2 ** attempt)))
+        response.raise_for_status()
+
+        now = time.time()
+        found = {}
+        with self._lock:
+            for data in response.json():
+                profile = {"name": data["name"], "uuid": format_uuid(data["id"])}
+                found[data["name"].lower()] = profile
+                self._store(data["name"].lower(), profile["name"], profile["uuid"], now + self.ttl)
+            # Absents de la réponse : comptes inexistants (cache négatif)
+            for name in chunk:
+                if name.lower() not in found:
+                    self._store(name.lower(), name, None, now + self.negative_ttl)
+        return found
+
+    def _store(self, key, name, uuid, expires):
+        self._cache[key] = {"name": name, "uuid": uuid, "expires": expires}
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    # ----- Disque -----
+
+    def _load(self):
+        try:
+            entries = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            if entry.get("expires", 0) > now:
+                self._cache[key] = entry
+
+    def _save(self):
+        with self._lock:
+            text = json.dumps(self._cache)
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.cache_file, text)
+        except OSError as e:
+            print(f"[MOJANG] Écriture cache {self.cache_file} impossible: {e}")
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def atomic_write_text(path, text):
+    """Écrit un fichier sans jamais laisser de version tronquée (temp + fsync + rename)"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+    # Le rename lui-même doit survivre à une coupure
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class WriteBehind:
+    """Écritures de fichiers d'état, fusionnées dans un lot
+
+    Hors lot, write() écrit tout de suite (atomiquement). Dans un
+    `with batch():`, seule la dernière version de chaque fichier est gardée
+    et tout est écrit en une fois à la sortie du lot le plus externe.
+    Le lot tient un verrou : les mutations concurrentes attendent sa fin.
+    """
+
+    def __init__(self, on_flush=None):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pending = {}
+        # Appelé avec chaque chemin qui n'est plus en attente : écrit, ou abandonné
+        # après une écriture en échec (les valeurs amorcées ne doivent pas survivre)
+        self._on_flush = on_flush
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.flush()
+
+    def write(self, path, text):
+        """Écrit ou diffère l'écriture ; retourne True si elle est différée"""
+        path = Path(path)
+        with self._lock:
+            if self._depth:
+                self._pending[path] = text
+                return True
+            try:
+                atomic_write_text(path, text)
+            finally:
+                if self._on_flush:
+                    self._on_flush(path)
+        return False
+
+    def pending(self, path):
+        """Contenu en attente d'écriture pour path (None si rien de différé)"""
+        with self._lock:
+            return self._pending.get(Path(path))
+
+    def flush(self):
+        """Écrit le lot ; à la première erreur, le reste est abandonné et l'erreur remonte"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            try:
+                for path, text in pending.items():
+                    atomic_write_text(path, text)
+            finally:
+                if self._on_flush:
+                    for path in pending:
+                        self._on_flush(path)
+        return len(pending)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+class PlayerRoster:
+    """Joueurs connectés, tenus à jour par les événements de log
+
+    Sessions indexées par pseudo en minuscules (recherche en O(1)).
+    login/uuid précèdent `joined the game` : IP et UUID sont mis de côté
+    puis rattachés à la session. La réponse à `list` sert de
+    réconciliation (lignes de log perdues, manager relancé...).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}   # pseudo minuscule -> session
+        self._pending = {}    # pseudo minuscule -> {"uuid", "ip"} avant le join
+        self.max_players = None
+        self.reconciled_at = None
+
+    def on_event(self, event):
+        """Listener de LogEventIndex"""
+        event_type = event["type"]
+        if event_type == "player_list":
+            self.reconcile(event["players"], event["max"], event["time"])
+            return
+        if "player" not in event:
+            return
+
+        key = event["player"].lower()
+        with self._lock:
+            if event_type == "uuid":
+                self._pending.setdefault(key, {})["uuid"] = event["uuid"]
+            elif event_type == "login":
+                self._pending.setdefault(key, {})["ip"] = event["ip"]
+            elif event_type == "join":
+                info = self._pending.pop(key, {})
+                self._sessions[key] = {
+                    "name": event["player"],
+                    "uuid": info.get("uuid"),
+                    "ip": info.get("ip"),
+                    "joined": event["time"],
+                }
+            elif event_type == "leave":
+                self._sessions.pop(key, None)
+                self._pending.pop(key, None)
+            elif event_type == "whitelist_denied":
+                # Refusé avant le join : rien à rattacher
+                self._pending.pop(key, None)
+
+    def reconcile(self, names, max_players=None, now=None):
+        """Aligne la table sur la liste renvoyée par le serveur"""
+        now = now or time.time()
+        online = {name.lower(): name for name in names}
+        with self._lock:
+            for key in list(self._sessions):
+                if key not in online:
+                    del self._sessions[key]
+            for key, name in online.items():
+                if key not in self._sessions:
+                    # Connexion non vue dans les logs : heure exacte inconnue
+                    self._sessions[key] = {"name": name, "uuid": None, "ip": None, "joined": None}
+            if max_players is not None:
+                self.max_players = max_players
+            self.reconciled_at = now
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._pending.clear()
+
+    # ----- Lecture -----
+
+    def get(self, name):
+        """Session d'un joueur connecté (copie) ou None"""
+        session = self._sessions.get(name.lower())
+        return self._with_duration(session) if session else None
+
+    def is_online(self, name):
+        return name.lower() in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def list(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return sorted((self._with_duration(s) for s in sessions), key=lambda s: s["name"].lower())
+
+    @staticmethod
+    def _with_duration(session):
+        joined = session["joined"]
+        return {**session, "session_seconds": round(time.time() - joined) if joined else None}
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+
+from core.metrics import MetricsStore
+
+
+PROCESS_METRICS = ("cpu_percent", "rss_mb", "threads", "read_mb_s", "write_mb_s")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def read_proc(pid):
+    """Lecture brute de /proc/<pid>/stat, status et io -> dict (io absent si illisible)"""
+    with open(f"/proc/{pid}/stat") as f:
+        stat = f.read()
+    # Le nom du process (2e champ) peut contenir espaces et parenthèses
+    fields = stat[stat.rindex(")") + 2:].split()
+    sample = {
+        "state": fields[0],
+        "cpu_ticks": int(fields[11]) + int(fields[12]),  # utime + stime
+        "threads": int(fields[17]),
+    }
+
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key = "rss_kb" if line.startswith("VmRSS") else "rss_peak_kb"
+                sample[key] = int(line.split()[1])
+
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            for line in f:
+                key, value = line.split(":")
+                if key in ("read_bytes", "write_bytes"):
+                    sample[key] = int(value)
+    except (PermissionError, FileNotFoundError):
+        pass
+    return sample
+
+
+class ProcessSampler:
+    """Échantillonne CPU, RSS, threads et I/O disque du process serveur à intervalle fixe
+
+    Un thread qui dort entre deux lectures de trois petits fichiers /proc :
+    quelques dizaines de µs par échantillon. Les taux (CPU %, Mo/s) sont
+    calculés par différence avec l'échantillon précédent du même pid.
+    """
+
+    def __init__(self, pid_getter, interval=5.0, raw_size=720):
+        self._pid_getter = pid_getter
+        self.interval = interval
+        self.metrics = MetricsStore(PROCESS_METRICS, raw_size=raw_size)
+        self.current = None
+        self._previous = None  # (pid, monotonic, échantillon brut)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="proc-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            pid = self._pid_getter()
+            if pid is None:
+                self._previous = None
+                self.current = None
+                continue
+            try:
+                self.sample(pid)
+            except (OSError, ValueError, IndexError):
+                # Process terminé entre deux lectures
+                self._previous = None
+                self.current = None
+
+    def sample(self, pid):
+        now = time.monotonic()
+        raw = read_proc(pid)
+        current = {
+            "pid": pid,
+            "time": time.time(),
+            "state": raw["state"],
+            "threads": raw["threads"],
+            "rss_mb": round(raw.get("rss_kb", 0) / 1024, 1),
+            "rss_peak_mb": round(raw.get("rss_peak_kb", 0) / 1024, 1),
+            "read_bytes": raw.get("read_bytes"),
+            "write_bytes": raw.get("write_bytes"),
+            "cpu_percent": None,
+            "read_mb_s": None,
+            "write_mb_s": None,
+        }
+
+        previous = self._previous
+        if previous is not None and previous[0] == pid:
+            elapsed = now - previous[1]
+            before = previous[2]
+            if elapsed > 0:
+                # Style top : 100 % = un coeur plein
+                cpu_seconds = (raw["cpu_ticks"] - before["cpu_ticks"]) / CLOCK_TICKS
+                current["cpu_percent"] = round(100 * cpu_seconds / elapsed, 1)
+                for key, rate in (("read_bytes", "read_mb_s"), ("write_bytes", "write_mb_s")):
+                    if key in raw and key in before:
+                        current[rate] = round((raw[key] - before[key]) / 1024 / 1024 / elapsed, 3)
+        self._previous = (pid, now, raw)
+        self.current = current
+
+        t = current["time"]
+        self.metrics.record("rss_mb", current["rss_mb"], t)
+        self.metrics.record("threads", current["threads"], t)
+        for name in ("cpu_percent", "read_mb_s", "write_mb_s"):
+            if current[name] is not None:
+                self.metrics.record(name, current[name], t)
+        return current
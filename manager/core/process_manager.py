@@ -1,115 +1,225 @@
 import subprocess
 from pathlib import Path
-from collections import deque
 from datetime import datetime
 import threading
 import time
 import select
 import shutil
+import re
+import os
+import json
+import functools
+import hashlib
+import zipfile
+
+from core.instances import Instance, InstanceManager, DEFAULT_INSTANCE, JAR_NAME, LIST_TIMEOUT
+from core.launch import DEFAULT_LAUNCH_PROFILE, GC_PRESETS, validate_launch_profile, jvm_args, host_memory_mb, host_cpus
+from core.prometheus import REGISTRY
+from core.supervisor import ServerState
+from core.backup_store import BackupStore
+from core.countdown import CountdownService
+from core.jobs import JobManager
+from core import archive
+from core.download import download_file
+from core.manifest_cache import ManifestCache
+from core.file_cache import FileCache
+from core.persistence import WriteBehind
+from core.mojang import UUIDResolver
 
 
 SERVER_DIR = Path.home() / "minecraft-manager" / "server" / "current"
-JAR_NAME = "server.jar"
+CACHE_DIR = Path.home() / "minecraft-manager" / "cache"
+INSTANCES_DIR = Path.home() / "minecraft-manager" / "instances"
+CRASH_HISTORY_FILE = Path.home() / "minecraft-manager" / "logs" / "crashes.json"
+SCHEDULES_FILE = Path.home() / "minecraft-manager" / "schedules.json"
+
+
+def _world_launch_profile():
+    """Profil JVM du monde actif (worlds/{monde}/config.json), relu à chaque démarrage"""
+    world_name = get_current_world()
+    return get_world_config(world_name).get("launch") if world_name else None
+
+
+# Serveur historique = instance "default" : process, logs, joueurs et métriques.
+# Les mondes, backups et la whitelist ne concernent que lui.
+_default = Instance(DEFAULT_INSTANCE, SERVER_DIR, launch=_world_launch_profile, log_prefix="[LOG]",
+                    crash_file=CRASH_HISTORY_FILE)
+_log_buffer = _default.log_buffer
+_log_hub = _default.log_hub
+_log_events = _default.events
+_players = _default.players
+_tick_metrics = _default.tick_metrics
+_proc_sampler = _default.proc_sampler
+_supervisor = _default.supervisor
+
+# Serveurs supplémentaires (instances/<id>/), chacun avec son port
+_instances = InstanceManager(INSTANCES_DIR, _default)
+
+# Tâches lourdes (backup, restauration, copie de monde) hors boucle asyncio,
+# une seule tâche disque à la fois
+_jobs = JobManager(max_workers=2, disk_slots=1)
+
+
+# Métriques Prometheus (/metrics) : compteurs tenus au fil de l'eau, jauges lues au scrape
+_BACKUPS = REGISTRY.counter("mc_backups_total", "Backups du monde par résultat", ("result",))
+_BACKUP_DURATION = REGISTRY.histogram("mc_backup_duration_seconds", "Durée d'un backup (flush + snapshot)")
+_BACKUP_FREEZE = REGISTRY.histogram("mc_backup_freeze_seconds", "Durée pendant laquelle les sauvegardes sont gelées")
+_BACKUP_BYTES = REGISTRY.gauge("mc_backup_last_bytes", "Taille du dernier backup (logique / nouveaux blocs)", ("kind",))
+REGISTRY.gauge("mc_log_stream_subscribers", "Abonnés aux flux de logs (SSE / WebSocket)",
+               fn=lambda: _log_hub.subscriber_count)
+REGISTRY.gauge("mc_server_state", "État du serveur (1 pour l'état courant)", ("state",),
+               fn=lambda: {state.value: int(_supervisor.state is state) for state in ServerState})
+REGISTRY.gauge("mc_players_online", "Joueurs connectés", fn=lambda: len(_players) if is_running() else 0)
+REGISTRY.gauge("mc_server_tps", "Dernier TPS mesuré", fn=lambda: _tick_metrics.last("tps"))
+REGISTRY.gauge("mc_process_cpu_percent", "CPU du process Java (100 = un coeur)",
+               fn=lambda: (_proc_sampler.current or {}).get("cpu_percent"))
+REGISTRY.gauge("mc_process_resident_memory_bytes", "RSS du process Java",
+               fn=lambda: _proc_sampler.current and _proc_sampler.current["rss_mb"] * 1024 * 1024)
+REGISTRY.gauge("mc_process_threads", "Threads du process Java",
+               fn=lambda: _proc_sampler.current and _proc_sampler.current["threads"])
+
+
+# Versions synchrones : threads (scheduler, tâches de fond) et scripts
+def start_server():
+    return _default.start()
 
-_process = None
-_log_buffer = deque(maxlen=200)
-_log_thread = None
+def stop_server():
+    return _default.stop()
 
-def _reader_thread(proc: subprocess.Popen):
-    global _log_buffer
-    import sys
-    
-    for line in iter(proc.stdout.readline, ''):
-        if not line:
-            break
-        clean_line = line.rstrip('\r\n')
-        if clean_line:
-            _log_buffer.append(clean_line)
-            print("[LOG]", clean_line, flush=True)  # flush immédiat terminal
-    
-    # Reste après fermeture
-    remaining = proc.stdout.read()
-    if remaining:
-        for line in remaining.split('\n'):
-            clean = line.rstrip('\r')
-            if clean:
-                _log_buffer.append(clean)
-                print("[LOG]", clean, flush=True)
+def send_command(command: str):
+    # Non bloquant : l'écriture stdin est planifiée sur la boucle du manager
+    return _default.send_command(command)
 
+def execute_command(command: str):
+    """Commande avec sa réponse (RCON), repli sur stdin sans réponse"""
+    return _default.execute(command)
 
+async def execute_command_async(command: str):
+    return await _default.execute_async(command)
 
-def start_server():
-    global _process, _log_thread, _log_buffer, _log
+async def execute_commands_async(commands):
+    """Lot de commandes en un aller-retour RCON (gamerules, whitelist...)"""
+    return await _default.execute_batch_async(commands)
 
-    if _process is not None and _process.poll() is None:
-        return False
+def is_running():
+    return _default.is_running
 
-    _log_buffer.clear()
-
-    cmd = [
-        "java",
-        "-Djava.awt.headless=true",  # headless mode
-        "-Djava.util.logging.SimpleFormatter.format=%1$tY-%1$tm-%1$td %1$tH:%1$tM:%1$tS %4$s: %2$s: %5$s%n",  # format logs
-        "-Xmx1024M",
-        "-Xms1024M",
-        "-jar",
-        JAR_NAME,
-        "nogui",
-    ]
-
-    _process = subprocess.Popen(
-        cmd,
-        cwd=SERVER_DIR,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=0,
-        universal_newlines=True,
-    )
-
-    _log_thread = threading.Thread(target=_reader_thread, args=(_process,), daemon=True)
-    _log_thread.start()
-
-    return True
 
-def stop_server():
-    global _process
-    if _process is None or _process.poll() is not None:
-        return False
+def _without_autorestart(fn):
+    """Opération destructive (monde, jar) : le watchdog ne relance pas le serveur pendant
 
-    try:
-        _process.stdin.write("stop\n")
-        _process.stdin.flush()
-        _process.wait(timeout=60)
-    except:
-        pass
-    finally:
-        _process = None  # ← CRUCIAL : nettoyer la référence
-    
-    return True
+    Tenu avant le test is_running() de l'opération ; une relance déjà
+    planifiée après un crash est abandonnée.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _default.watchdog.maintenance():
+            return fn(*args, **kwargs)
+    return wrapper
 
-def send_command(command: str):
-    global _process
-    if _process is None or _process.poll() is not None:
-        return False
-    _process.stdin.write(command.strip() + "\n")
-    _process.stdin.flush()
-    return True
+def get_server_state():
+    return _default.state
 
-def is_running():
-    global _process
-    return _process is not None and _process.poll() is None
+
+# Versions async : routes FastAPI (ne bloquent pas la boucle pendant un arrêt)
+async def start_server_async():
+    return await _default.start_async()
+
+async def stop_server_async():
+    return await _default.stop_async()
+
+async def wait_for_server_state(*states, timeout=None):
+    return await _default.wait_for_state(*states, timeout=timeout)
 
 def get_logs():
-    return list(_log_buffer)
+    return _default.logs()
+
+
+def get_logs_since(since, limit=None):
+    """Lignes après le curseur `since` (incrémental pour /logs?since=)"""
+    return _default.logs_since(since, limit)
+
+
+def get_crashes(limit=None):
+    """Historique des crashs (fin des logs incluse) et état du watchdog"""
+    return _default.crashes(limit)
+
+
+def reset_watchdog():
+    """Referme le disjoncteur après une boucle de crashs"""
+    _default.watchdog.reset()
+    return {"success": True, "watchdog": _default.watchdog.status()}
+
+
+def get_instance(instance_id):
+    """Instance par identifiant ("default" = serveur principal), None si inconnue"""
+    return _instances.get(instance_id)
+
+
+def list_instances():
+    return [instance.to_dict() for instance in _instances.list()]
+
+
+def create_instance(instance_id, port, launch=None):
+    return _instances.create(instance_id, port, launch)
+
+
+def delete_instance(instance_id):
+    return _instances.delete(instance_id)
+
+
+def set_instance_launch_profile(instance_id, profile):
+    return _instances.set_launch(instance_id, profile)
+
+
+def set_instance_rcon(instance_id, enabled):
+    instance = _instances.get(instance_id)
+    if instance is None:
+        return {"success": False, "error": "Instance introuvable"}
+    return instance.set_rcon(enabled)
+
+
+def sample_all_tick_metrics():
+    """Tâche planifiée : TPS / joueurs de toutes les instances"""
+    _instances.sample_tick_metrics()
+
+
+def refresh_all_player_rosters():
+    """Tâche planifiée : réconciliation `list` de toutes les instances"""
+    _instances.refresh_player_rosters()
+
+def submit_job(kind, fn, *args, unique=False, disk=True):
+    """Lance fn en tâche de fond, retourne l'identifiant du job
+
+    disk=False pour les tâches surtout réseau (imports Mojang, téléchargements) :
+    elles ne font pas la queue derrière un backup ou une archive.
+    """
+    return _jobs.submit(kind, fn, *args, unique=unique, disk=disk).id
+
+def get_job(job_id):
+    job = _jobs.get(job_id)
+    return job.to_dict() if job else None
+
+def list_jobs():
+    return _jobs.list()
 
-import shutil
-import time
-from datetime import datetime
 
-def backup_world():
-    """Crée un backup zip du monde actuel dans son dossier dédié"""
+BACKUPS_DIR = Path.home() / "minecraft-manager" / "backups" / "worlds"
+BACKUP_KEEP = 48  # snapshots conservés par monde (24h à raison d'un toutes les 30min)
+
+
+def get_backup_store(world_name):
+    """Store dédupliqué des snapshots d'un monde"""
+    return BackupStore(BACKUPS_DIR / world_name / "store")
+
+
+# Fin de flush : ligne console du serveur (pas un message de chat "<joueur> Saved the game")
+SAVED_PATTERN = re.compile(r"\]: Saved the game\s*$")
+SAVE_FLUSH_TIMEOUT = 120  # secondes, gros mondes inclus
+
+
+def backup_world(progress=None):
+    """Crée un snapshot cohérent du monde actuel (save-off / save-all flush / save-on)"""
     if not is_running():
         return {"success": False, "error": "Serveur arrêté"}
     
@@ -117,181 +227,371 @@ def backup_world():
     if not world_path.exists():
         return {"success": False, "error": "Monde introuvable"}
     
-    # Dossier backup spécifique au monde
+    # Store backup spécifique au monde
     current_world_name = get_current_world()
-    backup_dir = Path.home() / "minecraft-manager" / "backups" / "worlds" / current_world_name
-    backup_dir.mkdir(parents=True, exist_ok=True)
+    store = get_backup_store(current_world_name)
+    
+    # Secondes + suffixe si besoin : un backup manuel et un planifié dans la même minute
+    # ne doivent pas s'écraser (le manifest est remplacé par os.replace)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%Hh%M-%S")
+    backup_name = store.unused_name(f"backup_{timestamp}")
+    
+    send_command("say §e[BACKUP] Sauvegarde en cours...")
     
-    timestamp = datetime.now().strftime("%Y-%m-%d_%Hh%M")
-    backup_name = f"backup_{timestamp}"
-    backup_path = backup_dir / backup_name
+    # Gel des écritures : plus de sauvegarde auto, puis flush complet sur disque
+    freeze_start = time.monotonic()
+    backup_started = time.time()
+    cursor = _log_buffer.last_seq
+    send_command("save-off")
+    send_command("save-all flush")
     
     try:
-        send_command("say §e[BACKUP] Sauvegarde en cours...")
-        send_command("save-all")
-        time.sleep(2)
+        if _log_buffer.wait_for(SAVED_PATTERN, cursor, SAVE_FLUSH_TIMEOUT) is None:
+            send_command("say §c[BACKUP] Échec (flush trop long)")
+            _BACKUPS.labels("failed").inc()
+            return {"success": False, "error": f"Flush non confirmé après {SAVE_FLUSH_TIMEOUT}s"}
+        flush_seconds = time.monotonic() - freeze_start
         
-        shutil.make_archive(str(backup_path), 'zip', world_path)
-        
-        send_command("say §a[BACKUP] Terminé!")
-        return {"success": True, "file": f"{backup_name}.zip", "world": current_world_name}
+        manifest = store.create_snapshot(world_path, backup_name, progress)
     except Exception as e:
+        _BACKUPS.labels("failed").inc()
         return {"success": False, "error": str(e)}
+    finally:
+        send_command("save-on")
+        freeze_seconds = time.monotonic() - freeze_start
+    
+    stats = dict(manifest["stats"], flush_seconds=round(flush_seconds, 3),
+                 freeze_seconds=round(freeze_seconds, 3))
+    print(f"[BACKUP] Snapshot {backup_name}: {stats['files']} fichiers, "
+          f"{stats['new_blocks']} blocs nouveaux ({round(stats['new_bytes'] / 1024 / 1024, 2)} MB), "
+          f"{stats['reused_blocks']} réutilisés - flush {stats['flush_seconds']}s, "
+          f"écritures gelées {stats['freeze_seconds']}s")
+    
+    _BACKUPS.labels("success").inc()
+    _BACKUP_DURATION.observe(time.monotonic() - freeze_start)
+    _BACKUP_FREEZE.observe(freeze_seconds)
+    _BACKUP_BYTES.labels("logical").set(stats["logical_bytes"])
+    _BACKUP_BYTES.labels("new").set(stats["new_bytes"])
+    _tick_metrics.annotate("backup", {"name": backup_name, "freeze_seconds": stats["freeze_seconds"],
+                                      "new_bytes": stats["new_bytes"]}, t=backup_started)
+    
+    # Hors fenêtre de gel : le ménage des anciens snapshots peut prendre son temps.
+    # Le snapshot est déjà écrit : un échec du ménage ne fait pas échouer le backup
+    try:
+        store.prune(BACKUP_KEEP)
+    except Exception as e:
+        print(f"[BACKUP] Nettoyage des anciens snapshots impossible: {e}")
+    
+    send_command("say §a[BACKUP] Terminé!")
+    return {"success": True, "file": f"{backup_name}.snapshot", "world": current_world_name, "stats": stats}
 
 
 
-def stop_server_graceful():
-    """Arrêt progressif avec countdown 5min"""
-    global _process
-    if _process is None or _process.poll() is not None:
-        return False
-    
-    # Annonces countdown
-    send_command("say §c[SERVEUR] Arrêt dans 5 minutes!")
-    time.sleep(60)  # 1min
-    
-    send_command("say §c[SERVEUR] Arrêt dans 4 minutes!")
-    time.sleep(60)
+ARCHIVE_CODEC = "deflate-fast"  # store | deflate-fast | deflate | zstd (si disponible)
+
+
+def _unused_archive_base(directory, name):
+    """directory/name, suffixé (_2, _3...) si une archive (tous formats) porte déjà ce nom
+
+    L'archive finale est posée par os.replace : une homonyme serait écrasée sans erreur.
+    """
+    candidate, n = name, 1
+    while any((directory / f"{candidate}{suffix}").exists() for suffix in archive.ARCHIVE_SUFFIXES):
+        n += 1
+        candidate = f"{name}_{n}"
+    return directory / candidate
+
+
+def export_world_archive(codec=None, level=None, progress=None):
+    """Archive complète (tar compressé en parallèle) du monde actuel, restaurable comme un backup"""
+    world_path = SERVER_DIR / "world"
+    if not world_path.exists():
+        return {"success": False, "error": "Monde introuvable"}
     
-    send_command("say §c[SERVEUR] Arrêt dans 3 minutes!")
-    time.sleep(60)
+    current_world_name = get_current_world()
+    backup_dir = BACKUPS_DIR / current_world_name
+    backup_dir.mkdir(parents=True, exist_ok=True)
     
-    send_command("say §c[SERVEUR] Arrêt dans 2 minutes!")
-    time.sleep(60)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%Hh%M-%S")
+    dest_base = _unused_archive_base(backup_dir, f"archive_{timestamp}")
     
-    send_command("say §c[SERVEUR] Arrêt dans 1 minute!")
-    time.sleep(30)
+    # Serveur lancé : figer les écritures le temps de l'archivage
+    running = is_running()
+    if running:
+        cursor = _log_buffer.last_seq
+        send_command("save-off")
+        send_command("save-all flush")
+        if _log_buffer.wait_for(SAVED_PATTERN, cursor, SAVE_FLUSH_TIMEOUT) is None:
+            send_command("save-on")
+            return {"success": False, "error": f"Flush non confirmé après {SAVE_FLUSH_TIMEOUT}s"}
     
-    send_command("say §c[SERVEUR] Arrêt dans 30 secondes!")
-    time.sleep(20)
+    try:
+        result = archive.write_archive(
+            world_path, dest_base,
+            codec=codec or ARCHIVE_CODEC, level=level, progress=progress
+        )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    finally:
+        if running:
+            send_command("save-on")
     
-    send_command("say §c[SERVEUR] Arrêt dans 10 secondes!")
-    time.sleep(5)
+    print(f"[BACKUP] Archive {result['file']}: {result['size_mb']} MB en {result['seconds']}s "
+          f"({result['throughput_mb_s']} MB/s, {result['codec']})")
+    return dict(result, success=True, world=current_world_name)
+
+
+
+GRACEFUL_STOP_SECONDS = 300
+RESTART_SECONDS = 10
 
-    send_command("say §c[SERVEUR] Arrêt dans 5 secondes!")
-    time.sleep(1)
-    
-    send_command("say §c[SERVEUR] Arrêt dans 4 secondes!")
-    time.sleep(1)
 
-    send_command("say §c[SERVEUR] Arrêt dans 3 secondes!")
-    time.sleep(1)
+def stop_server_graceful(seconds=GRACEFUL_STOP_SECONDS):
+    """Arrêt progressif : annonces en jeu puis arrêt propre (annulable, avancé si le serveur se vide)"""
+    if not is_running():
+        return {"success": False, "error": "Serveur déjà arrêté"}
+    countdown = start_countdown("stop", seconds, stop_server_async, "say §c[SERVEUR] Arrêt dans {remaining}!")
+    return {"success": True, "countdown": countdown.status()}
+
+# ----- Cache d'état : fichiers de config parsés une fois, relus seulement s'ils changent -----
+
+WORLDS_DIR = Path.home() / "minecraft-manager" / "worlds"
+CURRENT_WORLD_MARKER = Path.home() / "minecraft-manager" / ".current_world"
+DEFAULT_WORLD_CONFIG = {"max_players": 20, "whitelist_enabled": False, "whitelist_players": []}
+
+
+def _parse_properties(text):
+    props = {}
+    for line in text.splitlines():
+        if '=' in line and not line.startswith('#'):
+            key, val = line.split('=', 1)
+            props[key.strip()] = val.strip()
+    return props
 
-    send_command("say §c[SERVEUR] Arrêt dans 2 secondes!")
-    time.sleep(1)
 
-    send_command("say §c[SERVEUR] Arrêt dans 1 secondes!")
-    time.sleep(1)
+def _parse_marker(text):
+    return text.strip() or "world"
 
-    send_command("say §c[SERVEUR] Arrêt imminent!")
-    time.sleep(1)
 
-    # Arrêt propre
-    esult = stop_server()
-    _process = None  # ← Nettoyer ici aussi
-    return stop_server()
+def _from_file(parse):
+    return lambda path: parse(path.read_text())
+
+
+def _scan_worlds(path):
+    # Dossiers cachés : anciennes versions mises de côté pendant un changement de monde
+    return [{"name": f.name} for f in sorted(path.iterdir()) if f.is_dir() and not f.name.startswith(".")]
+
+
+_properties_cache = FileCache(_from_file(_parse_properties), default={})
+_whitelist_cache = FileCache(_from_file(json.loads), default=[])
+_world_config_cache = FileCache(_from_file(json.loads), default=DEFAULT_WORLD_CONFIG)
+_current_world_cache = FileCache(_from_file(_parse_marker), default="world")
+_worlds_cache = FileCache(_scan_worlds, default=[])
+
+
+def _state_cache_for(path):
+    """Cache (et parseur) d'un fichier d'état, (None, None) s'il n'est pas suivi"""
+    if path == CURRENT_WORLD_MARKER:
+        return _current_world_cache, _parse_marker
+    return {
+        "server.properties": (_properties_cache, _parse_properties),
+        "whitelist.json": (_whitelist_cache, json.loads),
+        "config.json": (_world_config_cache, json.loads),
+    }.get(path.name, (None, None))
+
+
+def _on_state_flushed(path):
+    # Sur disque : le cache revient à la validation par stat
+    cache, _ = _state_cache_for(path)
+    if cache is not None:
+        cache.invalidate(path)
+
+
+# Écritures atomiques ; dans un `with _state_writes.batch():` elles sont fusionnées
+# (une seule écriture par fichier à la fin du lot)
+_state_writes = WriteBehind(on_flush=_on_state_flushed)
+
+
+def _write_state_file(path, text):
+    """Écrit un fichier d'état ; les lecteurs voient la nouvelle valeur même si l'écriture est différée"""
+    path = Path(path)
+    cache, parse = _state_cache_for(path)
+    if cache is not None:
+        cache.prime(path, parse(text))
+    _state_writes.write(path, text)
+
 
 def list_worlds():
-    """Liste les mondes disponibles"""
-    try:
-        worlds_dir = Path.home() / "minecraft-manager" / "worlds"
-        worlds_dir.mkdir(parents=True, exist_ok=True)
-        
-        worlds = []
-        for world_folder in worlds_dir.iterdir():
-            if world_folder.is_dir():
-                worlds.append({"name": world_folder.name})
-        return worlds
-    except Exception as e:
-        print(f"[ERROR list_worlds] {e}")
-        return []
+    """Liste les mondes disponibles (snapshot figé, relu si le dossier change)"""
+    if not WORLDS_DIR.exists():
+        WORLDS_DIR.mkdir(parents=True, exist_ok=True)
+    return _worlds_cache.get(WORLDS_DIR)
 
 
 def get_current_world():
     """Retourne le nom du monde actif"""
+    return _current_world_cache.get(CURRENT_WORLD_MARKER)
+
+
+def _copytree_with_progress(src, dst, progress=None):
+    """copytree qui publie octets/fichiers copiés dans la progression d'un job"""
+    if progress is None:
+        return shutil.copytree(src, dst)
+    
+    total_bytes, total_files = 0, 0
+    for f in Path(src).rglob("*"):
+        if f.is_file():
+            total_bytes += f.stat().st_size
+            total_files += 1
+    progress.set_total(bytes=total_bytes, files=total_files)
+    
+    def copy_and_report(s, d):
+        shutil.copy2(s, d)
+        progress.advance(bytes=os.path.getsize(d), files=1)
+    
+    return shutil.copytree(src, dst, copy_function=copy_and_report)
+
+
+def _capture_world_config(world_name):
+    """Config d'un monde avec l'état courant du serveur (garde les autres clés : profil de lancement...)"""
+    props = get_server_properties()
+    return {
+        **get_world_config(world_name),
+        "max_players": int(props.get("max-players", "20")),
+        "whitelist_enabled": props.get("white-list", "false") == "true",
+        "whitelist_players": get_whitelist()
+    }
+
+
+def _same_filesystem(a, b):
     try:
-        marker = Path.home() / "minecraft-manager" / ".current_world"
-        if marker.exists():
-            return marker.read_text().strip()
-        return "world"
-    except Exception as e:
-        print(f"[ERROR get_current_world] {e}")
-        return "world"
+        return os.stat(a).st_dev == os.stat(b).st_dev
+    except OSError:
+        return False
+
+
+def _move(src, dst, undo):
+    """Renommage (ou déplacement) journalisé pour pouvoir être annulé"""
+    shutil.move(str(src), str(dst))
+    undo.append(lambda: shutil.move(str(dst), str(src)))
+
+
+def _archive_current_world(world_name, config, undo):
+    """server/current/world -> worlds/{nom}/ par renommage, config.json réécrit
+
+    L'ancien worlds/{nom} (simple config.json, ou copie périmée de l'ancien
+    mode copie) est mis de côté et retourné : à supprimer une fois l'opération
+    validée, à remettre en place sinon.
+    """
+    archive_location = WORLDS_DIR / world_name
+    stale = None
+    if archive_location.exists():
+        stale = WORLDS_DIR / f".{world_name}.old-{int(time.time())}"
+        _move(archive_location, stale, undo)
+    _move(SERVER_DIR / "world", archive_location, undo)
+    _worlds_cache.invalidate()
+    save_world_config(world_name, config)
+    return stale
+
 
+def _activate_world(world_name, undo, progress=None):
+    """worlds/{nom}/ -> server/current/world ; renvoie le mode utilisé
 
-def switch_world(world_name):
-    """Change de monde (serveur doit être arrêté)"""
+    Même système de fichiers : un rename, en temps constant quelle que soit la
+    taille du monde. worlds/{nom}/ ne garde alors que config.json tant que le
+    monde est actif. Sinon : copie comme avant.
+    """
+    source_world = WORLDS_DIR / world_name
+    current_world = SERVER_DIR / "world"
+    
+    if not _same_filesystem(source_world, SERVER_DIR):
+        _copytree_with_progress(str(source_world), str(current_world), progress)
+        undo.append(lambda: shutil.rmtree(current_world))
+        return "copy"
+    
+    _move(source_world, current_world, undo)
+    source_world.mkdir()
+    undo.append(source_world.rmdir)
+    if (current_world / "config.json").exists():
+        _move(current_world / "config.json", source_world / "config.json", undo)
+    _world_config_cache.invalidate(source_world / "config.json")
+    _worlds_cache.invalidate()
+    if progress:
+        progress.set_done()
+    return "rename"
+
+
+def _mark_current_world(world_name, undo):
+    """Marque le monde actif, journalisé (l'annulation remet l'ancien marqueur)"""
+    previous = get_current_world()
+    _write_state_file(CURRENT_WORLD_MARKER, world_name)
+    undo.append(lambda: _write_state_file(CURRENT_WORLD_MARKER, previous))
+
+
+def _rollback(undo):
+    for action in reversed(undo):
+        try:
+            action()
+        except Exception as e:
+            print(f"[SWITCH] Rollback incomplet: {e}")
+    _worlds_cache.invalidate()
+    _world_config_cache.invalidate()
+
+
+@_without_autorestart
+def switch_world(world_name, progress=None):
+    """Change de monde (serveur doit être arrêté)
+
+    Les dossiers sont échangés par renommage ; si l'application de la config
+    du nouveau monde échoue, tous les renommages sont annulés.
+    """
     if is_running():
         return {"success": False, "error": "Serveur en cours, arrêtez-le d'abord"}
     
-    worlds_dir = Path.home() / "minecraft-manager" / "worlds"
-    source_world = worlds_dir / world_name
+    if not world_name or world_name.startswith(".") or "/" in world_name or "\\" in world_name:
+        return {"success": False, "error": "Nom invalide"}
     
+    source_world = WORLDS_DIR / world_name
     if not source_world.exists():
         return {"success": False, "error": f"Monde '{world_name}' introuvable"}
     
     current_world = SERVER_DIR / "world"
     old_name = get_current_world()
+    if old_name == world_name and current_world.exists():
+        return {"success": False, "error": f"'{world_name}' est déjà le monde actif"}
     
-    # Sauvegarder config monde actuel AVANT switch
-    if current_world.exists() and old_name and old_name != world_name:
-        print(f"[SWITCH] Sauvegarde config de '{old_name}'")
-        
-        # Capturer config actuelle depuis server.properties
-        props = get_server_properties()
-        current_config = {
-            "max_players": int(props.get("max-players", "20")),
-            "whitelist_enabled": props.get("white-list", "false") == "true",
-            "whitelist_players": get_whitelist()
-        }
-        
-        print(f"[SWITCH] Config capturée: {current_config}")
-        
-        # IMPORTANT : Sauvegarder dans worlds/{old_name}/config.json AVANT archivage
-        save_world_config(old_name, current_config)
-        print(f"[SWITCH] Config sauvegardée dans worlds/{old_name}/config.json")
-        
-        # Lire config.json existant pour le préserver
-        backup_location = worlds_dir / old_name
-        existing_config_file = backup_location / "config.json"
-        config_backup = None
-        
-        if existing_config_file.exists():
-            import json
-            config_backup = json.loads(existing_config_file.read_text())
-            print(f"[SWITCH] Config existante trouvée: {config_backup}")
+    undo = []
+    stale = None
+    try:
+        # Archiver le monde actuel avec sa config (capturée depuis server.properties)
+        if current_world.exists() and old_name:
+            current_config = _capture_world_config(old_name)
+            print(f"[SWITCH] Config capturée: {current_config}")
+            stale = _archive_current_world(old_name, current_config, undo)
+            print(f"[SWITCH] Monde archivé dans worlds/{old_name}/")
         
-        # Archiver monde actuel (supprimer ancien dossier)
-        if backup_location.exists():
-            shutil.rmtree(backup_location)
-            print(f"[SWITCH] Ancien dossier {old_name} supprimé")
+        mode = _activate_world(world_name, undo, progress)
+        print(f"[SWITCH] Monde '{world_name}' activé ({mode})")
         
-        # Déplacer monde actuel vers worlds/{old_name}/
-        shutil.move(str(current_world), str(backup_location))
-        print(f"[SWITCH] Monde archivé dans worlds/{old_name}/")
+        _mark_current_world(world_name, undo)
         
-        # Réécrire config.json avec la config capturée (écrase whitelist.json du monde)
-        save_world_config(old_name, current_config)
-        print(f"[SWITCH] config.json réécrit après archivage")
-    
-    # Copier nouveau monde dans server/current/world
-    shutil.copytree(str(source_world), str(current_world))
-    print(f"[SWITCH] Monde '{world_name}' copié vers server/current/world")
-    
-    # Marquer monde actif
-    marker = Path.home() / "minecraft-manager" / ".current_world"
-    marker.write_text(world_name)
-    print(f"[SWITCH] Monde actif: {world_name}")
+        result = apply_world_config(world_name)
+        print(f"[SWITCH] Config appliquée: {result}")
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+    except Exception as e:
+        print(f"[SWITCH] Échec, retour à '{old_name}': {e}")
+        _rollback(undo)
+        return {"success": False, "error": f"Changement de monde annulé: {e}"}
     
-    # Appliquer config du nouveau monde
-    print(f"[SWITCH] Application config de '{world_name}'")
-    result = apply_world_config(world_name)
-    print(f"[SWITCH] Config appliquée: {result}")
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
     
-    return {"success": True, "world": world_name, "config_applied": result}
+    return {"success": True, "world": world_name, "mode": mode, "config_applied": result}
 
 
 
+@_without_autorestart
 def create_new_world(world_name):
     """Crée un nouveau monde en archivant l'actuel"""
     if is_running():
@@ -308,54 +608,49 @@ def create_new_world(world_name):
         return {"success": False, "error": f"Le monde '{world_name}' existe déjà"}
     
     current_world = SERVER_DIR / "world"
+    old_name = get_current_world()
     
-    # Sauvegarder config du monde actuel AVANT archivage
-    if current_world.exists():
-        old_name = get_current_world()
+    undo = []
+    stale = None
+    try:
+        # Archiver le monde actuel avec sa config (renommage)
+        if current_world.exists():
+            stale = _archive_current_world(old_name, _capture_world_config(old_name), undo)
         
-        # Capturer config actuelle
-        current_config = {
-            "max_players": int(get_server_properties().get("max-players", "20")),
-            "whitelist_enabled": get_server_properties().get("white-list", "false") == "true",
-            "whitelist_players": get_whitelist()
+        # Créer config PAR DÉFAUT pour nouveau monde
+        new_config = {
+            "max_players": 20,
+            "whitelist_enabled": False,
+            "whitelist_players": []
         }
-        save_world_config(old_name, current_config)
+        save_world_config(world_name, new_config)
+        undo.append(lambda: shutil.rmtree(worlds_dir / world_name))
         
-        # Archiver monde
-        archive_location = worlds_dir / old_name
-        if archive_location.exists():
-            shutil.rmtree(archive_location)
-        shutil.move(str(current_world), str(archive_location))
-    
-    # Créer config PAR DÉFAUT pour nouveau monde
-    new_config = {
-        "max_players": 20,
-        "whitelist_enabled": False,
-        "whitelist_players": []
-    }
-    save_world_config(world_name, new_config)
-    
-    # Appliquer config nouveau monde AVANT démarrage
-    update_server_properties({
-        "max-players": "20",
-        "white-list": "false"
-    })
-    
-    import json
-    whitelist_file = SERVER_DIR / "whitelist.json"
-    whitelist_file.write_text("[]")
+        # Appliquer config nouveau monde AVANT démarrage (en dernier : rien à défaire après)
+        with _state_writes.batch():
+            _mark_current_world(world_name, undo)
+            update_server_properties({
+                "max-players": "20",
+                "white-list": "false"
+            })
+            _write_state_file(SERVER_DIR / "whitelist.json", "[]")
+    except Exception as e:
+        print(f"[SWITCH] Échec de la création, retour à '{old_name}': {e}")
+        _rollback(undo)
+        return {"success": False, "error": f"Création du monde annulée: {e}"}
     
-    # Marquer futur monde
-    marker = Path.home() / "minecraft-manager" / ".current_world"
-    marker.write_text(world_name)
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
     
     return {"success": True, "message": f"Monde '{world_name}' sera créé au prochain démarrage (config par défaut appliquée)"}
 
 
 
-def delete_world(world_name):
+@_without_autorestart
+def delete_world(world_name, progress=None):
     """Supprime un monde et tous ses backups"""
-    if is_running() and get_current_world() == world_name:
+    # Monde actif : ses données sont dans server/current/world, worlds/{nom} ne garde que sa config
+    if get_current_world() == world_name:
         return {"success": False, "error": "Impossible de supprimer le monde actif"}
     
     worlds_dir = Path.home() / "minecraft-manager" / "worlds"
@@ -366,9 +661,10 @@ def delete_world(world_name):
     
     # Supprimer dossier monde
     shutil.rmtree(world_path)
+    _worlds_cache.invalidate()
     
     # Supprimer backups
-    backup_dir = Path.home() / "minecraft-manager" / "backups" / "worlds" / world_name
+    backup_dir = BACKUPS_DIR / world_name
     if backup_dir.exists():
         shutil.rmtree(backup_dir)
     
@@ -376,57 +672,84 @@ def delete_world(world_name):
 
 
 def list_world_backups(world_name):
-    """Liste les backups d'un monde spécifique"""
-    backup_dir = Path.home() / "minecraft-manager" / "backups" / "worlds" / world_name
+    """Liste les backups d'un monde spécifique (snapshots + anciens zip)"""
+    backup_dir = BACKUPS_DIR / world_name
     if not backup_dir.exists():
         return []
     
-    backups = sorted(backup_dir.glob("*.zip"), reverse=True)
-    return [{
-        "name": b.stem,
+    backups = [{
+        "name": m["name"],
+        "file": f"{m['name']}.snapshot",
+        "type": "snapshot",
+        "size": m["stats"]["new_bytes"],  # coût réel du snapshot dans le store
+        "world_size": m["stats"]["logical_bytes"],
+        "date": m["created"]
+    } for m in get_backup_store(world_name).list_snapshots()]
+    
+    backups += [{
+        "name": b.name.split(".")[0],
         "file": b.name,
+        "type": "zip" if b.suffix == ".zip" else "archive",
         "size": b.stat().st_size,
         "date": b.stat().st_mtime
-    } for b in backups]
+    } for b in backup_dir.iterdir() if b.name.endswith((".zip",) + archive.ARCHIVE_SUFFIXES)]
+    
+    return sorted(backups, key=lambda b: b["date"], reverse=True)
 
 
-def restore_backup(world_name, backup_file):
+@_without_autorestart
+def restore_backup(world_name, backup_file, progress=None):
     """Restaure un backup (serveur doit être arrêté)"""
     if is_running():
         return {"success": False, "error": "Arrêtez le serveur d'abord"}
     
-    backup_path = Path.home() / "minecraft-manager" / "backups" / "worlds" / world_name / backup_file
+    is_snapshot = backup_file.endswith(".snapshot")
+    store = get_backup_store(world_name)
+    if is_snapshot:
+        snapshot_name = backup_file[:-len(".snapshot")]
+        backup_path = store.snapshots_dir / f"{snapshot_name}.json"
+    else:
+        backup_path = BACKUPS_DIR / world_name / backup_file
     if not backup_path.exists():
         return {"success": False, "error": "Backup introuvable"}
     
     current_world = SERVER_DIR / "world"
+    old_name = get_current_world()
     
-    # Backup sécurité monde actuel
-    if current_world.exists():
-        safety_backup = current_world.parent / f"world_before_restore_{int(time.time())}"
-        shutil.move(str(current_world), str(safety_backup))
-    
-    # Extraire backup
-    shutil.unpack_archive(str(backup_path), str(current_world))
+    undo = []
+    stale = None
+    try:
+        # Autre monde actif : archivé dans worlds/ comme lors d'un changement de monde
+        if current_world.exists() and old_name != world_name:
+            stale = _archive_current_world(old_name, _capture_world_config(old_name), undo)
+        
+        # Backup sécurité monde actuel
+        if current_world.exists():
+            safety_backup = current_world.parent / f"world_before_restore_{int(time.time())}"
+            _move(current_world, safety_backup, undo)
+        
+        # Extraire backup (une extraction interrompue est retirée avant de remettre l'ancien monde)
+        undo.append(lambda: shutil.rmtree(current_world, ignore_errors=True))
+        if is_snapshot:
+            store.restore_snapshot(snapshot_name, current_world, progress)
+        else:
+            archive.extract_archive(backup_path, current_world)
+        
+        # Marquer monde actif
+        _mark_current_world(world_name, undo)
+    except Exception as e:
+        print(f"[RESTORE] Échec, retour à '{old_name}': {e}")
+        _rollback(undo)
+        return {"success": False, "error": f"Restauration annulée: {e}"}
     
-    # Marquer monde actif
-    marker = Path.home() / "minecraft-manager" / ".current_world"
-    marker.write_text(world_name)
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
     
     return {"success": True, "message": f"Backup '{backup_file}' restauré"}
 
 def get_server_properties():
-    """Lit server.properties"""
-    props_file = SERVER_DIR / "server.properties"
-    if not props_file.exists():
-        return {}
-    
-    props = {}
-    for line in props_file.read_text().splitlines():
-        if '=' in line and not line.startswith('#'):
-            key, val = line.split('=', 1)
-            props[key.strip()] = val.strip()
-    return props
+    """Lit server.properties (snapshot figé, relu seulement s'il change)"""
+    return _properties_cache.get(SERVER_DIR / "server.properties")
 
 
 def update_server_properties(updates):
@@ -438,7 +761,8 @@ def update_server_properties(updates):
     if not props_file.exists():
         return {"success": False, "error": "server.properties introuvable"}
     
-    lines = props_file.read_text().splitlines()
+    text = _state_writes.pending(props_file)  # version pas encore écrite dans un lot
+    lines = (props_file.read_text() if text is None else text).splitlines()
     new_lines = []
     
     for line in lines:
@@ -456,149 +780,179 @@ def update_server_properties(updates):
     for key, val in updates.items():
         new_lines.append(f"{key}={val}")
     
-    props_file.write_text('\n'.join(new_lines))
+    _write_state_file(props_file, '\n'.join(new_lines))
     return {"success": True}
 
 
 def get_whitelist():
-    """Lit whitelist.json"""
-    whitelist_file = SERVER_DIR / "whitelist.json"
-    if not whitelist_file.exists():
-        return []
-    
-    import json
-    try:
-        return json.loads(whitelist_file.read_text())
-    except:
-        return []
+    """Lit whitelist.json (snapshot figé : copier avec list(...) avant modification)"""
+    return _whitelist_cache.get(SERVER_DIR / "whitelist.json")
 
 
-def add_to_whitelist(username):
-    """Ajoute joueur à whitelist avec UUID Mojang"""
-    import json
-    import requests
-    
-    whitelist_file = SERVER_DIR / "whitelist.json"
-    
-    if not whitelist_file.exists():
-        whitelist_file.write_text("[]")
-    
-    whitelist = get_whitelist()
-    
-    # Vérifier si déjà présent
-    if any(p['name'].lower() == username.lower() for p in whitelist):
-        return {"success": False, "error": "Joueur déjà dans whitelist"}
-    
-    # Récupérer UUID Mojang
-    try:
-        response = requests.get(f"https://api.mojang.com/users/profiles/minecraft/{username}", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            real_username = data['name']
-            uuid_raw = data['id']
-            # Formater UUID avec tirets
-            uuid_formatted = f"{uuid_raw[0:8]}-{uuid_raw[8:12]}-{uuid_raw[12:16]}-{uuid_raw[16:20]}-{uuid_raw[20:32]}"
-        else:
-            return {"success": False, "error": f"Joueur '{username}' introuvable (compte Mojang invalide)"}
-    except Exception as e:
-        return {"success": False, "error": f"Erreur API Mojang: {str(e)}"}
-    
-    # Ajouter avec vrai UUID
-    whitelist.append({
-        "uuid": uuid_formatted,
-        "name": real_username
-    })
-    
-    whitelist_file.write_text(json.dumps(whitelist, indent=2))
-    
-    # Activer whitelist
-    props = get_server_properties()
-    if props.get("white-list") != "true":
-        if not is_running():
-            update_server_properties({"white-list": "true"})
-    
-    if is_running():
-        send_command("whitelist reload")
+# Pseudo -> UUID Mojang, mis en cache sur disque et résolu par lots de 10
+_uuid_resolver = UUIDResolver(CACHE_DIR / "mojang_uuids.json")
+
 
+def _save_whitelist_to_world_config():
     # Sauvegarder dans config monde actuel
     current_world_name = get_current_world()
-    world_config = get_world_config(current_world_name)
+    world_config = dict(get_world_config(current_world_name))
     world_config["whitelist_players"] = get_whitelist()
     save_world_config(current_world_name, world_config)
 
-    return {"success": True, "added": real_username}
-
 
+def _reload_whitelist(kick=()):
+    """`whitelist reload` (+ kicks) en un seul lot : un aller-retour RCON, stdin sinon (appel bloquant)"""
+    if not is_running():
+        return None
+    commands = ["whitelist reload"] + [f"kick {name} Retiré de la whitelist" for name in kick]
+    result = _default.execute_batch(commands)
+    if not result["success"]:
+        print(f"[WHITELIST] Rechargement en échec: {result['error']}")
+    return result
+
+
+def add_to_whitelist(usernames, progress=None):
+    """Ajoute un ou plusieurs joueurs à la whitelist avec UUID Mojang
+    
+    Une liste est traitée en un seul lot : whitelist.json et config.json écrits
+    une seule fois, un seul `whitelist reload`.
+    """
+    bulk = not isinstance(usernames, str)
+    names = list(usernames) if bulk else [usernames]
+    known = {p['name'].lower() for p in get_whitelist()}
+    if progress:
+        progress.set_total(files=len(names))
+    
+    players, errors = [], {}
+    candidates = []
+    for username in names:
+        if username.lower() in known:
+            errors[username] = "Joueur déjà dans whitelist"
+            if progress:
+                progress.advance(files=1)
+        else:
+            candidates.append(username)
+    
+    # Récupérer les UUID Mojang (cache, puis lots de 10 en parallèle)
+    profiles, failures = _uuid_resolver.resolve(candidates, progress)
+    errors.update(failures)
+    for username in candidates:
+        if username in failures:
+            continue
+        profile = profiles.get(username)
+        if profile is None:
+            errors[username] = f"Joueur '{username}' introuvable (compte Mojang invalide)"
+        elif profile["name"].lower() in known:
+            errors.setdefault(username, "Joueur déjà dans whitelist")
+        else:
+            players.append({"uuid": profile["uuid"], "name": profile["name"]})
+            known.add(profile["name"].lower())
+    
+    if players:
+        with _state_writes.batch():
+            whitelist = list(get_whitelist()) + players
+            _write_state_file(SERVER_DIR / "whitelist.json", json.dumps(whitelist, indent=2))
+            
+            # Activer whitelist
+            if get_server_properties().get("white-list") != "true" and not is_running():
+                update_server_properties({"white-list": "true"})
+            
+            _save_whitelist_to_world_config()
+        
+        _reload_whitelist()
+    
+    if not bulk:
+        if errors:
+            return {"success": False, "error": errors[usernames]}
+        return {"success": True, "added": players[0]["name"]}
+    
+    return {
+        "success": bool(players) or not errors,
+        "added": [p["name"] for p in players],
+        "errors": errors,
+        "error": None if players or not errors else "Aucun joueur ajouté"
+    }
 
 
 def remove_from_whitelist(username):
-    """Retire joueur de whitelist"""
+    """Retire joueur de whitelist (rechargement et kick en un seul lot ; appel bloquant)"""
     import json
     
     whitelist_file = SERVER_DIR / "whitelist.json"
     whitelist = get_whitelist()
     
     whitelist = [p for p in whitelist if p['name'].lower() != username.lower()]
-    whitelist_file.write_text(json.dumps(whitelist, indent=2))
+    _write_state_file(whitelist_file, json.dumps(whitelist, indent=2))
     
-    if is_running():
-        send_command("whitelist reload")
-        send_command(f"kick {username} Retiré de la whitelist")
+    session = _players.get(username)
+    _reload_whitelist(kick=[session["name"]] if session else [])
     
     return {"success": True}
 
 
+# ----- Joueurs connectés -----
+
+def get_players():
+    """Joueurs connectés (nom, UUID, IP, connexion, durée de session)"""
+    return _default.get_players()
+
+
+def get_player(username):
+    """Session d'un joueur connecté ou None (O(1))"""
+    return _default.get_player(username)
+
+
+def refresh_player_roster(timeout=LIST_TIMEOUT):
+    """Réconcilie la table avec `list` (appel bloquant, hors boucle asyncio)"""
+    return _default.refresh_player_roster(timeout)
+
+
 def kick_player(username):
-    """Kick joueur"""
+    """Kick joueur (s'il est connecté)"""
     if not is_running():
         return {"success": False, "error": "Serveur arrêté"}
     
-    send_command(f"kick {username}")
-    return {"success": True}
+    session = _players.get(username)
+    if session is None:
+        return {"success": False, "error": f"{username} n'est pas connecté"}
+    
+    send_command(f"kick {session['name']}")
+    return {"success": True, "session": session}
 
 
 def ban_player(username):
-    """Ban joueur"""
+    """Ban joueur (connecté ou non : le ban s'applique aussi hors ligne)"""
     if not is_running():
         return {"success": False, "error": "Serveur arrêté"}
     
-    send_command(f"ban {username}")
-    return {"success": True}
+    session = _players.get(username)
+    send_command(f"ban {session['name'] if session else username}")
+    return {"success": True, "was_online": session is not None}
 
 
 def apply_gamerule(rule_name, value):
-    """Applique gamerule"""
-    if not is_running():
-        return {"success": False, "error": "Serveur arrêté"}
-    
-    send_command(f"gamerule {rule_name} {value}")
-    return {"success": True}
+    """Applique gamerule (réponse du serveur si RCON est disponible)"""
+    return execute_command(f"gamerule {rule_name} {value}")
+
+
+def apply_gamerules(rules):
+    """Applique plusieurs gamerules en un seul lot de commandes"""
+    return _default.execute_batch([f"gamerule {rule} {value}" for rule, value in rules.items()])
 def get_world_config(world_name):
-    """Lit config spécifique d'un monde"""
-    import json
-    config_file = Path.home() / "minecraft-manager" / "worlds" / world_name / "config.json"
-    
-    if not config_file.exists():
-        # Config par défaut
-        return {
-            "max_players": 20,
-            "whitelist_enabled": False,
-            "whitelist_players": []
-        }
-    
-    try:
-        return json.loads(config_file.read_text())
-    except:
-        return {"max_players": 20, "whitelist_enabled": False, "whitelist_players": []}
+    """Lit config spécifique d'un monde (snapshot figé : copier avec dict(...) avant modification)"""
+    return _world_config_cache.get(WORLDS_DIR / world_name / "config.json")
 
 
 def save_world_config(world_name, config):
     """Sauvegarde config d'un monde"""
     import json
     worlds_dir = Path.home() / "minecraft-manager" / "worlds" / world_name
-    worlds_dir.mkdir(parents=True, exist_ok=True)
+    if not worlds_dir.exists():
+        worlds_dir.mkdir(parents=True)
+        _worlds_cache.invalidate()
     config_file = worlds_dir / "config.json"
-    config_file.write_text(json.dumps(config, indent=2))
+    _write_state_file(config_file, json.dumps(config, indent=2))
 
 
 def apply_world_config(world_name):
@@ -607,65 +961,209 @@ def apply_world_config(world_name):
         return {"success": False, "error": "Arrêtez le serveur d'abord"}
     
     config = get_world_config(world_name)
+    try:
+        launch = validate_launch_profile(config.get("launch"))
+    except ValueError as e:
+        return {"success": False, "error": f"Profil de lancement invalide: {e}"}
+    
+    with _state_writes.batch():
+        # Appliquer server.properties
+        update_server_properties({
+            "max-players": str(config["max_players"]),
+            "white-list": "true" if config["whitelist_enabled"] else "false"
+        })
+        
+        # Appliquer whitelist.json
+        whitelist_file = SERVER_DIR / "whitelist.json"
+        _write_state_file(whitelist_file, json.dumps(config["whitelist_players"], indent=2))
     
-    # Appliquer server.properties
-    update_server_properties({
-        "max-players": str(config["max_players"]),
-        "white-list": "true" if config["whitelist_enabled"] else "false"
-    })
+    # Le profil JVM est relu au prochain démarrage (Instance._on_start)
+    return {"success": True, "launch": launch}
+
+def get_launch_profile(world_name=None):
+    """Profil JVM d'un monde (monde actif par défaut) + profil du process en cours et capacités de la machine"""
+    world_name = world_name or get_current_world()
+    profile = get_world_config(world_name).get("launch")
+    try:
+        profile, error = validate_launch_profile(profile), None
+    except ValueError as e:
+        # Profil invalide ou corrompu (pas un objet JSON) : affiché tel quel avec l'erreur
+        stored = profile if isinstance(profile, dict) else {}
+        profile, error = {**DEFAULT_LAUNCH_PROFILE, **stored}, str(e)
+    return {
+        "world": world_name,
+        "profile": profile,
+        "error": error,
+        "active": dict(_default.active_launch) if is_running() else None,
+        "gc_presets": list(GC_PRESETS),
+        "host": {"memory_mb": host_memory_mb(), "cpus": host_cpus()},
+    }
+
+
+def set_launch_profile(profile, world_name=None):
+    """Valide et enregistre le profil JVM dans worlds/{monde}/config.json"""
+    world_name = world_name or get_current_world()
+    if not world_name or "/" in world_name or "\\" in world_name:
+        return {"success": False, "error": "Nom invalide"}
+    if world_name != get_current_world() and not (WORLDS_DIR / world_name).is_dir():
+        return {"success": False, "error": f"Monde '{world_name}' introuvable"}
+    try:
+        profile = validate_launch_profile(profile)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
     
-    # Appliquer whitelist.json
-    import json
-    whitelist_file = SERVER_DIR / "whitelist.json"
-    whitelist_file.write_text(json.dumps(config["whitelist_players"], indent=2))
+    config = dict(get_world_config(world_name))
+    config["launch"] = profile
+    save_world_config(world_name, config)
+    print(f"[LAUNCH] Profil de '{world_name}': {' '.join(jvm_args(profile))}")
     
-    return {"success": True}
+    # Pris en compte au prochain démarrage du serveur
+    restart_required = is_running() and world_name == get_current_world() and profile != _default.active_launch
+    return {"success": True, "profile": profile, "restart_required": restart_required}
+
+
+# ----- Comptes à rebours (arrêt / restart annoncés en jeu) -----
+
+_countdowns = CountdownService()
+
+
+def start_countdown(kind, seconds, action, message):
+    """Compte à rebours sur le serveur principal, un seul actif par type
+
+    Arrêt et redémarrage sont exclusifs : un arrêt remplace un redémarrage en
+    attente ; pendant un arrêt, le compte à rebours d'arrêt est renvoyé.
+    Serveur vide : l'action part tout de suite, personne n'est à prévenir.
+    """
+    if not len(_players):
+        seconds = 0
+    return _countdowns.start(seconds, action, send_command, message, kind=kind,
+                             instance=DEFAULT_INSTANCE, finish_when_empty=True, unique=True)
+
+
+def list_countdowns(active_only=False):
+    return _countdowns.list(active_only)
 
-def restart_server():
-    """Redémarre le serveur proprement"""
+
+def cancel_countdown(countdown_id):
+    result = _countdowns.cancel(countdown_id)
+    if result["success"] and is_running():
+        send_command("say §a[SERVEUR] Compte à rebours annulé")
+    return result
+
+
+def postpone_countdown(countdown_id, seconds):
+    return _countdowns.postpone(countdown_id, seconds)
+
+
+def _on_roster_change(event):
+    """Dernier joueur parti : les comptes à rebours en attente s'exécutent aussitôt"""
+    if event["type"] in ("leave", "player_list") and not len(_players):
+        _countdowns.server_emptied(DEFAULT_INSTANCE)
+
+
+_log_events.add_listener(_on_roster_change)
+
+
+# ----- Actions du moteur de schedules (core.schedules) -----
+
+def world_changed_since_last_backup():
+    """Fichiers région modifiés depuis le dernier snapshot du monde actif ?"""
+    return get_backup_store(get_current_world()).has_changes(SERVER_DIR / "world")
+
+
+def run_scheduled_backup(schedule_id, policy, deferred_since=None):
+    """Backup planifié : passe par la file de jobs, sauté si rien n'a changé"""
     if not is_running():
-        return {"success": False, "error": "Serveur déjà arrêté"}
+        return {"status": "skipped", "detail": "serveur arrêté"}
+    if policy["skip_unchanged"] and not world_changed_since_last_backup():
+        return {"status": "skipped", "detail": "aucun fichier région modifié depuis le dernier backup"}
+    job_id = submit_job("backup", backup_world, unique=True)
+    return {"status": "done", "detail": f"job {job_id}"}
+
+
+async def _restart_async():
+    if not is_running():
+        return  # arrêté à la main pendant le compte à rebours : rien à redémarrer
+    await stop_server_async()
+    # Arrêt progressif demandé pendant le redémarrage : le serveur reste arrêté
+    if _countdowns.active(DEFAULT_INSTANCE, "stop"):
+        return
+    await start_server_async()
+
+
+def run_scheduled_restart(schedule_id, policy, deferred_since=None):
+    """Restart planifié : attend un serveur vide (jusqu'à max_delay_minutes), sinon compte à rebours"""
+    if not is_running():
+        return {"status": "skipped", "detail": "serveur arrêté"}
     
-    send_command("say §e[RESTART] Redémarrage en cours...")
-    time.sleep(2)
-    stop_server()
-    time.sleep(3)
-    start_server()
+    online = refresh_player_roster()["count"]
+    if online and policy["prefer_empty"]:
+        waited = time.time() - deferred_since if deferred_since else 0
+        if waited < policy["max_delay_minutes"] * 60:
+            return {"status": "deferred", "detail": f"{online} joueur(s) connecté(s)"}
     
-    return {"success": True}
+    countdown = start_countdown("restart", policy["countdown_seconds"], _restart_async,
+                                "say §c[AUTO-RESTART] Redémarrage dans {remaining}!")
+    if countdown.kind != "restart":
+        return {"status": "skipped", "detail": f"arrêt en attente (compte à rebours #{countdown.id})"}
+    return {"status": "done", "detail": f"compte à rebours #{countdown.id} ({online} joueur(s) connecté(s))"}
+
+
+def restart_server(seconds=RESTART_SECONDS):
+    """Redémarre le serveur proprement après un court compte à rebours"""
+    if not is_running():
+        return {"success": False, "error": "Serveur déjà arrêté"}
+    countdown = start_countdown("restart", seconds, _restart_async, "say §e[RESTART] Redémarrage dans {remaining}...")
+    if countdown.kind != "restart":
+        return {"success": False, "error": f"Arrêt en attente (compte à rebours #{countdown.id}) : "
+                                           f"annulez-le pour redémarrer"}
+    return {"success": True, "countdown": countdown.status()}
 
 # Système demandes whitelist
 _whitelist_requests = []  # Cache mémoire des demandes
 
+
+def _on_whitelist_denied(event):
+    """Connexion refusée (événement de log) -> demande whitelist en attente"""
+    if event["type"] != "whitelist_denied" or "uuid" not in event:
+        return
+    if any(r['name'] == event["player"] for r in _whitelist_requests):
+        return
+    _whitelist_requests.append({
+        "name": event["player"],
+        "uuid": event["uuid"],
+        "timestamp": datetime.fromtimestamp(event["time"]).isoformat()
+    })
+
+
+_log_events.add_listener(_on_whitelist_denied)
+
+
 def check_for_whitelist_requests():
-    """Parse logs pour détecter connexions refusées"""
-    global _whitelist_requests, _log_buffer
-    
-    for line in list(_log_buffer)[-50:]:  # 50 dernières lignes
-        if "You are not white-listed on this server!" in line and "Disconnecting" in line:
-            try:
-                parts = line.split("Disconnecting ")[1].split(" ")
-                username = parts[0]
-                
-                # Chercher UUID dans logs précédents
-                uuid = None
-                for prev_line in list(_log_buffer)[-100:]:
-                    if f"UUID of player {username} is" in prev_line:
-                        uuid = prev_line.split("is ")[-1].strip()
-                        break
-                
-                if uuid and username not in [r['name'] for r in _whitelist_requests]:
-                    _whitelist_requests.append({
-                        "name": username,
-                        "uuid": uuid,
-                        "timestamp": datetime.now().isoformat()
-                    })
-            except:
-                pass
-    
+    """Demandes en attente (alimentées au fil des logs, sans reparcours)"""
     return _whitelist_requests
 
 
+def get_log_events(event_type=None, since=0, limit=100):
+    """Événements typés (join, leave, chat, lag, error...) extraits des logs"""
+    return _default.log_events(event_type, since, limit)
+
+
+def sample_tick_metrics():
+    """Échantillon périodique (scheduler) : nombre de joueurs, TPS via TPS_COMMAND"""
+    _default.sample_tick_metrics()
+
+
+def get_tick_metrics(resolution="raw", since=0):
+    """Séries lag / TPS / joueurs (brut, minute ou heure) + annotations"""
+    return _default.get_tick_metrics(resolution, since)
+
+
+def get_process_metrics(resolution="raw", since=0):
+    """CPU / RSS / threads / I/O du process serveur (séries + dernier échantillon)"""
+    return _default.get_process_metrics(resolution, since)
+
+
 def approve_whitelist_request(username):
     """Approuve demande et ajoute à whitelist"""
     global _whitelist_requests
@@ -675,29 +1173,18 @@ def approve_whitelist_request(username):
     if not request:
         return {"success": False, "error": "Demande introuvable"}
     
-    whitelist_file = SERVER_DIR / "whitelist.json"
-    if not whitelist_file.exists():
-        whitelist_file.write_text("[]")
-    
-    whitelist = get_whitelist()
-    
-    whitelist.append({
-        "uuid": request['uuid'],
-        "name": request['name']
-    })
-    
-    whitelist_file.write_text(json.dumps(whitelist, indent=2))
+    with _state_writes.batch():
+        whitelist = list(get_whitelist())
+        whitelist.append({
+            "uuid": request['uuid'],
+            "name": request['name']
+        })
+        _write_state_file(SERVER_DIR / "whitelist.json", json.dumps(whitelist, indent=2))
+        _save_whitelist_to_world_config()
     
     _whitelist_requests = [r for r in _whitelist_requests if r['name'] != username]
     
-    if is_running():
-        send_command("whitelist reload")
-    
-    # Sauvegarder dans config monde
-    current_world_name = get_current_world()
-    world_config = get_world_config(current_world_name)
-    world_config["whitelist_players"] = get_whitelist()
-    save_world_config(current_world_name, world_config)
+    _reload_whitelist()
     
     return {"success": True, "message": f"{username} approuvé"}
 
@@ -711,36 +1198,67 @@ def reject_whitelist_request(username):
 # INSTALLATION / MISE À JOUR SERVEUR MINECRAFT
 # ============================================================
 
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
+MANIFEST_TTL = 600  # secondes avant revalidation (requête conditionnelle)
+
+_version_manifest = ManifestCache(VERSION_MANIFEST_URL, CACHE_DIR / "version_manifest.json",
+                                  ttl=MANIFEST_TTL)
+_version_details = {}  # id version -> ManifestCache (manifest d'une version : immuable)
+
+
+def _version_details_cache(version):
+    cache = _version_details.get(version["id"])
+    if cache is None:
+        cache = ManifestCache(version["url"], CACHE_DIR / "versions" / f"{version['id']}.json",
+                              ttl=None)
+        _version_details[version["id"]] = cache
+    return cache
+
+
+def _latest_release(data):
+    """Entrée du manifest correspondant à la dernière version stable"""
+    latest_release = data["latest"]["release"]
+    for version in data["versions"]:
+        if version["id"] == latest_release and version["type"] == "release":
+            return version
+    return None
+
+
+def _server_download_info(version, version_data):
+    server = version_data["downloads"]["server"]
+    return {
+        "version": version["id"],
+        "url": server["url"],
+        "sha1": server["sha1"],
+        "size": server["size"],
+        "size_mb": round(server["size"] / 1024 / 1024, 2)
+    }
+
+
 def get_latest_minecraft_version():
-    """Récupère la dernière version stable de Minecraft depuis l'API officielle"""
-    import requests
+    """Récupère la dernière version stable de Minecraft (manifest Mojang mis en cache)"""
     try:
-        # API Mojang officielle
-        response = requests.get("https://launchermeta.mojang.com/mc/game/version_manifest.json", timeout=10)
-        data = response.json()
-        
-        # Dernière version stable (release)
-        latest_release = data["latest"]["release"]
-        
-        # Trouver l'URL du server.jar
-        for version in data["versions"]:
-            if version["id"] == latest_release and version["type"] == "release":
-                # Récupérer manifest de cette version
-                version_response = requests.get(version["url"], timeout=10)
-                version_data = version_response.json()
-                
-                # URL du server.jar
-                server_url = version_data["downloads"]["server"]["url"]
-                server_size = version_data["downloads"]["server"]["size"]
-                
-                return {
-                    "version": latest_release,
-                    "url": server_url,
-                    "size_mb": round(server_size / 1024 / 1024, 2)
-                }
-        
+        data = _version_manifest.get()
+        version = _latest_release(data) if data else None
+        if version is None:
+            return None
+        version_data = _version_details_cache(version).get()
+        return _server_download_info(version, version_data) if version_data else None
+    except (KeyError, TypeError) as e:
+        print(f"[ERROR] Récupération version: {e}")
         return None
-    except Exception as e:
+
+
+async def get_latest_minecraft_version_async():
+    """Variante pour les routes : répond depuis le cache, revalidation en arrière-plan"""
+    try:
+        data = await _version_manifest.get_async()
+        version = _latest_release(data) if data else None
+        if version is None:
+            return None
+        version_data = await _version_details_cache(version).get_async()
+        return _server_download_info(version, version_data) if version_data else None
+    except (KeyError, TypeError) as e:
         print(f"[ERROR] Récupération version: {e}")
         return None
 
@@ -751,17 +1269,32 @@ def check_server_installed():
     return server_jar.exists()
 
 
-def get_current_server_version():
-    """Récupère la version actuelle du serveur installé"""
-    import subprocess
-    import re
-    
-    server_jar = SERVER_DIR / "server.jar"
-    if not server_jar.exists():
+# Version du jar mise en cache : clé (taille, mtime_ns), puis SHA-1 si la clé change
+_server_version = {"key": None, "sha1": None, "version": None}
+_server_version_lock = threading.Lock()
+
+
+def _jar_sha1(path):
+    hasher = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _read_jar_version(server_jar):
+    """Version lue dans version.json à la racine du jar (serveurs 1.14+), sans lancer Java"""
+    try:
+        with zipfile.ZipFile(server_jar) as jar:
+            data = json.loads(jar.read("version.json"))
+        return data.get("id") or data.get("name")
+    except (KeyError, OSError, ValueError, zipfile.BadZipFile):
         return None
-    
+
+
+def _detect_version_with_java(server_jar):
+    """Repli pour les anciens jars : java -jar server.jar --version"""
     try:
-        # Exécuter java -jar server.jar --version
         result = subprocess.run(
             ["java", "-jar", str(server_jar), "--version"],
             cwd=str(SERVER_DIR),
@@ -780,9 +1313,43 @@ def get_current_server_version():
         return "Version inconnue"
     except Exception as e:
         print(f"[ERROR] Détection version: {e}")
-        return "Erreur détection"
+        return None
+
+
+def get_current_server_version():
+    """Récupère la version actuelle du serveur installé (mémorisée tant que le jar ne change pas)"""
+    server_jar = SERVER_DIR / JAR_NAME
+    try:
+        st = server_jar.stat()
+    except FileNotFoundError:
+        return None
+    key = (st.st_size, st.st_mtime_ns)
+    
+    with _server_version_lock:
+        if _server_version["key"] == key:
+            return _server_version["version"]
+        
+        # Jar simplement touché (même contenu) : la version connue reste valable
+        sha1 = _jar_sha1(server_jar)
+        if sha1 == _server_version["sha1"]:
+            _server_version["key"] = key
+            return _server_version["version"]
+        
+        version = _read_jar_version(server_jar) or _detect_version_with_java(server_jar)
+        if version is None:
+            return "Erreur détection"  # pas mis en cache : nouvel essai au prochain appel
+        
+        _server_version.update(key=key, sha1=sha1, version=version)
+        return version
+
+
+def invalidate_server_version():
+    """Oublie la version mémorisée (après installation / mise à jour)"""
+    with _server_version_lock:
+        _server_version.update(key=None, sha1=None, version=None)
 
 
+@_without_autorestart
 def backup_server_before_update():
     """Sauvegarde complète du serveur AVANT mise à jour"""
     from datetime import datetime
@@ -790,65 +1357,53 @@ def backup_server_before_update():
     if is_running():
         return {"success": False, "error": "Arrêtez le serveur avant mise à jour"}
     
-    # 1. Archiver monde actuel d'abord
-    current_world_name = get_current_world()
-    if current_world_name:
+    # 1. Archiver monde actuel d'abord (annulé si le backup échoue)
+    undo = []
+    stale = None
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    backups_root = Path.home() / "minecraft-manager" / "backups"
+    
+    try:
+        current_world_name = get_current_world()
         current_world = SERVER_DIR / "world"
-        if current_world.exists():
+        if current_world_name and current_world.exists():
             print(f"[BACKUP] Archivage monde '{current_world_name}'")
             
-            # Sauvegarder config
-            props = get_server_properties()
-            config = {
-                "max_players": int(props.get("max-players", "20")),
-                "whitelist_enabled": props.get("white-list", "false") == "true",
-                "whitelist_players": get_whitelist()
-            }
-            save_world_config(current_world_name, config)
-            
-            # Archiver monde
-            worlds_dir = Path.home() / "minecraft-manager" / "worlds"
-            backup_location = worlds_dir / current_world_name
-            if backup_location.exists():
-                shutil.rmtree(backup_location)
-            shutil.move(str(current_world), str(backup_location))
-            
-            # Réécrire config
-            save_world_config(current_world_name, config)
+            # Archiver monde avec sa config (renommage)
+            config = _capture_world_config(current_world_name)
+            stale = _archive_current_world(current_world_name, config, undo)
             print(f"[BACKUP] Monde archivé dans worlds/{current_world_name}/")
-    
-    # 2. Créer backup complet serveur
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    backup_name = f"server_backup_{timestamp}.tar.gz"
-    backup_path = Path.home() / "minecraft-manager" / "backups" / backup_name
-    
-    try:
-        # Compresser TOUT le dossier server/current
-        import subprocess
-        subprocess.run([
-            "tar", "-czf", str(backup_path),
-            "-C", str(SERVER_DIR.parent),
-            "current"
-        ], check=True)
         
-        size_mb = round(backup_path.stat().st_size / 1024 / 1024, 2)
+        # 2. Créer backup complet serveur (compression parallèle)
+        backups_root.mkdir(parents=True, exist_ok=True)
         
-        print(f"[BACKUP] Serveur sauvegardé: {backup_name} ({size_mb} MB)")
-        
-        return {
-            "success": True,
-            "backup_file": backup_name,
-            "size_mb": size_mb
-        }
+        # Compresser TOUT le dossier server/current
+        result = archive.write_archive(
+            SERVER_DIR, _unused_archive_base(backups_root, f"server_backup_{timestamp}"),
+            codec=ARCHIVE_CODEC, arcname="current"
+        )
     except Exception as e:
         print(f"[ERROR] Backup serveur: {e}")
+        _rollback(undo)
         return {"success": False, "error": str(e)}
+    
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
+    
+    print(f"[BACKUP] Serveur sauvegardé: {result['file']} ({result['size_mb']} MB, "
+          f"{result['throughput_mb_s']} MB/s sur {result['workers']} threads)")
+    
+    return {
+        "success": True,
+        "backup_file": result["file"],
+        "size_mb": result["size_mb"],
+        "throughput_mb_s": result["throughput_mb_s"]
+    }
 
 
-def install_minecraft_server(download_url):
-    """Installe un serveur Minecraft depuis une URL"""
-    import requests
-    
+@_without_autorestart
+def install_minecraft_server(download_url, sha1=None, size=None, progress=None):
+    """Installe un serveur Minecraft depuis une URL (téléchargement vérifié, remplacement atomique)"""
     if is_running():
         return {"success": False, "error": "Arrêtez le serveur avant installation"}
     
@@ -860,30 +1415,24 @@ def install_minecraft_server(download_url):
     try:
         print(f"[INSTALL] Téléchargement depuis: {download_url}")
         
-        # Téléchargement avec progress
-        response = requests.get(download_url, stream=True, timeout=30)
-        response.raise_for_status()
+        # server.jar.part puis swap : l'ancien jar reste intact tant que le nouveau n'est pas vérifié
+        result = download_file(download_url, server_jar, sha1=sha1 or None, size=int(size) if size else None,
+                               progress=progress)
         
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(server_jar, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        progress = (downloaded / total_size) * 100
-                        if downloaded % (1024 * 1024) == 0:  # Log chaque MB
-                            print(f"[INSTALL] Progression: {progress:.1f}%")
-        
-        print(f"[INSTALL] Téléchargement terminé: {round(downloaded / 1024 / 1024, 2)} MB")
+        print(f"[INSTALL] Téléchargement terminé: {round(result['bytes'] / 1024 / 1024, 2)} MB "
+              f"en {result['seconds']}s ({result['mb_s']} MB/s)"
+              + (", SHA-1 vérifié" if result["verified"] else "")
+              + (f", repris à {result['resumed_from']} octets" if result["resumed_from"] else ""))
         
         # Accepter EULA automatiquement
         eula_file = SERVER_DIR / "eula.txt"
         eula_file.write_text("eula=true\n")
         print("[INSTALL] EULA accepté")
         
+        # Nouvelle version détectée tout de suite : le dashboard n'a plus rien à recalculer
+        invalidate_server_version()
+        print(f"[INSTALL] Version installée: {get_current_server_version()}")
+        
         # Créer server.properties par défaut
         if not (SERVER_DIR / "server.properties").exists():
             default_props = """max-players=20
@@ -896,25 +1445,24 @@ motd=Minecraft Server Manager
 server-port=25565
 online-mode=true
 """
-            (SERVER_DIR / "server.properties").write_text(default_props)
+            _write_state_file(SERVER_DIR / "server.properties", default_props)
             print("[INSTALL] server.properties créé")
         
         # Créer whitelist.json vide
         if not (SERVER_DIR / "whitelist.json").exists():
-            (SERVER_DIR / "whitelist.json").write_text("[]\n")
+            _write_state_file(SERVER_DIR / "whitelist.json", "[]\n")
             print("[INSTALL] whitelist.json créé")
         
-        return {"success": True, "message": "Serveur installé avec succès"}
+        return {"success": True, "message": "Serveur installé avec succès", "download": result}
         
     except Exception as e:
+        # Le .part éventuel est conservé pour reprendre le téléchargement
         print(f"[ERROR] Installation: {e}")
-        # Nettoyer en cas d'erreur
-        if server_jar.exists():
-            server_jar.unlink()
         return {"success": False, "error": str(e)}
 
 
-def update_minecraft_server(download_url):
+@_without_autorestart
+def update_minecraft_server(download_url, sha1=None, size=None, progress=None):
     """Met à jour le serveur Minecraft (avec backup auto)"""
     
     # 1. Backup complet avant mise à jour
@@ -924,12 +1472,6 @@ def update_minecraft_server(download_url):
     if not backup_result["success"]:
         return backup_result
     
-    # 2. Supprimer ancien server.jar
-    server_jar = SERVER_DIR / "server.jar"
-    if server_jar.exists():
-        server_jar.unlink()
-        print("[UPDATE] Ancien server.jar supprimé")
-    
-    # 3. Installer nouvelle version
+    # 2. Installer nouvelle version (l'ancien server.jar n'est remplacé qu'après vérification)
     print("[UPDATE] Installation nouvelle version...")
-    return install_minecraft_server(download_url)
+    return install_minecraft_server(download_url, sha1, size, progress)
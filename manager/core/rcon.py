@@ -0,0 +1,257 @@
+import asyncio
+import itertools
+import secrets
+import struct
+from pathlib import Path
+
+from core.persistence import atomic_write_text
+from core.prometheus import REGISTRY
+
+
+# Protocole RCON (Source, repris par Minecraft) : <longueur><id><type><corps>\0\0, entiers little-endian
+TYPE_AUTH = 3
+TYPE_AUTH_RESPONSE = 2
+TYPE_COMMAND = 2
+TYPE_RESPONSE = 0
+
+MAX_COMMAND_BYTES = 1446   # taille max d'une requête acceptée par le serveur vanilla
+# Réponse découpée par 4096 caractères Java : jusqu'à 3 octets UTF-8 chacun, + id, type et \0\0
+MAX_PACKET_BYTES = 4096 * 3 + 10
+RCON_PORT_OFFSET = 10      # port RCON = port du jeu + 10 (25565 -> 25575, le défaut Minecraft)
+DEFAULT_RCON_PORT = 25575  # rcon.port absent : défaut du serveur vanilla
+POOL_SIZE = 2
+CONNECT_TIMEOUT = 3
+COMMAND_TIMEOUT = 10
+
+_LATENCY = REGISTRY.histogram("mc_rcon_command_duration_seconds", "Latence des commandes RCON", ("instance",),
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+
+
+class RconError(Exception):
+    pass
+
+
+class RconUnavailable(RconError):
+    """Rien n'a été envoyé au serveur : la commande peut repartir par un autre canal"""
+
+
+def _read_properties(path):
+    lines = path.read_text().splitlines()
+    props = {}
+    for line in lines:
+        if "=" in line and not line.startswith("#"):
+            key, value = line.split("=", 1)
+            props[key.strip()] = value.strip()
+    return lines, props
+
+
+def set_rcon_properties(server_dir, game_port, enabled):
+    """Active ou désactive RCON dans server.properties (lu par le serveur au prochain démarrage)
+
+    À l'activation, seules les clés manquantes sont ajoutées : un port ou un
+    mot de passe choisi à la main est conservé. OSError si server.properties
+    n'existe pas encore.
+    """
+    path = Path(server_dir) / "server.properties"
+    lines, props = _read_properties(path)
+    wanted = {"enable-rcon": "true" if enabled else "false"}
+    if enabled:
+        wanted.update({
+            "rcon.port": props.get("rcon.port") or str(game_port + RCON_PORT_OFFSET),
+            "rcon.password": props.get("rcon.password") or secrets.token_urlsafe(24),
+            "broadcast-rcon-to-ops": props.get("broadcast-rcon-to-ops") or "false",
+        })
+    if any(props.get(key) != value for key, value in wanted.items()):
+        kept = [line for line in lines if line.split("=", 1)[0].strip() not in wanted]
+        atomic_write_text(path, "\n".join(kept + [f"{k}={v}" for k, v in wanted.items()]) + "\n")
+
+
+def rcon_settings(server_dir):
+    """(port, mot de passe) si RCON est activé dans server.properties, None sinon
+
+    Le manager n'active jamais RCON de lui-même (voir set_rcon_properties).
+    RconError si RCON est activé sans mot de passe ou avec un port invalide.
+    """
+    _, props = _read_properties(Path(server_dir) / "server.properties")
+    if props.get("enable-rcon") != "true":
+        return None
+    if not props.get("rcon.password"):
+        raise RconError("rcon.password vide : RCON refusé par le serveur")
+    try:
+        return int(props.get("rcon.port") or DEFAULT_RCON_PORT), props["rcon.password"]
+    except ValueError:
+        raise RconError(f"rcon.port invalide: {props['rcon.port']}")
+
+
+def _packet(request_id, packet_type, body):
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class RconConnection:
+    """Une connexion RCON authentifiée, plusieurs commandes en vol (pipelining)
+
+    Chaque commande est suivie d'un paquet vide de type inconnu : le serveur
+    traite les requêtes dans l'ordre et répond à ce paquet après tous les
+    fragments de la réponse (découpée par 4096 caractères). Sa réponse marque donc
+    la fin du texte de la commande qui le précède.
+    """
+
+    def __init__(self, host, port, password):
+        self.host = host
+        self.port = port
+        self.password = password
+        self._reader = None
+        self._writer = None
+        self._ids = itertools.count(1)
+        self._pending = {}    # id de commande -> [fragments, future]
+        self._sentinels = {}  # id du paquet sentinelle -> id de commande
+        self._task = None
+        self.closed = False
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    async def connect(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise RconUnavailable(f"Connexion RCON {self.host}:{self.port} impossible: {e}")
+
+        auth_id = next(self._ids)
+        self._writer.write(_packet(auth_id, TYPE_AUTH, self.password))
+        try:
+            while True:
+                request_id, packet_type, _ = await asyncio.wait_for(self._read_packet(), CONNECT_TIMEOUT)
+                if packet_type == TYPE_AUTH_RESPONSE:
+                    break
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            self.close()
+            raise RconUnavailable(f"Authentification RCON interrompue: {e}")
+        if request_id == -1:
+            self.close()
+            raise RconUnavailable("Mot de passe RCON refusé")
+        self._task = asyncio.ensure_future(self._dispatch())
+
+    async def _read_packet(self):
+        (length,) = struct.unpack("<i", await self._reader.readexactly(4))
+        if not 10 <= length <= MAX_PACKET_BYTES:
+            raise RconError(f"Paquet RCON invalide ({length} octets)")
+        data = await self._reader.readexactly(length)
+        request_id, packet_type = struct.unpack("<ii", data[:8])
+        return request_id, packet_type, data[8:-2].decode("utf-8", "replace")
+
+    async def _dispatch(self):
+        """Lecteur unique : range chaque fragment sous l'id de sa commande"""
+        error = None
+        try:
+            while True:
+                request_id, _, body = await self._read_packet()
+                if request_id in self._sentinels:
+                    command_id = self._sentinels.pop(request_id)
+                    parts, future = self._pending.pop(command_id)
+                    if not future.done():
+                        future.set_result("".join(parts))
+                elif request_id in self._pending:
+                    self._pending[request_id][0].append(body)
+        except (OSError, asyncio.IncompleteReadError, RconError) as e:
+            error = e
+        except asyncio.CancelledError:
+            error = RconError("Connexion RCON fermée")
+        self.close()
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(RconError(f"Connexion RCON perdue: {error}"))
+        self._pending.clear()
+        self._sentinels.clear()
+
+    def send(self, command):
+        """Écrit la commande et sa sentinelle, retourne le future de la réponse"""
+        if self.closed:
+            raise RconUnavailable("Connexion RCON fermée")
+        command_id, sentinel_id = next(self._ids), next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = [[], future]
+        self._sentinels[sentinel_id] = command_id
+        self._writer.write(_packet(command_id, TYPE_COMMAND, command) + _packet(sentinel_id, TYPE_RESPONSE, ""))
+        return future
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer is not None:
+            self._writer.close()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class RconPool:
+    """Connexions RCON persistantes vers un serveur (boucle du manager uniquement)
+
+    Les connexions sont ouvertes à la demande et gardées ouvertes ; une
+    commande part sur la connexion la moins chargée, sans attendre la réponse
+    des précédentes. Un lot est écrit d'un bloc sur une seule connexion :
+    un aller-retour pour N commandes.
+    """
+
+    def __init__(self, host, port, password, size=POOL_SIZE, instance="default"):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.size = size
+        self._connections = []
+        self._connecting = None
+        self._latency = _LATENCY.labels(instance)
+
+    async def _connection(self):
+        self._connections = [c for c in self._connections if not c.closed]
+        idle = [c for c in self._connections if c.in_flight == 0]
+        if idle or len(self._connections) >= self.size:
+            return min(self._connections, key=lambda c: c.in_flight)
+        # Une seule ouverture à la fois : des commandes simultanées ne multiplient pas les connexions
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._open())
+        try:
+            return await asyncio.shield(self._connecting)
+        finally:
+            if self._connecting is not None and self._connecting.done():
+                self._connecting = None
+
+    async def _open(self):
+        connection = RconConnection(self.host, self.port, self.password)
+        await connection.connect()
+        self._connections.append(connection)
+        return connection
+
+    async def command(self, command, timeout=COMMAND_TIMEOUT):
+        """Réponse texte de la commande
+
+        RconUnavailable si rien n'a pu être envoyé, RconError si la réponse s'est perdue.
+        """
+        return (await self.batch([command], timeout))[0]
+
+    async def batch(self, commands, timeout=COMMAND_TIMEOUT):
+        """Réponses de plusieurs commandes envoyées en pipeline (ordre conservé)"""
+        # Vérifié avant tout envoi : un lot part en entier ou pas du tout
+        for command in commands:
+            if len(command.encode("utf-8")) > MAX_COMMAND_BYTES:
+                raise RconUnavailable(f"Commande trop longue pour RCON (max {MAX_COMMAND_BYTES} octets)")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        connection = await self._connection()
+        futures = [connection.send(command) for command in commands]
+        try:
+            replies = await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        except asyncio.TimeoutError:
+            connection.close()  # réponses désynchronisées : la connexion n'est plus fiable
+            raise RconError(f"Pas de réponse RCON en {timeout}s")
+        self._latency.observe(loop.time() - started)
+        return replies
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
@@ -0,0 +1,257 @@
+import copy
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from core.persistence import atomic_write_text
+
+
+# Équivalent des anciennes tâches fixes (backup 30 min, restart 2 h 30),
+# avec les politiques qui évitent le travail inutile
+DEFAULT_SCHEDULES = {
+    "backup": {
+        "action": "backup",
+        "enabled": True,
+        "trigger": {"type": "interval", "minutes": 30},
+        "policy": {"skip_unchanged": True, "allowed_hours": ""},
+    },
+    "restart": {
+        "action": "restart",
+        "enabled": True,
+        "trigger": {"type": "interval", "minutes": 150},
+        "policy": {"prefer_empty": True, "max_delay_minutes": 60, "countdown_seconds": 60, "allowed_hours": ""},
+    },
+}
+
+# Politiques acceptées par action, avec leur valeur par défaut.
+# allowed_hours : plage horaire locale "HH:MM-HH:MM" (peut passer minuit) hors de
+# laquelle l'action est différée jusqu'à l'ouverture suivante ; "" = à toute heure
+POLICIES = {
+    "backup": {"skip_unchanged": True, "allowed_hours": ""},
+    "restart": {"prefer_empty": True, "max_delay_minutes": 60, "countdown_seconds": 60, "allowed_hours": ""},
+}
+
+RETRY_SECONDS = 60  # re-vérification d'une action différée (joueurs encore connectés)
+
+
+def build_trigger(trigger):
+    """Trigger APScheduler depuis {"type": "interval", "minutes": n} ou {"type": "cron", "cron": "0 4 * * *"}"""
+    kind = trigger.get("type")
+    if kind == "interval":
+        try:
+            minutes = float(trigger.get("minutes", 0))
+        except (TypeError, ValueError):
+            raise ValueError("minutes : nombre attendu")
+        if minutes < 1:
+            raise ValueError("Intervalle minimum : 1 minute")
+        return IntervalTrigger(minutes=minutes)
+    if kind == "cron":
+        return CronTrigger.from_crontab(trigger.get("cron", ""))
+    raise ValueError(f"Type de déclencheur inconnu: {kind}")
+
+
+def parse_window(text):
+    """"22:00-06:00" -> (1320, 360) en minutes depuis minuit, None si vide ; ValueError si invalide"""
+    if not text:
+        return None
+    try:
+        bounds = []
+        for part in text.split("-"):
+            hours, minutes = part.strip().split(":")
+            if not (0 <= int(hours) <= 23 and 0 <= int(minutes) <= 59):
+                raise ValueError
+            bounds.append(int(hours) * 60 + int(minutes))
+        start, end = bounds
+    except ValueError:
+        raise ValueError(f"allowed_hours : plage HH:MM-HH:MM attendue ({text})")
+    if start == end:
+        raise ValueError("allowed_hours : plage vide")
+    return start, end
+
+
+def in_window(window, now):
+    if window is None:
+        return True
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    return start <= minute < end if start < end else minute >= start or minute < end
+
+
+def next_window_start(window, now):
+    """Prochaine ouverture de la plage après `now` (datetime local)"""
+    start = now.replace(hour=window[0] // 60, minute=window[0] % 60, second=0, microsecond=0)
+    return start if start > now else start + timedelta(days=1)
+
+
+def validate_schedule(schedule):
+    """Schedule complété et vérifié ; ValueError si invalide"""
+    action = schedule.get("action")
+    if action not in POLICIES:
+        raise ValueError(f"Action inconnue: {action} (choix: {', '.join(POLICIES)})")
+    trigger = dict(schedule.get("trigger") or {})
+    build_trigger(trigger)
+
+    policy = {**POLICIES[action], **(schedule.get("policy") or {})}
+    unknown = set(policy) - set(POLICIES[action])
+    if unknown:
+        raise ValueError(f"Politiques inconnues pour {action}: {', '.join(sorted(unknown))}")
+    for key, default in POLICIES[action].items():
+        if isinstance(default, bool):
+            # Pas de bool(...) : "false" (chaîne non vide) deviendrait True
+            if not isinstance(policy[key], bool):
+                raise ValueError(f"{key} : booléen attendu (true / false)")
+        elif isinstance(default, str):
+            policy[key] = str(policy[key] or "").strip()
+            parse_window(policy[key])
+        else:
+            try:
+                policy[key] = int(policy[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} : entier attendu")
+            if policy[key] < 0:
+                raise ValueError(f"{key} : valeur positive attendue")
+
+    enabled = schedule.get("enabled", True)
+    if not isinstance(enabled, bool):
+        raise ValueError("enabled : booléen attendu (true / false)")
+    return {"action": action, "enabled": enabled, "trigger": trigger, "policy": policy}
+
+
+class ScheduleEngine:
+    """Tâches planifiées éditables (backup, restart) avec politiques, persistées en JSON
+
+    Chaque schedule devient un job APScheduler "schedule:<id>". L'action
+    reçoit (id, policy, différée depuis) et renvoie {"status": "done" | "skipped" | "deferred",
+    "detail": ...} ; "deferred" la replanifie RETRY_SECONDS plus tard
+    sans bloquer de thread. Hors de sa plage allowed_hours, l'action n'est
+    pas appelée : elle est replanifiée à l'ouverture de la plage, et le
+    délai de report (différée depuis) repart de zéro à chaque ouverture.
+    """
+
+    def __init__(self, scheduler, path, actions):
+        self.scheduler = scheduler
+        self.path = Path(path)
+        self.actions = actions  # nom d'action -> fn(id, policy, deferred_since)
+        self._lock = threading.Lock()
+        self._schedules = {}
+        self._state = {}  # id -> {"last_run", "last_result", "deferred_since"}
+        self._load()
+
+    # ----- Persistance -----
+
+    def _load(self):
+        try:
+            stored = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            stored = copy.deepcopy(DEFAULT_SCHEDULES)
+        for schedule_id, schedule in stored.items():
+            try:
+                self._schedules[schedule_id] = validate_schedule(schedule)
+            except ValueError as e:
+                print(f"[SCHEDULE] '{schedule_id}' ignoré: {e}")
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.path, json.dumps(self._schedules, indent=2))
+        except OSError as e:
+            print(f"[SCHEDULE] Écriture {self.path} impossible: {e}")
+
+    # ----- Jobs APScheduler -----
+
+    def start(self):
+        for schedule_id in list(self._schedules):
+            self._register(schedule_id)
+
+    def _register(self, schedule_id):
+        job_id = f"schedule:{schedule_id}"
+        for stale in (job_id, f"{job_id}:retry"):
+            if self.scheduler.get_job(stale):
+                self.scheduler.remove_job(stale)
+        schedule = self._schedules.get(schedule_id)
+        if schedule and schedule["enabled"]:
+            self.scheduler.add_job(self.run, build_trigger(schedule["trigger"]), args=[schedule_id],
+                                   id=job_id, max_instances=1, coalesce=True)
+
+    def run(self, schedule_id):
+        """Exécute l'action d'un schedule selon sa politique (thread APScheduler)"""
+        # Job principal et job :retry peuvent tourner en même temps : état lu et écrit sous verrou
+        with self._lock:
+            schedule = self._schedules.get(schedule_id)
+            if schedule is None:
+                return None
+            state = self._state.setdefault(schedule_id, {"last_run": None, "last_result": None, "deferred_since": None})
+            deferred_since = state["deferred_since"]
+
+        now = datetime.now()
+        window = parse_window(schedule["policy"]["allowed_hours"])
+        if not in_window(window, now):
+            result = {"status": "deferred", "detail": f"hors de la plage {schedule['policy']['allowed_hours']}"}
+            retry_at, deferred_since = next_window_start(window, now), None
+        else:
+            try:
+                result = self.actions[schedule["action"]](schedule_id, schedule["policy"], deferred_since)
+            except Exception as e:
+                result = {"status": "error", "detail": str(e)}
+            retry_at = datetime.now() + timedelta(seconds=RETRY_SECONDS)
+            if result["status"] == "deferred":
+                deferred_since = deferred_since or time.time()
+
+        with self._lock:
+            state["last_run"] = time.time()
+            state["last_result"] = result
+            state["deferred_since"] = deferred_since if result["status"] == "deferred" else None
+            # Schedule supprimé ou modifié pendant l'action : pas de relance
+            if result["status"] == "deferred" and self._schedules.get(schedule_id) is schedule:
+                self.scheduler.add_job(self.run, "date", run_date=retry_at, args=[schedule_id],
+                                       id=f"schedule:{schedule_id}:retry", replace_existing=True)
+        print(f"[SCHEDULE] {schedule_id}: {result['status']} {result.get('detail') or ''}".rstrip())
+        return result
+
+    # ----- API -----
+
+    def list(self):
+        jobs = {job.id: job for job in self.scheduler.get_jobs()}
+        with self._lock:
+            schedules = list(self._schedules.items())
+            states = copy.deepcopy(self._state)
+        items = []
+        for schedule_id, schedule in schedules:
+            job = jobs.get(f"schedule:{schedule_id}")
+            next_run = getattr(job, "next_run_time", None)
+            items.append({
+                "id": schedule_id,
+                **schedule,
+                "next_run": next_run.timestamp() if next_run else None,
+                **states.get(schedule_id, {"last_run": None, "last_result": None, "deferred_since": None}),
+            })
+        return items
+
+    def update(self, schedule_id, data):
+        """Crée ou remplace un schedule, le replanifie et le persiste"""
+        if not schedule_id or not schedule_id.replace("-", "").replace("_", "").isalnum():
+            return {"success": False, "error": "Identifiant invalide"}
+        current = self._schedules.get(schedule_id, {})
+        try:
+            schedule = validate_schedule({**current, **data})
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        with self._lock:
+            self._schedules[schedule_id] = schedule
+            self._register(schedule_id)
+            self._save()
+        return {"success": True, "schedule": {"id": schedule_id, **schedule}}
+
+    def delete(self, schedule_id):
+        with self._lock:
+            if self._schedules.pop(schedule_id, None) is None:
+                return {"success": False, "error": "Schedule introuvable"}
+            self._register(schedule_id)
+            self._state.pop(schedule_id, None)
+            self._save()
+        return {"success": True}
@@ -0,0 +1,190 @@
+import asyncio
+import enum
+import re
+
+from core import event_loop
+
+
+class ServerState(str, enum.Enum):
+    STOPPED = "stopped"
+    STARTING = "starting"
+    RUNNING = "running"
+    STOPPING = "stopping"
+    CRASHED = "crashed"
+
+
+# "[12:00:00] [Server thread/INFO]: Done (4.213s)! For help, type "help""
+READY_PATTERN = re.compile(r'Done \([\d.,]+s\)! For help')
+
+STREAM_LIMIT = 1024 * 1024  # lignes très longues (stack traces) sans LimitOverrunError
+
+
+class ServerSupervisor:
+    """Superviseur asyncio du process Java (create_subprocess_exec)
+
+    Toutes les méthodes async s'exécutent sur la boucle du manager
+    (core.event_loop). Les transitions start/stop sont sérialisées par un
+    verrou ; l'état est observable et attendable via wait_for_state().
+    """
+
+    def __init__(self, cwd, command_factory, on_line, on_start=None, stop_timeout=60, on_exit=None):
+        self.cwd = cwd
+        self._command_factory = command_factory
+        self._on_exit = on_exit  # (code de sortie, arrêt demandé) appelé sur la boucle à chaque fin de process
+        self._on_line = on_line
+        self._on_start = on_start
+        self.stop_timeout = stop_timeout
+
+        self.state = ServerState.STOPPED
+        self.returncode = None
+        self._proc = None
+        self._reader = None
+        self._waiter = None
+        self._lock = asyncio.Lock()
+        self._state_event = asyncio.Event()
+
+    # ----- État -----
+
+    @property
+    def pid(self):
+        return self._proc.pid if self._proc is not None else None
+
+    @property
+    def is_alive(self):
+        proc = self._proc
+        return proc is not None and proc.returncode is None
+
+    def _set_state(self, state):
+        self.state = state
+        # Réveille tous les wait_for_state() en cours
+        event, self._state_event = self._state_event, asyncio.Event()
+        event.set()
+
+    async def wait_for_state(self, *states, timeout=None):
+        """Attend que le serveur atteigne un des états donnés"""
+        async def _wait():
+            while self.state not in states:
+                await self._state_event.wait()
+            return self.state
+        return await asyncio.wait_for(_wait(), timeout)
+
+    async def wait(self):
+        """Attend la fin du process courant, retourne son code de sortie"""
+        waiter = self._waiter
+        if waiter is not None:
+            await asyncio.shield(waiter)
+        return self.returncode
+
+    # ----- Cycle de vie -----
+
+    async def start(self):
+        async with self._lock:
+            if self.is_alive:
+                return False
+            # Laisser le précédent process publier son état final
+            await self.wait()
+
+            if self._on_start:
+                self._on_start()
+
+            try:
+                self._proc = await asyncio.create_subprocess_exec(
+                    *self._command_factory(),
+                    cwd=self.cwd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    limit=STREAM_LIMIT,
+                )
+            except OSError as e:
+                print(f"[ERROR] Démarrage serveur: {e}")
+                self._proc = None
+                return False
+
+            self.returncode = None
+            self._set_state(ServerState.STARTING)
+            self._reader = asyncio.create_task(self._read_output(self._proc))
+            self._waiter = asyncio.create_task(self._wait_exit(self._proc))
+            return True
+
+    async def stop(self, timeout=None):
+        """Envoie `stop`, attend la sortie sans bloquer la boucle, kill au-delà du timeout"""
+        async with self._lock:
+            if not self.is_alive:
+                return False
+
+            self._set_state(ServerState.STOPPING)
+            proc = self._proc
+            try:
+                proc.stdin.write(b"stop\n")
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+            try:
+                await asyncio.wait_for(proc.wait(), timeout or self.stop_timeout)
+            except asyncio.TimeoutError:
+                print("[STOP] Timeout, kill du process")
+                proc.kill()
+
+            await self.wait()
+            return True
+
+    async def _read_output(self, proc):
+        async for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if not line:
+                continue
+            self._on_line(line)
+            if self.state is ServerState.STARTING and READY_PATTERN.search(line):
+                self._set_state(ServerState.RUNNING)
+
+    async def _wait_exit(self, proc):
+        returncode = await proc.wait()
+        # Vider la sortie restante avant de publier l'état final
+        try:
+            await self._reader
+        except Exception as e:
+            print(f"[ERROR] Lecture logs: {e}")
+        self.returncode = returncode
+        self._proc = None
+
+        expected = self.state is ServerState.STOPPING
+        if expected or returncode == 0:
+            self._set_state(ServerState.STOPPED)
+        else:
+            print(f"[SUPERVISOR] Process terminé de façon inattendue (code {returncode})")
+            self._set_state(ServerState.CRASHED)
+
+        if self._on_exit:
+            try:
+                self._on_exit(returncode, expected)
+            except Exception as e:
+                print(f"[ERROR] Notification fin de process: {e}")
+
+    # ----- Commandes -----
+
+    async def send(self, command):
+        if not self.is_alive:
+            return False
+        try:
+            self._proc.stdin.write((command.strip() + "\n").encode())
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        return True
+
+    def send_nowait(self, command):
+        """Écriture stdin non bloquante, appelable depuis n'importe quel thread"""
+        proc = self._proc
+        if proc is None or proc.returncode is not None:
+            return False
+        event_loop.call_soon(self._write, proc, (command.strip() + "\n").encode())
+        return True
+
+    @staticmethod
+    def _write(proc, data):
+        try:
+            proc.stdin.write(data)
+        except (BrokenPipeError, ConnectionResetError, RuntimeError):
+            pass
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from core import event_loop
+from core.persistence import atomic_write_text
+from core.prometheus import REGISTRY
+
+
+BACKOFF_BASE = 5         # secondes avant le 1er redémarrage, doublé à chaque crash consécutif
+BACKOFF_MAX = 300
+CRASH_LOOP_MAX = 5       # crashs dans la fenêtre avant de renoncer (disjoncteur)
+CRASH_LOOP_WINDOW = 600  # secondes
+STABLE_AFTER = 600       # un process qui a tenu 10 min remet le backoff à zéro
+LOG_TAIL = 50            # lignes de log gardées par incident
+HISTORY_SIZE = 50
+
+OOM_PATTERN = re.compile(r"java\.lang\.OutOfMemoryError|Out of memory|OutOfMemory")
+CRASH_REPORT_PATTERN = re.compile(r"crash report has been saved to: ?(?P<path>\S+)")
+
+_CRASHES = REGISTRY.counter("mc_server_crashes_total", "Arrêts inattendus du serveur par type",
+                            ("instance", "kind"))
+_RESTARTS = REGISTRY.counter("mc_watchdog_restarts_total", "Redémarrages automatiques après crash", ("instance",))
+
+
+def classify_exit(returncode, expected, tail):
+    """Type de sortie : "clean" (arrêt demandé ou code 0), "oom" ou "crash\""""
+    if expected or returncode == 0:
+        return "clean"
+    # 137 / -9 : SIGKILL hors arrêt demandé, le plus souvent l'OOM killer du noyau
+    if returncode in (137, -9) or any(OOM_PATTERN.search(line) for line in tail):
+        return "oom"
+    return "crash"
+
+
+class Watchdog:
+    """Redémarre une instance après un crash, avec backoff exponentiel et disjoncteur
+
+    Notifié par le superviseur à la fin du process (pas de sondage) : le
+    redémarrage est planifié sur la boucle du manager quelques secondes après
+    le crash. Au-delà de CRASH_LOOP_MAX crashs en CRASH_LOOP_WINDOW secondes,
+    le disjoncteur s'ouvre et plus rien n'est relancé jusqu'à reset().
+    Une relance dont le process n'a pas pu être lancé compte comme un crash ("spawn").
+    Chaque incident est gardé (avec la fin des logs) dans `history_file`.
+    Les opérations destructives (monde, jar) tiennent maintenance() : aucune
+    relance ne démarre pendant, et celle déjà planifiée est abandonnée.
+    """
+
+    def __init__(self, instance, history_file, enabled=True):
+        self.instance = instance
+        self.history_file = Path(history_file)
+        self.enabled = enabled
+        self.tripped = False
+        self._consecutive = 0
+        self._recent = deque()  # instants des derniers crashs (fenêtre glissante)
+        self._pending = None    # TimerHandle du redémarrage planifié
+        self._restart_at = None
+        self._generation = 0    # incrémenté par maintenance() : invalide la relance planifiée
+        self._maintenance = threading.RLock()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._history = self._load()
+
+    # ----- Notification du superviseur (boucle du manager) -----
+
+    def on_exit(self, returncode, expected):
+        tail = self.instance.log_buffer.lines()[-LOG_TAIL:]
+        kind = classify_exit(returncode, expected, tail)
+        if kind == "clean":
+            self._consecutive = 0
+            return
+
+        uptime = self.instance.uptime()
+        if uptime is not None and uptime >= STABLE_AFTER:
+            self._consecutive = 0
+        report = next((m.group("path") for m in map(CRASH_REPORT_PATTERN.search, tail) if m), None)
+        self._incident(kind, returncode, uptime, tail, report)
+
+    def _incident(self, kind, returncode, uptime, tail, report=None):
+        """Compte un échec, planifie le prochain redémarrage (ou ouvre le disjoncteur) et l'enregistre"""
+        now = time.time()
+        self._consecutive += 1
+        self._recent.append(now)
+        while self._recent and self._recent[0] < now - CRASH_LOOP_WINDOW:
+            self._recent.popleft()
+
+        delay = None
+        if len(self._recent) >= CRASH_LOOP_MAX:
+            self.tripped = True
+            print(f"[WATCHDOG] {self.instance.id}: {len(self._recent)} crashs en {CRASH_LOOP_WINDOW}s, "
+                  f"redémarrage automatique suspendu")
+        elif self.enabled and not self.tripped:
+            delay = min(BACKOFF_BASE * 2 ** (self._consecutive - 1), BACKOFF_MAX)
+            self._schedule(delay)
+            print(f"[WATCHDOG] {self.instance.id}: {kind} (code {returncode}), redémarrage dans {delay}s")
+
+        _CRASHES.labels(self.instance.id, kind).inc()
+        self._record({
+            "time": now,
+            "kind": kind,
+            "returncode": returncode,
+            "uptime_seconds": round(uptime) if uptime is not None else None,
+            "crash_report": report,
+            "restart_in": delay,
+            "tripped": self.tripped,
+            "log_tail": tail,
+        })
+
+    def _schedule(self, delay):
+        loop = asyncio.get_running_loop()
+        self._restart_at = time.time() + delay
+        generation = self._generation
+        self._pending = loop.call_later(delay, lambda: asyncio.ensure_future(self._restart(generation)))
+
+    async def _restart(self, generation):
+        self._pending = None
+        self._restart_at = None
+        if generation != self._generation or self.instance.is_running or not self.enabled:
+            return
+        # Opération destructive en cours : on ne relance pas sous ses pieds
+        if not self._maintenance.acquire(blocking=False):
+            print(f"[WATCHDOG] {self.instance.id}: opération en cours sur le serveur, redémarrage abandonné")
+            return
+        try:
+            _RESTARTS.labels(self.instance.id).inc()
+            print(f"[WATCHDOG] {self.instance.id}: redémarrage automatique")
+            if not await self.instance.supervisor.start() and not self.instance.supervisor.is_alive:
+                # Process non lancé (java absent, dossier supprimé...) : pas de on_exit, l'échec compte ici
+                self._incident("spawn", None, None, [])
+        finally:
+            self._maintenance.release()
+
+    # ----- Contrôle (n'importe quel thread) -----
+
+    def cancel(self):
+        """Annule un redémarrage planifié (arrêt demandé entre-temps)"""
+        event_loop.call_soon(self._cancel)
+
+    def _cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+            self._restart_at = None
+
+    @contextmanager
+    def maintenance(self):
+        """Bloque les redémarrages automatiques (n'importe quel thread, réentrant)
+
+        Attend la fin d'une relance en cours : le test is_running() de
+        l'appelant voit alors le process relancé.
+        """
+        with self._maintenance:
+            self._generation += 1
+            self.cancel()
+            yield
+
+    def reset(self):
+        """Referme le disjoncteur et remet le backoff à zéro"""
+        self.tripped = False
+        self._consecutive = 0
+        self._recent.clear()
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "tripped": self.tripped,
+            "consecutive_crashes": self._consecutive,
+            "restart_at": self._restart_at,
+        }
+
+    # ----- Historique -----
+
+    def history(self, limit=None):
+        """Incidents du plus récent au plus ancien"""
+        with self._lock:
+            items = list(reversed(self._history))
+        return items[:limit] if limit else items
+
+    def _load(self):
+        try:
+            return json.loads(self.history_file.read_text())[-HISTORY_SIZE:]
+        except (OSError, ValueError):
+            return []
+
+    def _record(self, incident):
+        with self._lock:
+            self._history.append(incident)
+            del self._history[:-HISTORY_SIZE]
+        # Écriture (fsync) hors de la boucle du manager
+        asyncio.get_running_loop().run_in_executor(None, self._save)
+
+    def _save(self):
+        # Sérialisé : l'écriture qui passe en dernier contient l'historique le plus récent
+        with self._write_lock:
+            with self._lock:
+                text = json.dumps(self._history)
+            try:
+                self.history_file.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_text(self.history_file, text)
+            except OSError as e:
+                print(f"[WATCHDOG] Écriture {self.history_file} impossible: {e}")
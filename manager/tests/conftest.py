@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Les modules s'importent comme dans app.py : `from core.x import ...` depuis manager/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from http_stub import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """Serveur HTTP local (routes déclarées par le test), arrêté en fin de test"""
+    server = StubServer()
+    yield server
+    server.close()
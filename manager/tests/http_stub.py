@@ -0,0 +1,63 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Serveur HTTP local : chaque route est une fonction (handler, body) qui écrit la réponse"""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self._httpd.server_port}{path}"
+
+    def route(self, method, path):
+        def register(fn):
+            self.routes[(method, path)] = fn
+            return fn
+        return register
+
+    def count(self, method, path):
+        return sum(1 for m, p, _, _ in self.requests if m == method and p == path)
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def _dispatch(self, method):
+        length = int(self.headers.get("content-length", 0))
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+        stub = self.server.stub
+        stub.requests.append((method, path, dict(self.headers), body))
+        route = stub.routes.get((method, path))
+        if route is None:
+            self.send_error(404)
+            return
+        route(self, body)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, *args):
+        pass
+
+
+def send(handler, status, body=b"", headers=None):
+    """Réponse complète (Content-Length calculé)"""
+    handler.send_response(status)
+    for key, value in (headers or {}).items():
+        handler.send_header(key, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+
+import pytest
+
+from core import download
+from core.download import DownloadError, download_file
+from http_stub import send
+
+PAYLOAD = os.urandom(300_000)
+SHA1 = hashlib.sha1(PAYLOAD).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(download.time, "sleep", lambda seconds: None)
+
+
+def serve_ranges(handler, body):
+    """Serveur qui respecte Range (206 / 416), comme le CDN Mojang"""
+    requested = handler.headers.get("Range")
+    if not requested:
+        send(handler, 200, PAYLOAD)
+        return
+    start = int(requested.split("=")[1].rstrip("-"))
+    if start >= len(PAYLOAD):
+        send(handler, 416, headers={"Content-Range": f"bytes */{len(PAYLOAD)}"})
+        return
+    send(handler, 206, PAYLOAD[start:],
+         {"Content-Range": f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"})
+
+
+def with_part(tmp_path, url, content):
+    dest = tmp_path / "server.jar"
+    (tmp_path / "server.jar.part").write_bytes(content)
+    (tmp_path / "server.jar.part.url").write_text(url)
+    return dest
+
+
+def test_resume_with_206(stub, tmp_path):
+    stub.route("GET", "/server.jar")(serve_ranges)
+    url = stub.url("/server.jar")
+    dest = with_part(tmp_path, url, PAYLOAD[:100_000])
+
+    result = download_file(url, dest, sha1=SHA1, size=len(PAYLOAD))
+
+    assert dest.read_bytes() == PAYLOAD
+    assert result["resumed_from"] == 100_000
+    assert result["verified"] and result["sha1"] == SHA1
+    assert stub.requests[0][2]["Range"] == "bytes=100000-"
+
+
+def test_200_ignoring_range_restarts_from_zero(stub, tmp_path):
+    stub.route("GET", "/server.jar")(lambda handler, body: send(handler, 200, PAYLOAD))
+    url = stub.url("/server.jar")
+    dest = with_part(tmp_path, url, b"garbage" * 1000)
+
+    result = download_file(url, dest, sha1=SHA1, size=len(PAYLOAD))
+
+    assert dest.read_bytes() == PAYLOAD
+    assert result["resumed_from"] == 0
+
+
+def test_416_on_complete_part(stub, tmp_path):
+    stub.route("GET", "/server.jar")(serve_ranges)
+    url = stub.url("/server.jar")
+    dest = with_part(tmp_path, url, PAYLOAD)
+
+    result = download_file(url, dest, sha1=SHA1, size=len(PAYLOAD))
+
+    assert dest.read_bytes() == PAYLOAD
+    assert result["verified"]
+    assert not (tmp_path / "server.jar.part").exists()
+
+
+def test_part_from_another_url_is_discarded(stub, tmp_path):
+    stub.route("GET", "/server.jar")(serve_ranges)
+    dest = with_part(tmp_path, stub.url("/old.jar"), b"x" * 100_000)
+
+    download_file(stub.url("/server.jar"), dest, sha1=SHA1)
+
+    assert dest.read_bytes() == PAYLOAD
+    assert "Range" not in stub.requests[0][2]
+
+
+def test_sha1_mismatch_leaves_dest_untouched(stub, tmp_path):
+    stub.route("GET", "/server.jar")(lambda handler, body: send(handler, 200, PAYLOAD))
+    dest = tmp_path / "server.jar"
+    dest.write_bytes(b"previous jar")
+
+    with pytest.raises(DownloadError, match="SHA-1"):
+        download_file(stub.url("/server.jar"), dest, sha1="0" * 40)
+
+    assert dest.read_bytes() == b"previous jar"
+    assert not (tmp_path / "server.jar.part").exists()
+
+
+def test_size_mismatch_leaves_dest_untouched(stub, tmp_path):
+    stub.route("GET", "/server.jar")(lambda handler, body: send(handler, 200, PAYLOAD))
+    dest = tmp_path / "server.jar"
+    dest.write_bytes(b"previous jar")
+
+    with pytest.raises(DownloadError, match="Taille"):
+        download_file(stub.url("/server.jar"), dest, size=len(PAYLOAD) + 1)
+
+    assert dest.read_bytes() == b"previous jar"
+
+
+def test_atomic_swap(stub, tmp_path):
+    dest = tmp_path / "server.jar"
+    dest.write_bytes(b"previous jar")
+    seen_during_download = []
+
+    @stub.route("GET", "/server.jar")
+    def serve(handler, body):
+        # Pendant le transfert, l'ancien jar est toujours en place et complet
+        seen_during_download.append(dest.read_bytes())
+        send(handler, 200, PAYLOAD)
+
+    download_file(stub.url("/server.jar"), dest, sha1=SHA1)
+
+    assert seen_during_download == [b"previous jar"]
+    assert dest.read_bytes() == PAYLOAD
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["server.jar"]
+
+
+def test_5xx_is_retried(stub, tmp_path):
+    statuses = [503, 200]
+
+    @stub.route("GET", "/server.jar")
+    def flaky(handler, body):
+        status = statuses.pop(0)
+        send(handler, status, PAYLOAD if status == 200 else b"busy")
+
+    result = download_file(stub.url("/server.jar"), tmp_path / "server.jar", sha1=SHA1)
+
+    assert result["bytes"] == len(PAYLOAD)
+    assert stub.count("GET", "/server.jar") == 2
+
+
+def test_4xx_is_not_retried(stub, tmp_path):
+    stub.route("GET", "/server.jar")(lambda handler, body: send(handler, 404, b"missing"))
+
+    with pytest.raises(DownloadError, match="404"):
+        download_file(stub.url("/server.jar"), tmp_path / "server.jar")
+
+    assert stub.count("GET", "/server.jar") == 1
+    assert not (tmp_path / "server.jar").exists()
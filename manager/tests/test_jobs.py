@@ -0,0 +1,37 @@
+import threading
+import time
+
+from core.jobs import JobManager
+
+
+def wait_done(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.to_dict()["status"]
+
+
+def test_light_job_does_not_queue_behind_disk_jobs():
+    jobs = JobManager(max_workers=2, disk_slots=1)
+    release = threading.Event()
+    blocking = [jobs.submit("backup", lambda progress: release.wait(5)) for _ in range(3)]
+
+    light = jobs.submit("whitelist", lambda names, progress: len(names), ["a", "b"], disk=False)
+
+    assert wait_done(light, timeout=1) == "done"
+    assert light.result == 2
+    assert [job.to_dict()["status"] for job in blocking] == ["running", "queued", "queued"]
+    release.set()
+    assert all(wait_done(job) == "done" for job in blocking)
+
+
+def test_unique_reuses_the_active_job():
+    jobs = JobManager()
+    release = threading.Event()
+
+    first = jobs.submit("backup", lambda progress: release.wait(5), unique=True)
+    again = jobs.submit("backup", lambda progress: None, unique=True)
+
+    assert again is first
+    release.set()
+    wait_done(first)
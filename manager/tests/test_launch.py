@@ -0,0 +1,35 @@
+import pytest
+
+from core.launch import DEFAULT_LAUNCH_PROFILE, validate_launch_profile
+
+HOST = {"memory_mb": 8192, "cpus": [0, 1, 2, 3]}
+
+
+def test_defaults_are_valid():
+    assert validate_launch_profile(None, **HOST) == DEFAULT_LAUNCH_PROFILE
+
+
+def test_extra_args_string_is_split():
+    profile = validate_launch_profile({"extra_args": "-Dfile.encoding=UTF-8 -XX:+UseStringDeduplication"}, **HOST)
+
+    assert profile["extra_args"] == ["-Dfile.encoding=UTF-8", "-XX:+UseStringDeduplication"]
+
+
+@pytest.mark.parametrize("profile", [
+    "aikar",
+    {"extra_args": 5},
+    {"extra_args": {"-Xss": "1M"}},
+    {"extra_args": "-Dname='non fermé"},
+    {"gc": ["g1"]},
+    {"heap_max_mb": None},
+    {"heap_min_mb": "beaucoup"},
+    {"cpu_affinity": 3},
+    {"cpu_affinity": [0, "x"]},
+    {"cpu_affinity": "0-9"},
+    {"extra_args": ["-Xmx8G"]},
+    {"heap_max_mb": 65536},
+])
+def test_invalid_profiles_raise_value_error(profile):
+    """Mauvais type compris : les appelants n'attrapent que ValueError"""
+    with pytest.raises(ValueError):
+        validate_launch_profile(profile, **HOST)
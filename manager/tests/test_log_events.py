@@ -0,0 +1,117 @@
+import pytest
+
+from core.log_events import LogEventIndex, classify
+
+UUID = "069a79f4-44e9-4726-a5be-fca90e38aaf5"
+
+# Même message dans les trois formats de préfixe rencontrés
+VANILLA = "[14:02:11] [Server thread/INFO]: "
+PAPER = "[14:02:11 INFO]: "
+FORGE = "[18Oct2026 14:02:11.482] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: "
+PREFIXES = pytest.mark.parametrize("prefix", [VANILLA, PAPER, FORGE], ids=["vanilla", "paper", "forge"])
+
+MESSAGES = [
+    ("Steve joined the game", ("join", {"player": "Steve"})),
+    ("Steve left the game", ("leave", {"player": "Steve"})),
+    ("Steve[/127.0.0.1:54321] logged in with entity id 187 at (0.5, 64.0, 0.5)",
+     ("login", {"player": "Steve", "ip": "127.0.0.1"})),
+    ("Steve[/[0:0:0:0:0:0:0:1]:54321] logged in with entity id 187 at (0.5, 64.0, 0.5)",
+     ("login", {"player": "Steve", "ip": "[0:0:0:0:0:0:0:1]"})),
+    ("There are 2 of a max of 20 players online: Steve, Alex",
+     ("player_list", {"count": 2, "max": 20, "players": ["Steve", "Alex"]})),
+    ("There are 0 of a max of 20 players online: ", ("player_list", {"count": 0, "max": 20, "players": []})),
+    ("Disconnecting Steve (/127.0.0.1:54321): You are not white-listed on this server!",
+     ("whitelist_denied", {"player": "Steve"})),
+    ("Disconnecting com.mojang.authlib.GameProfile@1b2c3d[id=<null>,name=Steve,properties={},legacy=false] "
+     "(/127.0.0.1:54321): You are not white-listed on this server!",
+     ("whitelist_denied", {"player": "Steve"})),
+    ("Steve (/127.0.0.1:54321) lost connection: You are not white-listed on this server!",
+     ("whitelist_denied", {"player": "Steve"})),
+    ("<Steve> salut <3", ("chat", {"player": "Steve", "message": "salut <3"})),
+    ("[Not Secure] <Steve> salut", ("chat", {"player": "Steve", "message": "salut"})),
+    ("Done (3.217s)! For help, type \"help\"", None),
+    ("Steve has made the advancement [Stone Age]", None),
+]
+
+
+@PREFIXES
+@pytest.mark.parametrize("message, expected", MESSAGES)
+def test_classify_player_lines(prefix, message, expected):
+    assert classify(prefix + message) == expected
+
+
+@PREFIXES
+def test_classify_uuid_line(prefix):
+    line = prefix.replace("Server thread", "User Authenticator #1") + f"UUID of player Steve is {UUID}"
+
+    assert classify(line) == ("uuid", {"player": "Steve", "uuid": UUID})
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("[14:02:11] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2503ms or 50 ticks behind",
+     ("lag", {"ms": 2503, "ticks": 50})),
+    ("[14:02:11 WARN]: Can't keep up! Is the server overloaded? Running 2503ms or 50 ticks behind",
+     ("lag", {"ms": 2503, "ticks": 50})),
+    ("[14:02:11 INFO]: §6TPS from last 1m, 5m, 15m: §a*20.0, §a19.97, §a19.98", ("tps", {"tps": 20.0})),
+    ("[14:02:11] [Server thread/INFO] [minecraft/TPSCommand]: Overall: Mean tick time: 3.412 ms. Mean TPS: 20.000",
+     ("tps", {"mspt": 3.412, "tps": 20.0})),
+    ("[14:02:11] [Server thread/ERROR]: Encountered an unexpected exception",
+     ("error", {"level": "ERROR", "message": "Encountered an unexpected exception"})),
+    ("[14:02:11 ERROR]: Could not pass event PlayerJoinEvent to Essentials",
+     ("error", {"level": "ERROR", "message": "Could not pass event PlayerJoinEvent to Essentials"})),
+    ("java.lang.NullPointerException: Cannot invoke \"Object.toString()\"",
+     ("error", {"level": "ERROR", "message": "java.lang.NullPointerException: Cannot invoke \"Object.toString()\""})),
+    ("\tat net.minecraft.server.MinecraftServer.tick(MinecraftServer.java:123)", None),
+    ("[14:02:11] [Server thread/WARN]: Ambiguity between arguments [teleport, targets] and [teleport, location]", None),
+])
+def test_classify_server_lines(line, expected):
+    assert classify(line) == expected
+
+
+def test_whitelist_denied_gets_uuid_from_authenticator_line():
+    events = LogEventIndex()
+    events.feed(1, f"[14:02:11 INFO]: UUID of player Steve is {UUID}")
+    events.feed(2, "[14:02:11 INFO]: Disconnecting Steve (/127.0.0.1:54321): You are not white-listed on this server!")
+
+    assert events.last("whitelist_denied")["uuid"] == UUID
+    assert events.counts()["uuid"] == 1
+
+
+# Sortie réelle de `tick query` (1.20.3+) : message sur deux lignes, la 2e sans préfixe
+TICK_QUERY = [
+    "[14:02:11] [Server thread/INFO]: The game is running normally",
+    "[14:02:11] [Server thread/INFO]: Target tick rate: 20.0 per second.",
+    "Average time per tick: 3.2ms (Target: 50.0ms)",
+    "[14:02:11] [Server thread/INFO]: Percentiles: P50: 2.9ms P95: 4.8ms P99: 7.1ms, sample: 100",
+]
+
+
+def test_tick_query_continuation_line_gives_tps():
+    assert [classify(line) for line in TICK_QUERY] == [
+        None, None, ("tps", {"mspt": 3.2, "tps": 20.0}), None,
+    ]
+
+
+@pytest.mark.parametrize("line, expected", [
+    # Réponse renvoyée d'un bloc (RCON, console relayée) : les deux lignes accolées
+    ("[14:02:11] [Server thread/INFO]: Target tick rate: 20.0 per second.Average time per tick: 3.2ms (Target: 50.0ms)",
+     {"mspt": 3.2, "tps": 20.0}),
+    ("[14:02:11 INFO]: Target tick rate: 20.0 per second. Average time per tick: 80.0ms (Target: 50.0ms)",
+     {"mspt": 80.0, "tps": 12.5}),
+    # `tick rate 10` : TPS plafonné à la cible, pas à 20
+    ("[14:02:11] [Server thread/INFO]: Target tick rate: 10.0 per second.Average time per tick: 2.0ms (Target: 100.0ms)",
+     {"mspt": 2.0, "tps": 10.0}),
+    # `tick sprint` en cours : pas de cible affichée
+    ("Average time per tick: 4.0ms", {"mspt": 4.0, "tps": 20.0}),
+])
+def test_tick_query_inline_forms(line, expected):
+    assert classify(line) == ("tps", expected)
+
+
+def test_tick_query_feeds_last_tps_event():
+    events = LogEventIndex()
+    for seq, line in enumerate(TICK_QUERY, 1):
+        events.feed(seq, line)
+
+    assert events.last("tps")["seq"] == 3
+    assert events.last("tps")["tps"] == 20.0
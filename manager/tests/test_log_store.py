@@ -0,0 +1,47 @@
+from core.log_store import LogStore
+
+
+def filled(count, maxlen=1000):
+    store = LogStore(maxlen=maxlen)
+    for i in range(1, count + 1):
+        store.append(f"line {i}")
+    return store
+
+
+def test_since_returns_new_lines_and_cursor():
+    store = filled(5)
+
+    entries, cursor, reset = store.since(3)
+
+    assert [line for _, line in entries] == ["line 4", "line 5"]
+    assert cursor == 5 and not reset
+    assert store.since(cursor) == ([], 5, False)
+
+
+def test_limit_keeps_the_oldest_lines():
+    store = filled(5)
+
+    entries, cursor, _ = store.since(0, limit=2)
+
+    assert [seq for seq, _ in entries] == [1, 2]
+    assert cursor == 2  # la suite au prochain appel
+
+
+def test_limit_below_one_still_advances():
+    store = filled(3)
+
+    for limit in (0, -5):
+        entries, cursor, reset = store.since(0, limit=limit)
+        assert [seq for seq, _ in entries] == [1]
+        assert cursor == 1 and not reset
+
+
+def test_cursor_outside_buffer_resets():
+    store = filled(10, maxlen=4)
+
+    entries, cursor, reset = store.since(2)
+    assert reset and [seq for seq, _ in entries] == [7, 8, 9, 10]
+
+    # Curseur d'une exécution précédente du manager (plus grand que la dernière séquence)
+    entries, cursor, reset = store.since(500)
+    assert reset and cursor == 10
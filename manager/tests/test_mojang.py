@@ -0,0 +1,134 @@
+import hashlib
+import json
+import time
+
+import pytest
+
+from core import mojang
+from core.mojang import UUIDResolver
+from http_stub import send
+
+# Comptes existants côté stub : nom canonique -> id Mojang (32 hex)
+ACCOUNTS = {name: hashlib.md5(name.encode()).hexdigest() for name in
+            ["Notch", "jeb_", "Dinnerbone", "Grumm"] + [f"Player{i}" for i in range(40)]}
+BY_LOWER = {name.lower(): name for name in ACCOUNTS}
+
+
+@pytest.fixture
+def mojang_api(stub):
+    """Stub de POST /profiles/minecraft : ne renvoie que les comptes existants, noms canoniques"""
+    stub.batches = []
+    stub.delay = 0
+
+    @stub.route("POST", "/profiles/minecraft")
+    def profiles(handler, body):
+        names = json.loads(body)
+        stub.batches.append(names)
+        if len(names) > mojang.BULK_SIZE:
+            send(handler, 400, b'{"error": "too many names"}')
+            return
+        time.sleep(stub.delay)
+        found = [{"id": ACCOUNTS[BY_LOWER[n.lower()]], "name": BY_LOWER[n.lower()]}
+                 for n in names if n.lower() in BY_LOWER]
+        send(handler, 200, json.dumps(found).encode(), {"Content-Type": "application/json"})
+
+    return stub
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge manuelle pour les TTL du cache"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(mojang.time, "time", lambda: now[0])
+    return now
+
+
+def make_resolver(api, tmp_path, **kwargs):
+    return UUIDResolver(tmp_path / "uuids.json", base_url=api.url(""), **kwargs)
+
+
+def test_batches_of_ten(mojang_api, tmp_path):
+    names = [f"Player{i}" for i in range(25)]
+    resolver = make_resolver(mojang_api, tmp_path)
+
+    profiles, errors = resolver.resolve(names)
+
+    assert errors == {}
+    assert sorted(len(batch) for batch in mojang_api.batches) == [5, 10, 10]
+    assert profiles["Player7"] == {"name": "Player7", "uuid": mojang.format_uuid(ACCOUNTS["Player7"])}
+
+
+def test_mixed_case_names(mojang_api, tmp_path):
+    resolver = make_resolver(mojang_api, tmp_path)
+
+    profiles, _ = resolver.resolve(["NOTCH", "Jeb_", "dinnerbone"])
+
+    assert profiles["NOTCH"]["name"] == "Notch"
+    assert profiles["Jeb_"]["name"] == "jeb_"
+    assert profiles["dinnerbone"]["uuid"] == mojang.format_uuid(ACCOUNTS["Dinnerbone"])
+    # Une autre casse du même pseudo sort du cache
+    profiles, _ = resolver.resolve(["notch"])
+    assert profiles["notch"]["name"] == "Notch"
+    assert len(mojang_api.batches) == 1
+
+
+def test_negative_cache_ttl(mojang_api, tmp_path, clock):
+    resolver = make_resolver(mojang_api, tmp_path, negative_ttl=60)
+
+    profiles, _ = resolver.resolve(["Ghost"])
+    assert profiles == {"Ghost": None}
+
+    clock[0] += 59
+    assert resolver.resolve(["ghost"])[0] == {"ghost": None}
+    assert len(mojang_api.batches) == 1  # inexistant, servi par le cache négatif
+
+    clock[0] += 2
+    resolver.resolve(["Ghost"])
+    assert mojang_api.batches[-1] == ["Ghost"]  # TTL écoulé : re-vérifié
+    assert len(mojang_api.batches) == 2
+
+
+def test_disk_lru_survives_reload(mojang_api, tmp_path):
+    resolver = make_resolver(mojang_api, tmp_path, maxsize=3)
+    resolver.resolve(["Notch", "jeb_", "Dinnerbone"])
+    resolver.resolve(["Notch"])       # Notch redevient le plus récent
+    resolver.resolve(["Grumm"])       # évince jeb_, le moins récemment utilisé
+    batches = len(mojang_api.batches)
+
+    reloaded = make_resolver(mojang_api, tmp_path, maxsize=3)
+    profiles, _ = reloaded.resolve(["Notch", "Dinnerbone", "Grumm"])
+
+    assert len(mojang_api.batches) == batches  # tout vient du cache disque
+    assert profiles["Grumm"]["name"] == "Grumm"
+    reloaded.resolve(["jeb_"])
+    assert mojang_api.batches[-1] == ["jeb_"]
+
+
+def test_api_error_is_reported_not_cached(stub, tmp_path):
+    stub.route("POST", "/profiles/minecraft")(lambda handler, body: send(handler, 500, b"down"))
+    resolver = make_resolver(stub, tmp_path)
+
+    profiles, errors = resolver.resolve(["Notch"])
+
+    assert profiles == {} and "Notch" in errors
+    assert resolver._lookup("Notch") is False
+
+
+def test_warm_cache_skips_the_api(mojang_api, tmp_path):
+    """Ordre de grandeur du gain : lots en parallèle à froid, aucun appel à chaud"""
+    mojang_api.delay = 0.2
+    names = [f"Player{i}" for i in range(40)]
+    resolver = make_resolver(mojang_api, tmp_path, concurrency=4)
+
+    started = time.perf_counter()
+    resolver.resolve(names)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    profiles, _ = resolver.resolve(names)
+    warm = time.perf_counter() - started
+
+    assert len(mojang_api.batches) == 4       # 40 pseudos = 4 lots, tous partis ensemble
+    assert 0.2 <= cold < 0.8                  # un aller-retour (lots parallèles), pas quatre
+    assert warm < 0.05                        # aucun appel réseau
+    assert all(profiles[name] for name in names)
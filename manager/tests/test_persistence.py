@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from core import process_manager as pm
+from core.file_cache import FileCache
+from core.persistence import WriteBehind, atomic_write_text
+
+
+def cached_writes():
+    """Cache + écritures comme dans process_manager : amorcé avant l'écriture, invalidé après"""
+    cache = FileCache(lambda path: json.loads(path.read_text()), default=[])
+    writes = WriteBehind(on_flush=cache.invalidate)
+
+    def write(path, value):
+        cache.prime(path, value)
+        writes.write(path, json.dumps(value))
+    return cache, writes, write
+
+
+def test_atomic_write_keeps_previous_content_on_error(tmp_path):
+    path = tmp_path / "state.json"
+    atomic_write_text(path, "old")
+
+    with pytest.raises(TypeError):
+        atomic_write_text(path, None)
+
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]  # pas de .tmp laissé
+
+
+def test_batch_writes_last_version_once(tmp_path):
+    cache, writes, write = cached_writes()
+    path = tmp_path / "whitelist.json"
+
+    with writes.batch():
+        write(path, ["a"])
+        write(path, ["a", "b"])
+        assert not path.exists()
+        assert cache.get(path) == ("a", "b")  # lecteurs : valeur en attente
+
+    assert json.loads(path.read_text()) == ["a", "b"]
+    assert cache.get(path) == ("a", "b")
+
+
+def test_failed_write_does_not_leave_primed_value(tmp_path):
+    cache, writes, write = cached_writes()
+    path = tmp_path / "missing-dir" / "whitelist.json"
+
+    with pytest.raises(FileNotFoundError):
+        write(path, [{"name": "Ghost"}])
+
+    assert cache.get(path) == ()
+
+
+def test_failed_batch_does_not_leave_primed_values(tmp_path):
+    cache, writes, write = cached_writes()
+    good, bad = tmp_path / "good.json", tmp_path / "missing-dir" / "bad.json"
+
+    with pytest.raises(FileNotFoundError):
+        with writes.batch():
+            write(bad, ["ghost"])
+            write(good, ["kept?"])
+
+    # Écrit dans l'ordre : le lot s'arrête sur bad, good est abandonné
+    assert cache.get(bad) == ()
+    assert not good.exists() and cache.get(good) == ()
+    assert writes.pending(good) is None
+
+
+def test_state_file_failure_is_not_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pm, "SERVER_DIR", tmp_path / "absent")
+
+    with pytest.raises(FileNotFoundError):
+        pm._write_state_file(pm.SERVER_DIR / "whitelist.json", json.dumps([{"uuid": "x", "name": "Ghost"}]))
+
+    assert pm.get_whitelist() == ()
@@ -0,0 +1,73 @@
+import time
+
+from core.log_events import LogEventIndex
+from core.players import PlayerRoster
+
+STEVE_UUID = "069a79f4-44e9-4726-a5be-fca90e38aaf5"
+
+
+def roster_fed(*lines):
+    """Roster branché sur un index, comme dans Instance, alimenté par des lignes brutes"""
+    events, roster = LogEventIndex(), PlayerRoster()
+    events.add_listener(roster.on_event)
+    for seq, line in enumerate(lines, 1):
+        events.feed(seq, line)
+    return roster
+
+
+STEVE_CONNECTS = (
+    f"[14:02:10] [User Authenticator #1/INFO]: UUID of player Steve is {STEVE_UUID}",
+    "[14:02:11] [Server thread/INFO]: Steve[/127.0.0.1:54321] logged in with entity id 187 at (0.5, 64.0, 0.5)",
+    "[14:02:11] [Server thread/INFO]: Steve joined the game",
+)
+
+
+def test_join_attaches_uuid_and_ip():
+    roster = roster_fed(*STEVE_CONNECTS)
+
+    session = roster.get("steve")
+    assert session["name"] == "Steve"
+    assert session["uuid"] == STEVE_UUID and session["ip"] == "127.0.0.1"
+    assert session["session_seconds"] == 0
+    assert roster.is_online("STEVE") and len(roster) == 1
+
+
+def test_leave_removes_session():
+    roster = roster_fed(*STEVE_CONNECTS, "[14:05:00] [Server thread/INFO]: Steve left the game")
+
+    assert roster.get("Steve") is None
+    assert len(roster) == 0
+
+
+def test_denied_player_is_not_kept_pending():
+    roster = roster_fed(
+        f"[14:02:10 INFO]: UUID of player Steve is {STEVE_UUID}",
+        "[14:02:10 INFO]: Disconnecting Steve (/127.0.0.1:54321): You are not white-listed on this server!",
+        "[14:03:00 INFO]: There are 1 of a max of 20 players online: Steve",
+    )
+
+    # Connexion vue seulement par `list` : pas d'UUID périmé rattaché
+    assert roster.get("Steve")["uuid"] is None
+
+
+def test_list_reconciliation_adds_and_removes():
+    roster = roster_fed(
+        *STEVE_CONNECTS,
+        "[14:02:30] [Server thread/INFO]: Alex joined the game",
+        # Départ d'Alex manqué, Notch connecté pendant que le manager était arrêté
+        "[14:10:00] [Server thread/INFO]: There are 2 of a max of 10 players online: Steve, Notch",
+    )
+
+    assert [s["name"] for s in roster.list()] == ["Notch", "Steve"]
+    assert roster.get("Steve")["uuid"] == STEVE_UUID  # session existante conservée
+    assert roster.get("Notch")["joined"] is None and roster.get("Notch")["session_seconds"] is None
+    assert roster.max_players == 10
+    assert roster.reconciled_at is not None
+
+
+def test_empty_list_clears_roster():
+    roster = roster_fed(*STEVE_CONNECTS)
+
+    roster.reconcile([], now=time.time())
+
+    assert roster.list() == []
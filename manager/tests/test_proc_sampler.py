@@ -0,0 +1,39 @@
+import os
+import time
+
+from core.proc_sampler import ProcessSampler, read_proc
+
+
+def test_read_proc_fields():
+    raw = read_proc(os.getpid())
+    assert raw["state"] in "RSD"
+    assert raw["threads"] >= 1
+    assert raw["rss_kb"] > 0
+
+
+def test_cpu_percent_from_two_samples():
+    sampler = ProcessSampler(os.getpid)
+    first = sampler.sample(os.getpid())
+    assert first["cpu_percent"] is None  # pas encore d'échantillon de référence
+
+    deadline = time.process_time() + 0.2
+    while time.process_time() < deadline:
+        pass
+    second = sampler.sample(os.getpid())
+
+    assert second["cpu_percent"] > 20
+    assert sampler.metrics.export()["series"]["rss_mb"]
+
+
+def test_sample_cost():
+    """Coût d'un échantillon (3 petits fichiers /proc) : de l'ordre de 100 µs, borne large ici"""
+    sampler = ProcessSampler(os.getpid)
+    pid = os.getpid()
+    sampler.sample(pid)
+    runs = 500
+    started = time.perf_counter()
+    for _ in range(runs):
+        sampler.sample(pid)
+    per_sample = (time.perf_counter() - started) / runs
+    print(f"proc sample: {per_sample * 1e6:.0f} µs")
+    assert per_sample < 0.002
@@ -0,0 +1,130 @@
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from core.prometheus import CONTENT_TYPE, HTTPMetricsMiddleware, Registry
+
+
+def samples(text):
+    """Lignes d'échantillons (hors # HELP / # TYPE) -> {série: valeur}"""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            result[series] = float(value)
+    return result
+
+
+def test_counter_with_and_without_labels():
+    registry = Registry()
+    plain = registry.counter("mc_starts_total", "Démarrages")
+    labelled = registry.counter("mc_backups_total", "Backups", ("status",))
+
+    text = registry.render()
+    assert "# TYPE mc_starts_total counter" in text
+    assert samples(text)["mc_starts_total"] == 0  # exposé avant le premier inc()
+
+    plain.inc()
+    labelled.labels("success").inc(2)
+    labelled.labels("failed").inc()
+
+    values = samples(registry.render())
+    assert values["mc_starts_total"] == 1
+    assert values['mc_backups_total{status="success"}'] == 2
+    assert values['mc_backups_total{status="failed"}'] == 1
+
+
+def test_labelled_gauges():
+    registry = Registry()
+    state = {"lobby": 1, "survival": 0}
+    registry.gauge("mc_instance_state", "État par instance", ("instance",), fn=lambda: dict(state))
+    players = registry.gauge("mc_players_online", "Joueurs", ("instance",))
+    players.labels("lobby").set(3)
+
+    text = registry.render()
+    values = samples(text)
+    assert "# TYPE mc_instance_state gauge" in text
+    assert values['mc_instance_state{instance="lobby"}'] == 1
+    assert values['mc_instance_state{instance="survival"}'] == 0
+    assert values['mc_players_online{instance="lobby"}'] == 3
+
+    # Valeur calculée au scrape
+    state["survival"] = 1
+    assert samples(registry.render())['mc_instance_state{instance="survival"}'] == 1
+
+
+def test_gauge_callback_error_keeps_exposition_valid():
+    registry = Registry()
+    registry.gauge("mc_broken", "Échoue", fn=lambda: 1 / 0)
+    registry.counter("mc_after_total", "Toujours exposé")
+
+    text = registry.render()
+    assert "# TYPE mc_broken gauge" in text
+    assert samples(text) == {"mc_after_total": 0}
+
+
+def test_histogram_buckets_sum_count():
+    registry = Registry()
+    histogram = registry.histogram("mc_backup_seconds", "Durée", ("kind",), buckets=(0.1, 1, 10))
+    for value in (0.05, 0.5, 0.5, 5, 50):
+        histogram.labels("snapshot").observe(value)
+
+    values = samples(registry.render())
+    assert values['mc_backup_seconds_bucket{kind="snapshot",le="0.1"}'] == 1
+    assert values['mc_backup_seconds_bucket{kind="snapshot",le="1"}'] == 3
+    assert values['mc_backup_seconds_bucket{kind="snapshot",le="10"}'] == 4
+    assert values['mc_backup_seconds_bucket{kind="snapshot",le="+Inf"}'] == 5  # cumulatif
+    assert values['mc_backup_seconds_sum{kind="snapshot"}'] == 56.05
+    assert values['mc_backup_seconds_count{kind="snapshot"}'] == 5
+
+
+def test_bucket_bound_is_inclusive():
+    registry = Registry()
+    histogram = registry.histogram("mc_h", "h", buckets=(1,))
+    histogram.observe(1)
+    assert samples(registry.render())['mc_h_bucket{le="1"}'] == 1
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("mc_c_total", "c", ("route",)).labels('a"b\\c\nd').inc()
+    assert 'mc_c_total{route="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = Registry()
+    first = registry.counter("mc_c_total", "c")
+    first.inc()
+    assert registry.counter("mc_c_total", "c") is first
+    assert samples(registry.render())["mc_c_total"] == 1
+
+
+def make_app():
+    registry = Registry()
+    app = FastAPI()
+    app.add_middleware(HTTPMetricsMiddleware, histogram=registry.histogram(
+        "mc_http_request_duration_seconds", "Latence", ("method", "route", "status")))
+
+    @app.get("/jobs/{job_id}")
+    async def job(job_id: str):
+        return {"id": job_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    return TestClient(app)
+
+
+def test_middleware_labels_route_template():
+    client = make_app()
+    for job_id in ("1", "2", "3"):
+        assert client.get(f"/jobs/{job_id}").status_code == 200
+    client.get("/nowhere")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == CONTENT_TYPE
+    values = samples(response.text)
+    # Une seule série pour les trois URL : le gabarit, pas le chemin
+    assert values['mc_http_request_duration_seconds_count{method="GET",route="/jobs/{job_id}",status="200"}'] == 3
+    assert not any("/jobs/1" in series for series in values)
+    assert values['mc_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}'] == 1
@@ -0,0 +1,33 @@
+import pytest
+
+from core.schedules import validate_schedule
+
+RESTART = {"action": "restart", "trigger": {"type": "cron", "cron": "0 4 * * *"}}
+
+
+def test_defaults_are_filled_in():
+    schedule = validate_schedule(RESTART)
+
+    assert schedule["enabled"] is True
+    assert schedule["policy"]["prefer_empty"] is True
+    assert schedule["policy"]["max_delay_minutes"] == 60
+
+
+def test_booleans_are_kept():
+    schedule = validate_schedule({**RESTART, "enabled": False, "policy": {"prefer_empty": False}})
+
+    assert schedule["enabled"] is False
+    assert schedule["policy"]["prefer_empty"] is False
+
+
+@pytest.mark.parametrize("schedule", [
+    {**RESTART, "policy": {"prefer_empty": "false"}},
+    {**RESTART, "policy": {"prefer_empty": 0}},
+    {**RESTART, "policy": {"prefer_empty": None}},
+    {"action": "backup", "trigger": {"type": "interval", "minutes": 60}, "policy": {"skip_unchanged": "no"}},
+    {**RESTART, "enabled": "false"},
+])
+def test_non_boolean_flags_are_rejected(schedule):
+    """bool("false") vaut True : la valeur n'est pas convertie, elle est refusée"""
+    with pytest.raises(ValueError):
+        validate_schedule(schedule)
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from core.watchdog import Watchdog
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.starts = 0
+        self.is_alive = False
+
+    async def start(self):
+        self.starts += 1
+        self.is_alive = True
+        return True
+
+
+class FakeInstance:
+    id = "test"
+
+    def __init__(self):
+        self.supervisor = FakeSupervisor()
+
+    @property
+    def is_running(self):
+        return self.supervisor.is_alive
+
+
+def watchdog(tmp_path):
+    return Watchdog(FakeInstance(), tmp_path / "crashes.json")
+
+
+def test_planned_restart_runs(tmp_path):
+    wd = watchdog(tmp_path)
+
+    async def scenario():
+        wd._schedule(0.01)
+        await asyncio.sleep(0.05)
+    asyncio.run(scenario())
+
+    assert wd.instance.supervisor.starts == 1
+
+
+def test_maintenance_drops_planned_restart(tmp_path):
+    """Crash puis restauration de backup avant l'échéance : pas de relance sur le monde restauré"""
+    wd = watchdog(tmp_path)
+
+    async def scenario():
+        wd._schedule(0.01)
+        with wd.maintenance():
+            pass
+        await asyncio.sleep(0.05)
+    asyncio.run(scenario())
+
+    assert wd.instance.supervisor.starts == 0
+    assert wd.status()["restart_at"] is None
+
+
+def test_restart_due_during_maintenance_is_skipped(tmp_path):
+    wd = watchdog(tmp_path)
+    holding, done = threading.Event(), threading.Event()
+
+    def destructive_operation():
+        with wd.maintenance():
+            holding.set()
+            done.wait(5)
+    worker = threading.Thread(target=destructive_operation)
+    worker.start()
+    holding.wait(5)
+
+    # Échéance atteinte pendant l'opération (relance planifiée juste après son début)
+    asyncio.run(wd._restart(wd._generation))
+    done.set()
+    worker.join()
+
+    assert wd.instance.supervisor.starts == 0
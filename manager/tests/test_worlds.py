@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from core import process_manager as pm
+
+REGION_FILES = 2000
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """Arborescence minecraft-manager isolée : monde 'alpha' actif, 'beta' archivé"""
+    root = tmp_path / "minecraft-manager"
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(pm, "SERVER_DIR", root / "server" / "current")
+    monkeypatch.setattr(pm, "WORLDS_DIR", root / "worlds")
+    monkeypatch.setattr(pm, "BACKUPS_DIR", root / "backups" / "worlds")
+    monkeypatch.setattr(pm, "CURRENT_WORLD_MARKER", root / ".current_world")
+
+    pm.SERVER_DIR.mkdir(parents=True)
+    (pm.SERVER_DIR / "server.properties").write_text("max-players=20\nwhite-list=false\n")
+    (pm.SERVER_DIR / "whitelist.json").write_text("[]")
+    make_world(pm.SERVER_DIR / "world", "alpha")
+    pm.CURRENT_WORLD_MARKER.write_text("alpha")
+    make_world(pm.WORLDS_DIR / "beta", "beta")
+    (pm.WORLDS_DIR / "beta" / "config.json").write_text(
+        '{"max_players": 5, "whitelist_enabled": false, "whitelist_players": []}')
+    return root
+
+
+def make_world(path, tag, regions=3):
+    (path / "region").mkdir(parents=True)
+    (path / "level.dat").write_text(tag)
+    for i in range(regions):
+        (path / "region" / f"r.{i}.0.mca").write_bytes(b"x")
+
+
+def active_world():
+    return (pm.SERVER_DIR / "world" / "level.dat").read_text()
+
+
+def test_switch_is_a_rename(home):
+    """Temps constant quelle que soit la taille du monde : ~5 ms pour 2000 fichiers région, borne large ici"""
+    for world in (pm.SERVER_DIR / "world", pm.WORLDS_DIR / "beta"):
+        for i in range(REGION_FILES):
+            (world / "region" / f"r.{i}.1.mca").write_bytes(b"x")
+
+    started = time.perf_counter()
+    result = pm.switch_world("beta")
+    elapsed = time.perf_counter() - started
+    print(f"switch: {elapsed * 1000:.1f} ms")
+
+    assert result["success"] and result["mode"] == "rename"
+    assert elapsed < 0.5
+    assert active_world() == "beta"
+    assert (pm.WORLDS_DIR / "alpha" / "level.dat").read_text() == "alpha"
+    assert len(list((pm.WORLDS_DIR / "alpha" / "region").iterdir())) == REGION_FILES + 3
+    assert sorted(p.name for p in (pm.WORLDS_DIR / "beta").iterdir()) == ["config.json"]
+    assert pm.get_current_world() == "beta"
+    assert pm.get_server_properties()["max-players"] == "5"
+
+
+def test_switch_rolls_back_on_any_error(home, monkeypatch):
+    def broken(world_name):
+        raise KeyError("max_players")
+    monkeypatch.setattr(pm, "apply_world_config", broken)
+
+    result = pm.switch_world("beta")
+
+    assert not result["success"]
+    assert active_world() == "alpha"
+    assert (pm.WORLDS_DIR / "beta" / "level.dat").read_text() == "beta"
+    assert not (pm.WORLDS_DIR / "alpha").exists()
+    assert pm.CURRENT_WORLD_MARKER.read_text() == "alpha"
+
+
+def test_create_new_world_rolls_back(home, monkeypatch):
+    def broken(updates):
+        raise OSError("disque plein")
+    monkeypatch.setattr(pm, "update_server_properties", broken)
+
+    result = pm.create_new_world("gamma")
+
+    assert not result["success"]
+    assert active_world() == "alpha"
+    assert not (pm.WORLDS_DIR / "alpha").exists()
+    assert not (pm.WORLDS_DIR / "gamma").exists()
+    assert pm.CURRENT_WORLD_MARKER.read_text() == "alpha"
+
+
+def test_restore_rolls_back_on_broken_archive(home):
+    backup_dir = pm.BACKUPS_DIR / "beta"
+    backup_dir.mkdir(parents=True)
+    (backup_dir / "old.tar.gz").write_bytes(b"pas une archive")
+
+    result = pm.restore_backup("beta", "old.tar.gz")
+
+    assert not result["success"]
+    assert active_world() == "alpha"
+    assert (pm.WORLDS_DIR / "beta" / "level.dat").read_text() == "beta"
+    assert not (pm.WORLDS_DIR / "alpha").exists()
+    assert not list(pm.SERVER_DIR.glob("world_before_restore_*"))
+    assert pm.CURRENT_WORLD_MARKER.read_text() == "alpha"
+
+
+def test_backup_before_update_rolls_back(home, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("disque plein")
+    monkeypatch.setattr(pm.archive, "write_archive", broken)
+
+    result = pm.backup_server_before_update()
+
+    assert not result["success"]
+    assert active_world() == "alpha"
+    assert not (pm.WORLDS_DIR / "alpha").exists()
+
+
+def test_exports_in_the_same_second_do_not_overwrite(home):
+    first = pm.export_world_archive()
+    second = pm.export_world_archive()
+
+    assert first["success"] and second["success"]
+    assert first["file"] != second["file"]
+    assert len(list((pm.BACKUPS_DIR / "alpha").glob("archive_*"))) == 2